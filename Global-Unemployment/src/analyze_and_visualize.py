@@ -1,100 +1,142 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import seaborn as sns
-import os
 
-# Load cleaned data
-df = pd.read_csv("data/cleaned/cleaned_unemployment.csv")
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.chart_jobs import ChartRegistry, content_hash
+from etl_common.parquet_store import read_processed
+
+PARQUET_PATH = "data/cleaned/cleaned_unemployment.parquet"
+CSV_PATH = "data/cleaned/cleaned_unemployment.csv"
+
+# Each chart is a pure function of (data, spec), rendered with these global styles; unchanged charts are skipped
+charts = ChartRegistry("outputs", style="whitegrid", rc={"figure.autolayout": True})
+
+
+def load_unemployment():
+    # Load cleaned data, projecting only the columns the charts use
+    df = read_processed(PARQUET_PATH, CSV_PATH, columns=["country_name", "sex", "age_group", "year", "unemployment_rate"])
+    df["year"] = df["year"].astype(int)
+    return df
+
+
+# Shared aggregates, computed once per run in the parent process
+def year_mean(df):
+    return df.groupby("year")["unemployment_rate"].mean().reset_index()
+
+def country_top10(df):
+    top = df.groupby("country_name", observed=True)["unemployment_rate"].mean().sort_values(ascending=False).head(10)
+    return top.rename(index=str)
+
+def year_sex_mean(df):
+    return df.groupby(["year", "sex"], observed=True)["unemployment_rate"].mean().reset_index()
 
-# Create output folder
-os.makedirs("outputs", exist_ok=True)
+def age_group_mean(df):
+    age_avg = df.groupby("age_group", observed=True)["unemployment_rate"].mean().sort_values(ascending=False)
+    return age_avg.rename(index=str)
 
-# Convert year to int
-df["year"] = df["year"].astype(int)
+def top_country_trend(df):
+    country_year = df.groupby(["country_name", "year"], observed=True)["unemployment_rate"].mean().reset_index()
+    top_country = country_year.groupby("country_name", observed=True)["unemployment_rate"].mean().idxmax()
+    return country_year[country_year["country_name"] == top_country], top_country
+
+def numeric_corr(df):
+    return df.select_dtypes(include=["float64", "int64"]).corr()
+
+def rates(df):
+    return df["unemployment_rate"]
 
-# Set global styles
-sns.set(style="whitegrid")
-plt.rcParams.update({"figure.autolayout": True})
 
 # 1. Global Average Unemployment Over Time
-plt.figure(figsize=(10, 5))
-global_trend = df.groupby("year")["unemployment_rate"].mean().reset_index()
-sns.lineplot(x="year", y="unemployment_rate", data=global_trend, marker='o')
-plt.title("Global Average Unemployment Rate (2014–2024)")
-plt.ylabel("Unemployment Rate (%)")
-plt.xlabel("Year")
-plt.grid(True)
-plt.savefig("outputs/global_unemployment_trend.png")
-plt.close()
+@charts.chart("global_unemployment_trend.png", prepare=year_mean)
+def global_trend(global_trend, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(x="year", y="unemployment_rate", data=global_trend, marker='o', ax=ax)
+    ax.set_title("Global Average Unemployment Rate (2014–2024)")
+    ax.set_ylabel("Unemployment Rate (%)")
+    ax.set_xlabel("Year")
+    ax.grid(True)
+    return fig
+
 
 # 2. Top 10 Countries with Highest Average Unemployment
-plt.figure(figsize=(12, 6))
-top_countries = df.groupby("country_name")["unemployment_rate"].mean().sort_values(ascending=False).head(10)
-ax = sns.barplot(x=top_countries.values, y=top_countries.index, color="tomato")  # Use a solid color
-ax.bar_label(ax.containers[0], fmt="%.1f", padding=3)
-plt.title("Top 10 Countries with Highest Avg Unemployment (2014–2024)")
-plt.xlabel("Average Unemployment Rate (%)")
-plt.ylabel("Country")
-plt.savefig("outputs/top10_unemployment_countries.png")
-plt.close()
+@charts.chart("top10_unemployment_countries.png", prepare=country_top10)
+def top_countries(top_countries, spec):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=top_countries.values, y=top_countries.index, color="tomato", ax=ax)  # Use a solid color
+    ax.bar_label(ax.containers[0], fmt="%.1f", padding=3)
+    ax.set_title("Top 10 Countries with Highest Avg Unemployment (2014–2024)")
+    ax.set_xlabel("Average Unemployment Rate (%)")
+    ax.set_ylabel("Country")
+    return fig
 
 
 # 3. Unemployment by Gender Over Time
-plt.figure(figsize=(10, 5))
-gender_trend = df.groupby(["year", "sex"])["unemployment_rate"].mean().reset_index()
-sns.lineplot(data=gender_trend, x="year", y="unemployment_rate", hue="sex", marker="o")
-plt.title("Unemployment Trends by Gender (2014–2024)")
-plt.ylabel("Unemployment Rate (%)")
-plt.xlabel("Year")
-plt.grid(True)
-plt.savefig("outputs/unemployment_by_gender.png")
-plt.close()
+@charts.chart("unemployment_by_gender.png", prepare=year_sex_mean)
+def gender_trend(gender_trend, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(data=gender_trend, x="year", y="unemployment_rate", hue="sex", marker="o", ax=ax)
+    ax.set_title("Unemployment Trends by Gender (2014–2024)")
+    ax.set_ylabel("Unemployment Rate (%)")
+    ax.set_xlabel("Year")
+    ax.grid(True)
+    return fig
+
 
 # 4. Unemployment by Age Group
-plt.figure(figsize=(12, 6))
-age_group_avg = df.groupby("age_group")["unemployment_rate"].mean().sort_values(ascending=False)
-ax = sns.barplot(x=age_group_avg.values, y=age_group_avg.index, color="skyblue")  # consistent color
-ax.bar_label(ax.containers[0], fmt="%.1f", padding=3)
-plt.title("Average Unemployment Rate by Age Group (2014–2024)")
-plt.xlabel("Average Unemployment Rate (%)")
-plt.ylabel("Age Group")
-plt.savefig("outputs/unemployment_by_age_group.png")
-plt.close()
+@charts.chart("unemployment_by_age_group.png", prepare=age_group_mean)
+def age_groups(age_group_avg, spec):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=age_group_avg.values, y=age_group_avg.index, color="skyblue", ax=ax)  # consistent color
+    ax.bar_label(ax.containers[0], fmt="%.1f", padding=3)
+    ax.set_title("Average Unemployment Rate by Age Group (2014–2024)")
+    ax.set_xlabel("Average Unemployment Rate (%)")
+    ax.set_ylabel("Age Group")
+    return fig
 
-# 5. Country with Highest Unemployment Over Years
-highest_country = df.groupby(["country_name", "year"])["unemployment_rate"].mean().reset_index()
-top_country = highest_country.groupby("country_name")["unemployment_rate"].mean().idxmax()
-trend_top_country = highest_country[highest_country["country_name"] == top_country]
 
-plt.figure(figsize=(10, 5))
-sns.lineplot(data=trend_top_country, x="year", y="unemployment_rate", marker="o")
-plt.title(f"Unemployment Trend in {top_country} (2014–2024)")
-plt.ylabel("Unemployment Rate (%)")
-plt.xlabel("Year")
-plt.grid(True)
-plt.savefig("outputs/unemployment_trend_top_country.png")
-plt.close()
+# 5. Country with Highest Unemployment Over Years
+@charts.chart("unemployment_trend_top_country.png", prepare=top_country_trend)
+def top_country(data, spec):
+    trend_top_country, top_country = data
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(data=trend_top_country, x="year", y="unemployment_rate", marker="o", ax=ax)
+    ax.set_title(f"Unemployment Trend in {top_country} (2014–2024)")
+    ax.set_ylabel("Unemployment Rate (%)")
+    ax.set_xlabel("Year")
+    ax.grid(True)
+    return fig
 
-print("All visualizations saved in the 'outputs/' folder.")
 
 # 6. Correlation Heatmap
-plt.figure(figsize=(10, 8))
-numeric_cols = df.select_dtypes(include=["float64", "int64"])
-correlation_matrix = numeric_cols.corr()
-sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", fmt=".2f")
-plt.title("Correlation Matrix of Numeric Unemployment Data")
-plt.tight_layout()
-plt.savefig("outputs/correlation_matrix_unemployment.png")
-plt.close()
+@charts.chart("correlation_matrix_unemployment.png", prepare=numeric_corr)
+def correlation_matrix(correlation_matrix, spec):
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
+    ax.set_title("Correlation Matrix of Numeric Unemployment Data")
+    fig.tight_layout()
+    return fig
+
 
 # 7. Unemployment Rate Distribution
-plt.figure(figsize=(10, 5))
-sns.histplot(df["unemployment_rate"], bins=30, kde=True, color="blue")
-plt.axvline(df["unemployment_rate"].mean(), color='red', linestyle='--')
-plt.text(df["unemployment_rate"].mean() + 0.5, 50, f"Mean: {df['unemployment_rate'].mean():.2f}", color="red")
-plt.title("Distribution of Unemployment Rates")
-plt.xlabel("Unemployment Rate (%)")
-plt.ylabel("Frequency")
-plt.tight_layout()
-plt.savefig("outputs/unemployment_distribution.png")
-plt.close()
+@charts.chart("unemployment_distribution.png", prepare=rates)
+def distribution(rates, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.histplot(rates, bins=30, kde=True, color="blue", ax=ax)
+    ax.axvline(rates.mean(), color='red', linestyle='--')
+    ax.text(rates.mean() + 0.5, 50, f"Mean: {rates.mean():.2f}", color="red")
+    ax.set_title("Distribution of Unemployment Rates")
+    ax.set_xlabel("Unemployment Rate (%)")
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    return fig
+
+
+if __name__ == "__main__":
+    stats = charts.run(load_unemployment, source_key=content_hash(PARQUET_PATH, CSV_PATH),
+                       force="--force" in sys.argv)
+    if stats["failed"]:
+        sys.exit(1)
+    print("All visualizations saved in the 'outputs/' folder.")
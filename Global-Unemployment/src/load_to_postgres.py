@@ -1,41 +1,18 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import psycopg2 # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.pg_loader import load_dataframe
+from etl_common.pg_pool import connection
+from etl_common.schemas import UNEMPLOYMENT_DATA
 
 # Load cleaned data
 df = pd.read_csv("data/cleaned/cleaned_unemployment.csv")
 
-# PostgreSQL connection
-conn = psycopg2.connect(
-    dbname="unemploymentdb",
-    user="saisrivatsat", 
-    host="localhost",
-    port=5433
-)
-cur = conn.cursor()
-
-# Create table if not exists
-cur.execute("""
-CREATE TABLE IF NOT EXISTS unemployment_data (
-    country_name TEXT,
-    indicator_name TEXT,
-    sex TEXT,
-    age_group TEXT,
-    age_categories TEXT,
-    year INT,
-    unemployment_rate FLOAT
-)
-""")
+# Create table if not exists and bulk insert via COPY (connection settings from env, see etl_common/pg_pool.py)
+with connection("unemploymentdb") as conn:
+    load_dataframe(conn, UNEMPLOYMENT_DATA, df)
 
-# Insert records
-for _, row in df.iterrows():
-    cur.execute("""
-        INSERT INTO unemployment_data (
-            country_name, indicator_name, sex, age_group, age_categories, year, unemployment_rate
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """, tuple(row))
-
-conn.commit()
-cur.close()
-conn.close()
 print("Unemployment data loaded into PostgreSQL.")
-
@@ -1,45 +1,97 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import os
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.instrumentation import print_summary, stage, timed
+from etl_common.parquet_store import DatasetWriter, read_processed
+from etl_common.streaming import CHUNK_SIZE, CsvWriter, iter_csv
+from unemployment_cube import DIMENSIONS, MEASURE, base_cells, build_cube, combine_base, verify_cube
+
 # Paths
 RAW_PATH = "data/raw/global_unemployment_data.csv"
 CLEANED_PATH = "data/cleaned/cleaned_unemployment.csv"
+PARQUET_PATH = "data/cleaned/cleaned_unemployment.parquet"
+CUBE_PATH = "data/cleaned/unemployment_cube.csv"
+
+ID_COLUMNS = ["country_name", "indicator_name", "sex", "age_group", "age_categories"]
+YEAR_COLUMNS = [str(year) for year in range(2014, 2025)]
+
+# Explicit storage types so readers don't re-infer them from CSV text
+DTYPES = {
+    "country_name": "category",
+    "indicator_name": "category",
+    "sex": "category",
+    "age_group": "category",
+    "age_categories": "category",
+    "year": "int64",
+    "unemployment_rate": "float64",
+}
+
+
+@timed("clean")
+def clean_chunks(path=RAW_PATH, chunksize=CHUNK_SIZE):
+    """Yield the wide raw table as cleaned long-format rows, one chunk of raw rows at a time."""
+    # Each raw row melts into one row per year, so size raw chunks to ~chunksize melted rows
+    raw_chunksize = max(chunksize // len(YEAR_COLUMNS), 1) if chunksize else 0
+    for df in iter_csv(path, raw_chunksize):
+        # Strip whitespace and standardize column names
+        df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+
+        # Melt year columns to convert wide → long format
+        df_long = df.melt(
+            id_vars=ID_COLUMNS,
+            value_vars=YEAR_COLUMNS,
+            var_name="year",
+            value_name="unemployment_rate"
+        )
+
+        # Clean and format
+        df_long["year"] = df_long["year"].astype(int)
+        df_long["unemployment_rate"] = pd.to_numeric(df_long["unemployment_rate"], errors="coerce")
+
+        # Drop rows with missing unemployment rates
+        yield df_long.dropna(subset=["unemployment_rate"])
+
+
+def process(raw_path=RAW_PATH, cleaned_path=CLEANED_PATH, parquet_path=PARQUET_PATH, cube_path=CUBE_PATH,
+            chunksize=CHUNK_SIZE, verify=False):
+    """Clean, write and cube the raw table chunk by chunk; only the cube's base cells are kept across chunks."""
+    base, indicators = None, set()
+    os.makedirs(os.path.dirname(cleaned_path), exist_ok=True)
+    with stage("write_cleaned") as metrics, CsvWriter(cleaned_path, list(DTYPES)) as csv_out, \
+            DatasetWriter(parquet_path, DTYPES) as parquet_out:
+        for df_clean in clean_chunks(raw_path, chunksize):
+            csv_out.write(df_clean)
+            parquet_out.write(df_clean)
+            base = base_cells(df_clean) if base is None else combine_base([base, base_cells(df_clean)])
+            indicators.update(df_clean["indicator_name"].unique().tolist())
+        metrics.add(rows_out=csv_out.rows)
+
+    # Pre-aggregate every country/sex/age/year combination (with "All" levels) for the dashboard
+    with stage("build_cube", rows_in=len(base)) as metrics:
+        cube = build_cube(base=base)
+        metrics.add(rows_out=len(cube))
+    if verify:
+        # Opt-in (--verify): re-reads the cleaned rows into memory, unlike the streaming above
+        with stage("verify_cube", rows_in=csv_out.rows):
+            verify_cube(cube, read_processed(parquet_path, cleaned_path, columns=DIMENSIONS + [MEASURE]))
+    cube.to_csv(cube_path, index=False)
+    return csv_out.rows, base, indicators, cube
+
+
+if __name__ == "__main__":
+    verify = "--verify" in sys.argv
+    rows, base, indicators, cube = process(verify=verify)
+    verified = "verified against raw groupbys" if verify else "not verified (--verify checks it)"
+    print(f"Rollup cube: {len(cube)} cells, {verified} -> {CUBE_PATH}")
 
-# Load raw data
-df = pd.read_csv(RAW_PATH)
-
-# Inspect initial structure
-print("Initial shape:", df.shape)
-print("Columns:", df.columns.tolist())
-print(df.head())
-
-# Strip whitespace and standardize column names
-df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
-
-# Melt year columns to convert wide → long format
-year_cols = [str(year) for year in range(2014, 2025)]
-df_long = df.melt(
-    id_vars=["country_name", "indicator_name", "sex", "age_group", "age_categories"],
-    value_vars=year_cols,
-    var_name="year",
-    value_name="unemployment_rate"
-)
-
-# Clean and format
-df_long["year"] = df_long["year"].astype(int)
-df_long["unemployment_rate"] = pd.to_numeric(df_long["unemployment_rate"], errors="coerce")
-
-# Drop rows with missing unemployment rates
-df_clean = df_long.dropna(subset=["unemployment_rate"])
-
-# Save cleaned version
-os.makedirs("data/cleaned", exist_ok=True)
-df_clean.to_csv(CLEANED_PATH, index=False)
-
-# Summary
-print("Cleaned shape:", df_clean.shape)
-print("Columns:", df_clean.columns.tolist())
-print(df_clean.head())
-print("Unique countries:", df_clean['country_name'].nunique())
-print("Unique years:", df_clean['year'].nunique())
-print("Unique indicators:", df_clean['indicator_name'].unique())
+    # Summary
+    print("Cleaned rows:", rows)
+    print("Columns:", list(DTYPES))
+    print("Unique countries:", base["country_name"].nunique())
+    print("Unique years:", base["year"].nunique())
+    print("Unique indicators:", sorted(indicators))
+    print_summary()
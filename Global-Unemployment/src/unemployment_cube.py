@@ -0,0 +1,121 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["country_name", "sex", "age_group", "year"]
+MEASURE = "unemployment_rate"
+ALL = "All"
+
+
+def base_cells(df):
+    """Sum, count and max of the rate per (country, sex, age group, year), with string labels."""
+    base = (
+        df.groupby(DIMENSIONS, observed=True)[MEASURE]
+        .agg(rate_sum="sum", rate_count="count", rate_max="max")
+        .reset_index()
+    )
+    return base.astype({dim: str for dim in DIMENSIONS})
+
+
+def combine_base(parts):
+    """Merge the `base_cells` of separate chunks of rows into the cells of their union."""
+    return pd.concat(parts, ignore_index=True).groupby(DIMENSIONS, sort=False).agg(
+        rate_sum=("rate_sum", "sum"), rate_count=("rate_count", "sum"), rate_max=("rate_max", "max")
+    ).reset_index()
+
+
+def build_cube(df=None, base=None):
+    """Roll up (sum, count, max, distinct countries) of the rate over every subset of DIMENSIONS.
+
+    Rolled-up dimensions carry the label "All", so the cube holds every
+    selectbox combination. Coarser levels are aggregated from the base cells
+    rather than the raw rows, and means are recombined as sum / count. Pass
+    `base` (from `base_cells`/`combine_base`) instead of `df` when the rows
+    were never held in memory at once.
+    """
+    if base is None:
+        base = base_cells(df)
+
+    levels = []
+    for size in range(len(DIMENSIONS), -1, -1):
+        for dims in combinations(DIMENSIONS, size):
+            dims = list(dims)
+            if dims:
+                grouped = base.groupby(dims, observed=True)
+                level = grouped.agg(rate_sum=("rate_sum", "sum"), rate_count=("rate_count", "sum"),
+                                    rate_max=("rate_max", "max"))
+                level["n_countries"] = grouped["country_name"].nunique()
+                level = level.reset_index()
+            else:
+                level = pd.DataFrame({
+                    "rate_sum": [base["rate_sum"].sum()], "rate_count": [base["rate_count"].sum()],
+                    "rate_max": [base["rate_max"].max()], "n_countries": [base["country_name"].nunique()],
+                })
+            for dim in DIMENSIONS:
+                if dim not in dims:
+                    level[dim] = ALL
+            levels.append(level)
+    cube = pd.concat(levels, ignore_index=True)
+    return cube[DIMENSIONS + ["rate_sum", "rate_count", "rate_max", "n_countries"]]
+
+
+def verify_cube(cube, df):
+    """Check every grouping level of the cube against a direct groupby on the raw rows.
+
+    Raises ValueError on the first missing or differing cell.
+    """
+    lookup = UnemploymentCube(cube)
+    for size in range(len(DIMENSIONS) + 1):
+        for dims in combinations(DIMENSIONS, size):
+            dims = list(dims)
+            if dims:
+                expected = df.groupby(dims, observed=True)[MEASURE].agg(["mean", "max", "count"]).reset_index()
+            else:
+                expected = pd.DataFrame([{"mean": df[MEASURE].mean(), "max": df[MEASURE].max(),
+                                          "count": df[MEASURE].count()}])
+            for row in expected.itertuples(index=False):
+                cell = lookup.cell(**{dim: getattr(row, dim) for dim in dims})
+                if cell is None:
+                    raise ValueError(f"missing cube cell for {dims}: {row}")
+                if not (np.isclose(cell["mean"], row.mean) and np.isclose(cell["max"], row.max)
+                        and cell["count"] == row.count):
+                    raise ValueError(f"cube cell {dims} differs from the groupby: {cell} vs {row}")
+    return True
+
+
+class UnemploymentCube:
+    """Dictionary-backed view of the cube: each filter combination is a single O(1) lookup."""
+
+    def __init__(self, cube):
+        keys = zip(*(cube[dim].astype(str) for dim in DIMENSIONS))
+        values = zip(cube["rate_sum"], cube["rate_count"], cube["rate_max"], cube["n_countries"])
+        self.cells = dict(zip(keys, values))
+        self.values = {}
+        for dim in DIMENSIONS:
+            labels = [v for v in cube[dim].astype(str).unique() if v != ALL]
+            self.values[dim] = sorted(labels, key=int) if dim == "year" else sorted(labels)
+
+    def cell(self, country_name=ALL, sex=ALL, age_group=ALL, year=ALL):
+        found = self.cells.get((str(country_name), str(sex), str(age_group), str(year)))
+        if found is None:
+            return None
+        rate_sum, rate_count, rate_max, n_countries = found
+        return {"mean": rate_sum / rate_count, "max": rate_max, "count": rate_count, "n_countries": n_countries}
+
+    def options(self, dim, **fixed):
+        """Values of `dim` that have data under the fixed filters (everything else rolled up)."""
+        return [value for value in self.values[dim] if self.cell(**{**fixed, dim: value}) is not None]
+
+    def breakdown(self, dims, **fixed):
+        """Mean rate for every combination of `dims` values under the fixed filters, as a DataFrame."""
+        axes = [self.values[dim] if fixed.get(dim, ALL) == ALL else [str(fixed[dim])] for dim in dims]
+        rows = []
+        for combo in pd.MultiIndex.from_product(axes) if len(axes) > 1 else [(v,) for v in axes[0]]:
+            cell = self.cell(**{**fixed, **dict(zip(dims, combo))})
+            if cell is not None:
+                rows.append({**dict(zip(dims, combo)), MEASURE: cell["mean"]})
+        result = pd.DataFrame(rows, columns=dims + [MEASURE])
+        if "year" in dims:
+            result["year"] = result["year"].astype(int)
+        return result
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from unemployment_cube import ALL, MEASURE
+
+# Filter name -> SQL expression; labels are compared as text, like the cube's string keys
+_COLUMNS = {"country_name": "country_name", "sex": "sex", "age_group": "age_group",
+            "year": "CAST(year AS VARCHAR)"}
+
+
+class UnemploymentDuckDB:
+    """The `UnemploymentCube` reads as SQL GROUP BYs over the cleaned rows in an embedded DuckDB.
+
+    `engine` is an `etl_common.duckdb_engine.DuckDBEngine` with the cleaned
+    dataset registered as `table`. Filters are the cube's dimension keywords,
+    with "All" meaning no filter.
+    """
+
+    def __init__(self, engine, table="cleaned_unemployment"):
+        self.engine = engine
+        self.table = table
+
+    def _where(self, **fixed):
+        clauses, params = [f"{MEASURE} IS NOT NULL"], []
+        for dim, value in fixed.items():
+            if value != ALL:
+                clauses.append(f"{_COLUMNS[dim]} = ?")
+                params.append(str(value))
+        return "WHERE " + " AND ".join(clauses), params
+
+    def rows(self, **fixed):
+        """The cleaned rows under the filters, for the download."""
+        where, params = self._where(**fixed)
+        return self.engine.query(f"SELECT * FROM {self.table} {where}", params)
+
+    def cell(self, country_name=ALL, sex=ALL, age_group=ALL, year=ALL):
+        where, params = self._where(country_name=country_name, sex=sex, age_group=age_group, year=year)
+        row = self.engine.query(
+            f"SELECT avg({MEASURE}) AS mean, max({MEASURE}) AS max, count(*) AS count, "
+            f"count(DISTINCT country_name) AS n_countries FROM {self.table} {where}",
+            params,
+        ).iloc[0]
+        if row["count"] == 0:
+            return None
+        return {"mean": row["mean"], "max": row["max"], "count": int(row["count"]), "n_countries": int(row["n_countries"])}
+
+    def options(self, dim, **fixed):
+        """Values of `dim` that have data under the fixed filters (everything else rolled up)."""
+        where, params = self._where(**fixed)
+        values = self.engine.query(f"SELECT DISTINCT {dim} AS value FROM {self.table} {where} ORDER BY 1", params)
+        return values["value"].astype(str).tolist()
+
+    def breakdown(self, dims, **fixed):
+        """Mean rate for every combination of `dims` values under the fixed filters, as a DataFrame."""
+        where, params = self._where(**fixed)
+        columns = ", ".join(dims)
+        result = self.engine.query(
+            f"SELECT {columns}, avg({MEASURE}) AS {MEASURE} FROM {self.table} {where} "
+            f"GROUP BY {columns} ORDER BY {columns}",
+            params,
+        )
+        result = result.astype({dim: str for dim in dims if dim != "year"})
+        if "year" in dims:
+            result["year"] = result["year"].astype(int)
+        return pd.DataFrame(result, columns=dims + [MEASURE])
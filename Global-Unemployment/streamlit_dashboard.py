@@ -1,93 +1,160 @@
 # streamlit_dashboard.py
 
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from pathlib import Path
 
-# Load cleaned data
+# Cleaned data (Parquet when processed, else the CSV it mirrors) is found from this file, not the working directory
 BASE = Path(__file__).resolve().parent
-df = pd.read_csv(BASE / "data" / "cleaned" / "cleaned_unemployment.csv")
-df["year"] = df["year"].astype(int)
-
-# Streamlit page setup
-st.set_page_config(page_title="Global Unemployment Dashboard", layout="wide")
-st.title("📉 Global Unemployment Dashboard (2014–2024)")
-
-# Sidebar Filters
-st.sidebar.header("🔍 Filter Data")
-
-# Country filter
-countries = ["All"] + sorted(df["country_name"].unique())
-selected_country = st.sidebar.selectbox("Country", countries)
-if selected_country != "All":
-    df = df[df["country_name"] == selected_country]
-
-# Gender filter
-genders = ["All"] + sorted(df["sex"].unique())
-selected_gender = st.sidebar.selectbox("Gender", genders)
-if selected_gender != "All":
-    df = df[df["sex"] == selected_gender]
-
-# Age Group filter
-age_groups = ["All"] + sorted(df["age_group"].unique())
-selected_age = st.sidebar.selectbox("Age Group", age_groups)
-if selected_age != "All":
-    df = df[df["age_group"] == selected_age]
-
-# Year filter
-years = ["All"] + sorted(df["year"].unique())
-selected_year = st.sidebar.selectbox("Year", years)
-if selected_year != "All":
-    df = df[df["year"] == selected_year]
-
-# Download filtered data
-st.sidebar.download_button(
-    "📥 Download CSV", data=df.to_csv(index=False), file_name="filtered_unemployment.csv"
-)
-
-# Key Metrics
-st.subheader("📊 Key Statistics")
-col1, col2, col3 = st.columns(3)
-col1.metric("Avg Unemployment Rate", f"{df['unemployment_rate'].mean():.2f}%")
-col2.metric("Max Unemployment Rate", f"{df['unemployment_rate'].max():.2f}%")
-col3.metric("Countries in View", df["country_name"].nunique())
-
-# Line Chart - Global Trend
-st.subheader("📈 Global Unemployment Trend Over Time")
-yearly_avg = df.groupby("year")["unemployment_rate"].mean().reset_index()
-fig1 = px.line(yearly_avg, x="year", y="unemployment_rate", markers=True,
-               labels={"unemployment_rate": "Unemployment Rate (%)"},
-               title="Global Average Unemployment (2014–2024)")
-st.plotly_chart(fig1, use_container_width=True)
-
-# Bar Chart - Top 10 Countries by Avg Rate
-st.subheader("🌍 Top 10 Countries by Average Unemployment Rate")
-top10 = (
-    df.groupby("country_name")["unemployment_rate"]
-    .mean()
-    .sort_values(ascending=False)
-    .head(10)
-    .reset_index()
-)
-fig2 = px.bar(top10, x="unemployment_rate", y="country_name", orientation="h",
-              labels={"unemployment_rate": "Avg Unemployment Rate", "country_name": "Country"},
-              title="Top 10 Countries (2014–2024)", color="unemployment_rate", color_continuous_scale="Reds")
-st.plotly_chart(fig2, use_container_width=True)
-
-# Line Chart - Gender Comparison
-st.subheader("👩‍🦰👨 Unemployment by Gender Over Time")
-gender_trend = df.groupby(["year", "sex"])["unemployment_rate"].mean().reset_index()
-fig3 = px.line(gender_trend, x="year", y="unemployment_rate", color="sex", markers=True,
-               labels={"unemployment_rate": "Unemployment Rate (%)"}, title="Gender-wise Trends")
-st.plotly_chart(fig3, use_container_width=True)
-
-# Bar Chart - By Age Group
-st.subheader("📊 Unemployment by Age Group")
-age_avg = df.groupby("age_group")["unemployment_rate"].mean().reset_index()
-fig4 = px.bar(age_avg, x="unemployment_rate", y="age_group", orientation="h",
-              labels={"unemployment_rate": "Avg Rate", "age_group": "Age Group"},
-              title="Average Unemployment by Age Group", color="unemployment_rate", color_continuous_scale="Blues")
-st.plotly_chart(fig4, use_container_width=True)
-
-st.success("Dashboard rendered successfully.")
+sys.path.append(str(BASE.parent))  # repo root, for etl_common
+sys.path.append(str(BASE / "src"))
+
+PARQUET_PATH = BASE / "data" / "cleaned" / "cleaned_unemployment.parquet"
+CSV_PATH = BASE / "data" / "cleaned" / "cleaned_unemployment.csv"
+CUBE_PATH = BASE / "data" / "cleaned" / "unemployment_cube.csv"
+# "files" answers from the pandas-built rollup cube (the reference); "duckdb" runs each read as a
+# SQL GROUP BY over the cleaned Parquet/CSV in an embedded DuckDB (see src/unemployment_duckdb.py)
+BACKEND = os.getenv("UNEMPLOYMENT_BACKEND", "files")
+PAGE_CONFIG = {"page_title": "Global Unemployment Dashboard", "layout": "wide"}
+
+def load_unemployment():
+    from etl_common.data_cache import load_frame
+    from etl_common.dtypes import optimize_dtypes
+    from etl_common.parquet_store import read_processed
+
+    # Parsed once per server process and shared (read-only) across sessions
+    return load_frame(
+        "cleaned_unemployment",
+        lambda: optimize_dtypes(read_processed(PARQUET_PATH, CSV_PATH), name="cleaned_unemployment"),
+        PARQUET_PATH, CSV_PATH,
+    )
+
+# Rollup cube: every filter combination below is answered by dictionary lookups, not groupbys
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_cube(signature):
+    import pandas as pd
+    from unemployment_cube import DIMENSIONS, UnemploymentCube, build_cube
+
+    if CUBE_PATH.exists():
+        return UnemploymentCube(pd.read_csv(CUBE_PATH, dtype={dim: str for dim in DIMENSIONS}))
+    # Cube not built yet (process_unemployment.py not re-run): roll it up from the cleaned data
+    return UnemploymentCube(build_cube(load_unemployment()))
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def duckdb_queries(signature):
+    from etl_common.duckdb_engine import DuckDBEngine
+    from unemployment_duckdb import UnemploymentDuckDB
+
+    return UnemploymentDuckDB(DuckDBEngine().register("cleaned_unemployment", PARQUET_PATH, CSV_PATH))
+
+def load_queries():
+    """The backend's cube (or its SQL stand-in) and the file signature its cached results are keyed on."""
+    from etl_common.data_cache import file_signature
+
+    signature = file_signature(CUBE_PATH, PARQUET_PATH, CSV_PATH)
+    return (duckdb_queries(signature) if BACKEND == "duckdb" else load_cube(signature)), signature
+
+def warm():
+    """Load the data render() reads into the process-wide caches (see etl_common/dashboards.py)."""
+    load_queries()
+    if BACKEND != "duckdb":
+        load_unemployment()  # the download's rows
+
+def render():
+    """Draw the dashboard into the current page (the caller sets the page config)."""
+    st.title("📉 Global Unemployment Dashboard (2014–2024)")
+
+    # Both backends answer the same cell/options/breakdown calls
+    with st.spinner("Loading data..."):
+        # Deferred until the title is on screen; already loaded after the first render or the warm-up
+        import pandas as pd
+        import plotly.express as px
+        from etl_common.agg_cache import AGG_CACHE, cached
+
+        cube, signature = load_queries()
+
+    # Sidebar Filters
+    st.sidebar.header("🔍 Filter Data")
+
+    # Each filter offers only values with data under the filters chosen above it
+    selected_country = st.sidebar.selectbox("Country", ["All"] + cube.options("country_name"))
+    selected_gender = st.sidebar.selectbox("Gender", ["All"] + cube.options("sex", country_name=selected_country))
+    selected_age = st.sidebar.selectbox("Age Group", ["All"] + cube.options(
+        "age_group", country_name=selected_country, sex=selected_gender))
+    selected_year = st.sidebar.selectbox("Year", ["All"] + [int(year) for year in cube.options(
+        "year", country_name=selected_country, sex=selected_gender, age_group=selected_age)])
+    filters = {"country_name": selected_country, "sex": selected_gender, "age_group": selected_age,
+               "year": selected_year}
+
+    # Aggregates are memoized per (dataset version, chart, filter state) and shared across sessions
+    agg = cached(("cleaned_unemployment", BACKEND, signature), filters)
+
+    # Download filtered data (the only view that needs row-level data)
+    if BACKEND == "duckdb":
+        filtered = cube.rows(**filters)
+    else:
+        df = load_unemployment()
+        mask = pd.Series(True, index=df.index)
+        for column, value in filters.items():
+            if value != "All":
+                mask &= df[column] == value
+        filtered = df[mask]
+    st.sidebar.download_button(
+        "📥 Download CSV", data=filtered.to_csv(index=False), file_name="filtered_unemployment.csv"
+    )
+
+    # Key Metrics
+    st.subheader("📊 Key Statistics")
+    col1, col2, col3 = st.columns(3)
+    kpis = cube.cell(**filters)
+    col1.metric("Avg Unemployment Rate", f"{kpis['mean']:.2f}%")
+    col2.metric("Max Unemployment Rate", f"{kpis['max']:.2f}%")
+    col3.metric("Countries in View", kpis["n_countries"])
+
+    # Line Chart - Global Trend
+    st.subheader("📈 Global Unemployment Trend Over Time")
+    yearly_avg = agg("yearly_avg", lambda: cube.breakdown(["year"], **filters))
+    fig1 = px.line(yearly_avg, x="year", y="unemployment_rate", markers=True,
+                   labels={"unemployment_rate": "Unemployment Rate (%)"},
+                   title="Global Average Unemployment (2014–2024)")
+    st.plotly_chart(fig1, use_container_width=True)
+
+    # Bar Chart - Top 10 Countries by Avg Rate
+    st.subheader("🌍 Top 10 Countries by Average Unemployment Rate")
+    top10 = agg("top10", lambda: (
+        cube.breakdown(["country_name"], **filters)
+        .sort_values("unemployment_rate", ascending=False)
+        .head(10)
+        .reset_index(drop=True)
+    ))
+    fig2 = px.bar(top10, x="unemployment_rate", y="country_name", orientation="h",
+                  labels={"unemployment_rate": "Avg Unemployment Rate", "country_name": "Country"},
+                  title="Top 10 Countries (2014–2024)", color="unemployment_rate", color_continuous_scale="Reds")
+    st.plotly_chart(fig2, use_container_width=True)
+
+    # Line Chart - Gender Comparison
+    st.subheader("👩‍🦰👨 Unemployment by Gender Over Time")
+    gender_trend = agg("gender_trend", lambda: cube.breakdown(["year", "sex"], **filters))
+    fig3 = px.line(gender_trend, x="year", y="unemployment_rate", color="sex", markers=True,
+                   labels={"unemployment_rate": "Unemployment Rate (%)"}, title="Gender-wise Trends")
+    st.plotly_chart(fig3, use_container_width=True)
+
+    # Bar Chart - By Age Group
+    st.subheader("📊 Unemployment by Age Group")
+    age_avg = agg("age_avg", lambda: cube.breakdown(["age_group"], **filters))
+    fig4 = px.bar(age_avg, x="unemployment_rate", y="age_group", orientation="h",
+                  labels={"unemployment_rate": "Avg Rate", "age_group": "Age Group"},
+                  title="Average Unemployment by Age Group", color="unemployment_rate", color_continuous_scale="Blues")
+    st.plotly_chart(fig4, use_container_width=True)
+
+    cache_stats = AGG_CACHE.stats()
+    st.sidebar.caption(f"Aggregation cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                       f"{cache_stats['entries']} entries, {cache_stats['mb']} MB")
+
+    st.success("Dashboard rendered successfully.")
+
+
+if __name__ == "__main__":
+    st.set_page_config(**PAGE_CONFIG)
+    render()
@@ -1,136 +1,126 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import seaborn as sns
-import os
 
-# Load cleaned dataset
-df = pd.read_csv("data/cleaned/cleaned_happiness.csv")
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for etl_common
+from etl_common.chart_jobs import ChartRegistry, content_hash
+from etl_common.parquet_store import read_processed
+
+PARQUET_PATH = "data/cleaned/cleaned_happiness.parquet"
+CSV_PATH = "data/cleaned/cleaned_happiness.csv"
+
+# Each chart is a pure function of (data, spec); unchanged charts are skipped on re-runs
+charts = ChartRegistry("outputs")
+
+
+def load_happiness():
+    # Parquet when processed, else CSV
+    return read_processed(PARQUET_PATH, CSV_PATH)
+
+
+# Shared aggregates, computed once per run in the parent process
+def latest_top10(df):
+    latest_year = df["year"].max()
+    top10 = df[df["year"] == latest_year].sort_values("life_ladder", ascending=False).head(10)
+    return top10[["country_name", "life_ladder"]].astype({"country_name": str}), int(latest_year)
+
+def country_top15(df):
+    country_avg = df.groupby("country_name", observed=True)["life_ladder"].mean().sort_values(ascending=False).head(15)
+    # Plain labels, so the plot doesn't reserve rows for every category of the full dataset
+    return country_avg.rename(index=str)
+
+def year_mean(df):
+    return df.groupby("year")["life_ladder"].mean().reset_index()
+
+def indicator_corr(df):
+    return df.select_dtypes(include=["float64", "int64"]).drop(columns=["year"]).corr()
 
-# Create outputs folder
-os.makedirs("outputs", exist_ok=True)
 
 # 1. Top 10 happiest countries by latest year available
-latest_year = df["year"].max()
-top10 = df[df["year"] == latest_year].sort_values("life_ladder", ascending=False).head(10)
-plt.figure(figsize=(10, 6))
-ax = sns.barplot(x="life_ladder", y="country_name", data=top10, hue="country_name", dodge=False, legend=False, palette="viridis")
-for i, v in enumerate(top10["life_ladder"]):
-    ax.text(v + 0.05, i, f"{v:.2f}", va="center")
-plt.title(f"Top 10 Happiest Countries in {int(latest_year)}")
-plt.xlabel("Happiness Score (Life Ladder)")
-plt.ylabel("Country")
-plt.tight_layout()
-plt.savefig("outputs/top10_happiest_countries.png")
-plt.close()
+@charts.chart("top10_happiest_countries.png", prepare=latest_top10)
+def top10_happiest(data, spec):
+    top10, latest_year = data
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(x="life_ladder", y="country_name", data=top10, hue="country_name", dodge=False, legend=False,
+                palette="viridis", ax=ax)
+    for i, v in enumerate(top10["life_ladder"]):
+        ax.text(v + 0.05, i, f"{v:.2f}", va="center")
+    ax.set_title(f"Top 10 Happiest Countries in {latest_year}")
+    ax.set_xlabel("Happiness Score (Life Ladder)")
+    ax.set_ylabel("Country")
+    fig.tight_layout()
+    return fig
+
 
 # 2. Country vs average happiness (all years)
-country_avg = df.groupby("country_name")["life_ladder"].mean().sort_values(ascending=False).head(15)
-plt.figure(figsize=(12, 6))
-ax = sns.barplot(
-    x=country_avg.values,
-    y=country_avg.index,
-    hue=country_avg.index,      
-    palette="coolwarm",
-    dodge=False,
-    legend=False
-)
-
-for i, v in enumerate(country_avg.values):
-    ax.text(v + 0.05, i, f"{v:.2f}", va="center")
-plt.title("Average Happiness Score (Top 15 Countries)")
-plt.xlabel("Average Happiness")
-plt.ylabel("Country")
-plt.tight_layout()
-plt.savefig("outputs/country_vs_happiness.png")
-plt.close()
+@charts.chart("country_vs_happiness.png", prepare=country_top15)
+def country_vs_happiness(country_avg, spec):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=country_avg.values, y=country_avg.index, hue=country_avg.index, palette="coolwarm", dodge=False,
+                legend=False, ax=ax)
+    for i, v in enumerate(country_avg.values):
+        ax.text(v + 0.05, i, f"{v:.2f}", va="center")
+    ax.set_title("Average Happiness Score (Top 15 Countries)")
+    ax.set_xlabel("Average Happiness")
+    ax.set_ylabel("Country")
+    fig.tight_layout()
+    return fig
+
 
 # 3. Trend of happiness globally over years
-year_avg = df.groupby("year")["life_ladder"].mean().reset_index()
-plt.figure(figsize=(10, 5))
-sns.lineplot(x="year", y="life_ladder", data=year_avg, marker='o')
-for i in range(len(year_avg)):
-    plt.text(year_avg["year"][i], year_avg["life_ladder"][i] + 0.02, f"{year_avg['life_ladder'][i]:.2f}", ha='center')
-plt.title("Global Average Happiness Score Over Years")
-plt.ylabel("Life Ladder Score")
-plt.xlabel("Year")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/yearwise_happiness.png")
-plt.close()
+@charts.chart("yearwise_happiness.png", prepare=year_mean)
+def yearwise_happiness(year_avg, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(x="year", y="life_ladder", data=year_avg, marker='o', ax=ax)
+    for i in range(len(year_avg)):
+        ax.text(year_avg["year"][i], year_avg["life_ladder"][i] + 0.02, f"{year_avg['life_ladder'][i]:.2f}",
+                ha='center')
+    ax.set_title("Global Average Happiness Score Over Years")
+    ax.set_ylabel("Life Ladder Score")
+    ax.set_xlabel("Year")
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
 
 # 4. Correlation heatmap
-plt.figure(figsize=(10, 8))
-numeric_cols = df.select_dtypes(include=["float64", "int64"]).drop(columns=["year"])
-sns.heatmap(numeric_cols.corr(), annot=True, cmap="Blues", fmt=".2f")
-plt.title("Correlation Matrix of Happiness Indicators")
-plt.tight_layout()
-plt.savefig("outputs/correlation_matrix.png")
-plt.close()
-
-# 5. Happiness by GDP
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="log_gdp_per_capita", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs GDP per Capita")
-plt.xlabel("Log GDP per Capita")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_gdp.png")
-plt.close()
-
-# 6. Happiness by social support
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="social_support", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs Social Support")
-plt.xlabel("Social Support")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_social_support.png")
-plt.close()
-
-# 7. Happiness by healthy life expectancy
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="healthy_life_expectancy_at_birth", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs Healthy Life Expectancy")
-plt.xlabel("Healthy Life Expectancy")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_healthy_life_expectancy.png")
-plt.close()
-
-# 8. Happiness by freedom to make life choices
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="freedom_to_make_life_choices", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs Freedom to Make Life Choices")
-plt.xlabel("Freedom to Make Life Choices")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_freedom.png")
-plt.close()
-
-# 9. Happiness by generosity
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="generosity", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs Generosity")
-plt.xlabel("Generosity")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_generosity.png")
-plt.close()
-
-# 10. Happiness by perceptions of corruption
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x="perceptions_of_corruption", y="life_ladder", data=df, alpha=0.6)
-plt.title("Happiness vs Perceptions of Corruption")
-plt.xlabel("Perceptions of Corruption")
-plt.ylabel("Happiness Score (Life Ladder)")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("outputs/happiness_vs_corruption.png")
-plt.close()
-
-print("All visualizations generated and saved in 'outputs/' folder.")
+@charts.chart("correlation_matrix.png", prepare=indicator_corr)
+def correlation_matrix(corr, spec):
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(corr, annot=True, cmap="Blues", fmt=".2f", ax=ax)
+    ax.set_title("Correlation Matrix of Happiness Indicators")
+    fig.tight_layout()
+    return fig
+
+
+# 5-10. Happiness against each factor
+@charts.chart("happiness_vs_gdp.png", x="log_gdp_per_capita", title="Happiness vs GDP per Capita",
+              xlabel="Log GDP per Capita")
+@charts.chart("happiness_vs_social_support.png", x="social_support", title="Happiness vs Social Support",
+              xlabel="Social Support")
+@charts.chart("happiness_vs_healthy_life_expectancy.png", x="healthy_life_expectancy_at_birth",
+              title="Happiness vs Healthy Life Expectancy", xlabel="Healthy Life Expectancy")
+@charts.chart("happiness_vs_freedom.png", x="freedom_to_make_life_choices",
+              title="Happiness vs Freedom to Make Life Choices", xlabel="Freedom to Make Life Choices")
+@charts.chart("happiness_vs_generosity.png", x="generosity", title="Happiness vs Generosity", xlabel="Generosity")
+@charts.chart("happiness_vs_corruption.png", x="perceptions_of_corruption",
+              title="Happiness vs Perceptions of Corruption", xlabel="Perceptions of Corruption")
+def happiness_vs_factor(df, spec):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.scatterplot(x=spec["x"], y="life_ladder", data=df[[spec["x"], "life_ladder"]], alpha=0.6, ax=ax)
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel("Happiness Score (Life Ladder)")
+    ax.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+if __name__ == "__main__":
+    stats = charts.run(load_happiness, source_key=content_hash(PARQUET_PATH, CSV_PATH),
+                       force="--force" in sys.argv)
+    if stats["failed"]:
+        sys.exit(1)
+    print("All visualizations generated and saved in 'outputs/' folder.")
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from happiness_queries import ALL, FACTORS, FIT_COLUMNS, INDICATORS
+
+
+class HappinessDuckDB:
+    """The `HappinessQueries` reads as SQL over the cleaned rows in an embedded DuckDB.
+
+    `engine` is an `etl_common.duckdb_engine.DuckDBEngine` with the cleaned
+    dataset registered as `table`.
+    """
+
+    def __init__(self, engine, table="cleaned_happiness"):
+        self.engine = engine
+        self.table = table
+
+    def _where(self, country=ALL, year=ALL):
+        clauses, params = [], []
+        if country != ALL:
+            clauses.append("country_name = ?")
+            params.append(country)
+        if year != ALL:
+            clauses.append("year = ?")
+            params.append(int(year))
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _frame(self, select, filters, tail=""):
+        where, params = self._where(**filters)
+        return self.engine.query(f"SELECT {select} FROM {self.table} {where} {tail}", params)
+
+    def rows(self, **filters):
+        return self._frame("*", filters, "ORDER BY country_name, year")
+
+    def countries(self):
+        return self._frame("DISTINCT country_name", {}, "ORDER BY 1")["country_name"].tolist()
+
+    def years(self, country=ALL):
+        return self._frame("DISTINCT year", {"country": country}, "ORDER BY 1")["year"].tolist()
+
+    def kpis(self, **filters):
+        row = self._frame("avg(life_ladder) AS ladder, max(log_gdp_per_capita) AS gdp, "
+                          "count(DISTINCT country_name) AS n_countries", filters).iloc[0]
+        return row["ladder"], row["gdp"], int(row["n_countries"])
+
+    def trend(self, **filters):
+        return self._frame("year, avg(life_ladder) AS life_ladder", filters, "GROUP BY year ORDER BY year")
+
+    def latest_year(self, **filters):
+        return self._frame("max(year) AS year", filters)["year"].iloc[0]
+
+    def top10(self, **filters):
+        where, params = self._where(**filters)
+        return self.engine.query(
+            f"""
+            SELECT country_name, year, life_ladder FROM {self.table} {where}
+            QUALIFY year = max(year) OVER ()
+            ORDER BY life_ladder DESC LIMIT 10
+            """,
+            params,
+        )
+
+    def corr(self, **filters):
+        # One pass computing corr() for every pair, diagonal included (NULLs dropped pairwise, as in pandas)
+        pairs = [(a, b) for i, a in enumerate(INDICATORS) for b in INDICATORS[i:]]
+        row = self._frame(", ".join(f'corr({a}, {b}) AS "{a}|{b}"' for a, b in pairs), filters).iloc[0]
+        matrix = pd.DataFrame(np.nan, index=INDICATORS, columns=INDICATORS)
+        for a, b in pairs:
+            matrix.loc[a, b] = matrix.loc[b, a] = row[f"{a}|{b}"]
+        return matrix
+
+    def factor_fits(self, **filters):
+        # Every fit in one pass; regr_* drop rows where either value is NULL, as ols_fits does
+        select = ", ".join(f'regr_slope(life_ladder, {f}) AS "{f}|slope", regr_intercept(life_ladder, {f}) AS "{f}|intercept", '
+                           f'regr_r2(life_ladder, {f}) AS "{f}|r2", regr_count(life_ladder, {f}) AS "{f}|n"'
+                           for f in FACTORS)
+        row = self._frame(select, filters).iloc[0]
+        fits = pd.DataFrame([[row[f"{f}|{c}"] for c in FIT_COLUMNS] for f in FACTORS], index=FACTORS,
+                            columns=FIT_COLUMNS, dtype="float64")
+        return fits.astype({"n": "int64"})
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+ALL = "All"
+# Numeric indicators plotted against each other (everything but country and year)
+INDICATORS = [
+    "life_ladder", "log_gdp_per_capita", "social_support", "healthy_life_expectancy_at_birth",
+    "freedom_to_make_life_choices", "generosity", "perceptions_of_corruption", "positive_affect", "negative_affect",
+]
+# Indicators each given a happiness scatter plot with its least-squares line
+FACTORS = [
+    "log_gdp_per_capita", "social_support", "healthy_life_expectancy_at_birth",
+    "freedom_to_make_life_choices", "generosity", "perceptions_of_corruption",
+]
+FIT_COLUMNS = ["slope", "intercept", "r2", "n"]
+
+
+def ols_fits(x, y):
+    """Simple least-squares fits of `y` on each column of `x` at once (rows missing either value dropped per column).
+
+    Returns one (slope, intercept, r2, n) row per column, like an OLS with a
+    constant; NaN where a column has fewer than two distinct values.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64).reshape(-1, 1)
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0).sum(axis=0) / n
+        y_mean = np.where(mask, y, 0).sum(axis=0) / n
+        dx, dy = np.where(mask, x - x_mean, 0), np.where(mask, y - y_mean, 0)
+        sxx, sxy, syy = (dx * dx).sum(axis=0), (dx * dy).sum(axis=0), (dy * dy).sum(axis=0)
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        r2 = sxy ** 2 / (sxx * syy)
+    return np.column_stack([slope, y_mean - slope * x_mean, r2, n])
+
+
+class HappinessQueries:
+    """The dashboard's reads over the cleaned happiness frame, in pandas (the reference implementation).
+
+    Filters are `country` and `year`, with "All" meaning no filter.
+    """
+
+    def __init__(self, df):
+        self.df = df
+
+    def rows(self, country=ALL, year=ALL):
+        df = self.df
+        if country != ALL:
+            df = df[df["country_name"] == country]
+        if year != ALL:
+            df = df[df["year"] == year]
+        return df
+
+    def countries(self):
+        return sorted(self.df["country_name"].unique())
+
+    def years(self, country=ALL):
+        return sorted(self.rows(country)["year"].unique())
+
+    def kpis(self, **filters):
+        df = self.rows(**filters)
+        return df["life_ladder"].mean(), df["log_gdp_per_capita"].max(), df["country_name"].nunique()
+
+    def trend(self, **filters):
+        df = self.rows(**filters)
+        return df.groupby("year")["life_ladder"].mean().reset_index()
+
+    def latest_year(self, **filters):
+        return self.rows(**filters)["year"].max()
+
+    def top10(self, **filters):
+        # Latest year in the filtered data
+        df = self.rows(**filters)
+        latest = df[df["year"] == df["year"].max()]
+        return latest.sort_values("life_ladder", ascending=False).head(10)[["country_name", "year", "life_ladder"]]
+
+    def corr(self, **filters):
+        return self.rows(**filters)[INDICATORS].corr()
+
+    def factor_fits(self, **filters):
+        """Least-squares line of life_ladder on each of FACTORS, indexed by factor (FIT_COLUMNS)."""
+        df = self.rows(**filters)
+        fits = pd.DataFrame(ols_fits(df[FACTORS], df["life_ladder"]), index=FACTORS, columns=FIT_COLUMNS)
+        return fits.astype({"n": "int64"})
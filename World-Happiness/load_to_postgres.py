@@ -1,44 +1,18 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import psycopg2 # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for etl_common
+from etl_common.pg_loader import load_dataframe
+from etl_common.pg_pool import connection
+from etl_common.schemas import HAPPINESS_DATA
 
 # Load cleaned CSV
 df = pd.read_csv("data/cleaned/cleaned_happiness.csv")
 
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname="happinessdb",
-    user="saisrivatsat",
-    host="localhost",
-    port=5433
-)
-cur = conn.cursor()
-
-# Create table
-cur.execute("""
-    CREATE TABLE IF NOT EXISTS happiness_data (
-        country_name TEXT,
-        year INT,
-        life_ladder FLOAT,
-        log_gdp_per_capita FLOAT,
-        social_support FLOAT,
-        healthy_life_expectancy_at_birth FLOAT,
-        freedom_to_make_life_choices FLOAT,
-        generosity FLOAT,
-        perceptions_of_corruption FLOAT,
-        positive_affect FLOAT,
-        negative_affect FLOAT
-    )
-""")
-
-# Insert data row-by-row
-for _, row in df.iterrows():
-    cur.execute("""
-        INSERT INTO happiness_data VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, tuple(row))
-
-# Commit and close
-conn.commit()
-cur.close()
-conn.close()
+# Create table and bulk insert via COPY (connection settings from env, see etl_common/pg_pool.py)
+with connection("happinessdb") as conn:
+    load_dataframe(conn, HAPPINESS_DATA, df)
 
 print("Happiness data loaded into PostgreSQL.")
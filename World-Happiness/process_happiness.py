@@ -1,6 +1,30 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 import os
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # repo root, for etl_common
+from etl_common.instrumentation import print_summary, stage
+from etl_common.parquet_store import write_dataset
+
+PARQUET_PATH = "data/cleaned/cleaned_happiness.parquet"
+
+# Explicit storage types so readers don't re-infer them from CSV text
+DTYPES = {
+    "country_name": "category",
+    "year": "int64",
+    "life_ladder": "float64",
+    "log_gdp_per_capita": "float64",
+    "social_support": "float64",
+    "healthy_life_expectancy_at_birth": "float64",
+    "freedom_to_make_life_choices": "float64",
+    "generosity": "float64",
+    "perceptions_of_corruption": "float64",
+    "positive_affect": "float64",
+    "negative_affect": "float64",
+}
+
 # Load raw data
 INPUT_CSV = "world-happiness-report.csv"
 df = pd.read_csv(INPUT_CSV)
@@ -11,17 +35,21 @@ print("Columns:", df.columns.tolist())
 print(df.head())
 
 # Clean & Save
-df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+with stage("clean", rows_in=len(df)) as metrics:
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
 
-# Drop duplicates / missing values
-df = df.dropna(subset=["country_name", "year", "life_ladder"])
+    # Drop duplicates / missing values
+    df = df.dropna(subset=["country_name", "year", "life_ladder"])
+    metrics.add(rows_out=len(df))
 
 # Save cleaned version
-os.makedirs("data/cleaned", exist_ok=True)
-df.to_csv("data/cleaned/cleaned_happiness.csv", index=False)
+with stage("write_cleaned", rows_in=len(df)):
+    os.makedirs("data/cleaned", exist_ok=True)
+    df.to_csv("data/cleaned/cleaned_happiness.csv", index=False)
+    write_dataset(df, PARQUET_PATH, DTYPES, partition_cols=["year"])
 
 # Summary after cleaning
-print("Cleaned data saved.")
+print(f"Cleaned data saved (CSV + Parquet at {PARQUET_PATH}).")
 print("Shape after cleaning:", df.shape)
 print("Columns after cleaning:", df.columns.tolist())
 print(df.head())
@@ -36,3 +64,4 @@ if "subregion" in df.columns:
     print("Unique subregions:", df["subregion"].nunique())
 
 print("Sample Happiness Scores:", df["life_ladder"].unique()[:10])
+print_summary()
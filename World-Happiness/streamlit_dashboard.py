@@ -1,86 +1,160 @@
 # World-Happiness/streamlit_dashboard.py
 
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from pathlib import Path
 
-# Load data
+# Data (Parquet when processed, else the CSV it mirrors) is found from this file, not the working directory
 BASE = Path(__file__).resolve().parent
-df = pd.read_csv(BASE / "data" / "cleaned" / "cleaned_happiness.csv")
-df["year"] = df["year"].astype(int)
-
-st.set_page_config(layout="wide")
-st.title("😊 World Happiness Report Dashboard")
-
-# Sidebar filters
-st.sidebar.header("📌 Filter Data")
-
-# Country filter
-countries = ["All"] + sorted(df["country_name"].unique())
-selected_country = st.sidebar.selectbox("Select Country", countries)
-if selected_country != "All":
-    df = df[df["country_name"] == selected_country]
-
-# Year filter
-years = ["All"] + sorted(df["year"].unique())
-selected_year = st.sidebar.selectbox("Select Year", years)
-if selected_year != "All":
-    df = df[df["year"] == selected_year]
-
-# Download filtered data
-st.sidebar.markdown("💾 Download Filtered Dataset")
-st.sidebar.download_button(
-    "⬇️ Download CSV",
-    df.to_csv(index=False),
-    file_name="filtered_happiness.csv"
-)
-
-# Key Metrics
-st.subheader("📊 Key Metrics")
-col1, col2, col3 = st.columns(3)
-col1.metric("Avg Happiness", f"{df['life_ladder'].mean():.2f} / 10")
-col2.metric("Max GDP (log)", f"{df['log_gdp_per_capita'].max():.2f}")
-col3.metric("Countries Included", df["country_name"].nunique())
-
-# Global Happiness Trend
-st.subheader("📈 Global Average Happiness Over Time")
-if "year" in df.columns and selected_year == "All":
-    trend_df = df.groupby("year")["life_ladder"].mean().reset_index()
-    fig_trend = px.line(trend_df, x="year", y="life_ladder", markers=True,
-                        labels={"life_ladder": "Average Happiness", "year": "Year"},
-                        title="Global Happiness Trend")
-    st.plotly_chart(fig_trend, use_container_width=True)
-
-# Top Happiest Countries (latest year in the filtered data)
-st.subheader(f"🌍 Top 10 Happiest Countries ({df['year'].max()})")
-top10 = df[df["year"] == df["year"].max()].sort_values("life_ladder", ascending=False).head(10)
-fig_top10 = px.bar(top10, x="life_ladder", y="country_name", orientation="h",
-                   title="Top 10 Countries", labels={"life_ladder": "Happiness Score"})
-st.plotly_chart(fig_top10, use_container_width=True)
-
-# Correlation Heatmap
-st.subheader("🧠 Correlation Matrix of Happiness Indicators")
-numeric_df = df.select_dtypes(include="number").drop(columns=["year"])
-corr_matrix = numeric_df.corr()
-fig_corr = px.imshow(corr_matrix, text_auto=".2f", aspect="auto", title="Correlation Heatmap")
-st.plotly_chart(fig_corr, use_container_width=True)
-
-# Factor Relationships
-st.subheader("📌 Factors Correlated with Happiness")
-
-factors = [
-    "log_gdp_per_capita", "social_support", "healthy_life_expectancy_at_birth",
-    "freedom_to_make_life_choices", "generosity", "perceptions_of_corruption"
-]
-
-for feature in factors:
-    st.markdown(f"#### ➕ {feature.replace('_', ' ').title()}")
-    fig = px.scatter(
-        df, x=feature, y="life_ladder", trendline="ols",
-        labels={"life_ladder": "Happiness Score", feature: feature.replace("_", " ").title()},
-        title=f"Happiness vs {feature.replace('_', ' ').title()}"
+sys.path.append(str(BASE.parent))  # repo root, for etl_common
+sys.path.append(str(BASE))
+
+# "files" filters and aggregates the in-memory frame with pandas (the reference); "duckdb" runs
+# each read as SQL over the same Parquet/CSV in an embedded DuckDB (see happiness_duckdb.py)
+BACKEND = os.getenv("HAPPINESS_BACKEND", "files")
+PARQUET_PATH = BASE / "data" / "cleaned" / "cleaned_happiness.parquet"
+CSV_PATH = BASE / "data" / "cleaned" / "cleaned_happiness.csv"
+PAGE_CONFIG = {"page_title": "World Happiness Dashboard", "layout": "wide"}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def duckdb_queries(signature):
+    from etl_common.duckdb_engine import DuckDBEngine
+    from happiness_duckdb import HappinessDuckDB
+
+    return HappinessDuckDB(DuckDBEngine().register("cleaned_happiness", PARQUET_PATH, CSV_PATH))
+
+def load_queries():
+    """The backend's reads and the file signature their cached results are keyed on."""
+    from etl_common.data_cache import file_signature, load_frame
+    from etl_common.dtypes import optimize_dtypes
+    from etl_common.parquet_store import read_processed
+    from happiness_queries import HappinessQueries
+
+    signature = file_signature(PARQUET_PATH, CSV_PATH)
+    if BACKEND == "duckdb":
+        return duckdb_queries(signature), signature
+    # Parsed once per server process and shared (read-only) across sessions
+    return HappinessQueries(load_frame(
+        "cleaned_happiness",
+        lambda: optimize_dtypes(read_processed(PARQUET_PATH, CSV_PATH), name="cleaned_happiness"),
+        PARQUET_PATH, CSV_PATH,
+    )), signature
+
+def warm():
+    """Load the data render() reads into the process-wide caches (see etl_common/dashboards.py)."""
+    load_queries()
+
+def render():
+    """Draw the dashboard into the current page (the caller sets the page config)."""
+    st.title("😊 World Happiness Report Dashboard")
+    with st.spinner("Loading data..."):
+        # Deferred until the title is on screen; already loaded after the first render or the warm-up
+        import pandas as pd
+        import plotly.express as px
+        from etl_common.agg_cache import AGG_CACHE, cached
+        from happiness_queries import FACTORS
+
+        queries, signature = load_queries()
+
+    # Sidebar filters
+    st.sidebar.header("📌 Filter Data")
+
+    # Country filter
+    countries = ["All"] + queries.countries()
+    selected_country = st.sidebar.selectbox("Select Country", countries)
+
+    # Year filter
+    years = ["All"] + queries.years(selected_country)
+    selected_year = st.sidebar.selectbox("Select Year", years)
+    filters = {"country": selected_country, "year": selected_year}
+
+    # Aggregates and fitted figures are memoized per (dataset version, chart, filter state)
+    agg = cached(("cleaned_happiness", BACKEND, signature), filters)
+
+    # Filtered rows, for the download and the scatter plots
+    df = queries.rows(**filters)
+
+    # Download filtered data
+    st.sidebar.markdown("💾 Download Filtered Dataset")
+    st.sidebar.download_button(
+        "⬇️ Download CSV",
+        df.to_csv(index=False),
+        file_name="filtered_happiness.csv"
     )
-    st.plotly_chart(fig, use_container_width=True)
 
-st.success("Dashboard loaded successfully.")
+    # Key Metrics
+    st.subheader("📊 Key Metrics")
+    col1, col2, col3 = st.columns(3)
+    avg_ladder, max_gdp, n_countries = agg("kpis", lambda: queries.kpis(**filters))
+    col1.metric("Avg Happiness", f"{avg_ladder:.2f} / 10")
+    col2.metric("Max GDP (log)", f"{max_gdp:.2f}")
+    col3.metric("Countries Included", n_countries)
+
+    # Global Happiness Trend
+    st.subheader("📈 Global Average Happiness Over Time")
+    if selected_year == "All":
+        trend_df = agg("trend", lambda: queries.trend(**filters))
+        fig_trend = px.line(trend_df, x="year", y="life_ladder", markers=True,
+                            labels={"life_ladder": "Average Happiness", "year": "Year"},
+                            title="Global Happiness Trend")
+        st.plotly_chart(fig_trend, use_container_width=True)
+
+    # Top Happiest Countries (latest year in the filtered data)
+    st.subheader(f"🌍 Top 10 Happiest Countries ({agg('latest_year', lambda: queries.latest_year(**filters))})")
+    top10 = agg("top10", lambda: queries.top10(**filters))
+    fig_top10 = px.bar(top10, x="life_ladder", y="country_name", orientation="h",
+                       title="Top 10 Countries", labels={"life_ladder": "Happiness Score"})
+    st.plotly_chart(fig_top10, use_container_width=True)
+
+    # Correlation Heatmap
+    st.subheader("🧠 Correlation Matrix of Happiness Indicators")
+    corr_matrix = agg("corr", lambda: queries.corr(**filters))
+    fig_corr = px.imshow(corr_matrix, text_auto=".2f", aspect="auto", title="Correlation Heatmap")
+    st.plotly_chart(fig_corr, use_container_width=True)
+
+    # Factor Relationships
+    st.subheader("📌 Factors Correlated with Happiness")
+
+    def factor_label(feature):
+        return feature.replace("_", " ").title()
+
+    def factor_scatter(rows, feature, fit):
+        fig = px.scatter(rows, x=feature, y="life_ladder",
+                         labels={"life_ladder": "Happiness Score", feature: factor_label(feature)},
+                         title=f"Happiness vs {factor_label(feature)}")
+        if pd.notna(fit["slope"]):
+            x = rows[feature].where(rows["life_ladder"].notna())
+            ends = [x.min(), x.max()]
+            fig.add_scatter(x=ends, y=[fit["intercept"] + fit["slope"] * end for end in ends], mode="lines",
+                            name=f"OLS trendline (R²={fit['r2']:.3f})", showlegend=False)
+        return fig
+
+    # All six least-squares lines in one vectorized pass per filter state (no statsmodels)
+    fits = agg("factor_fits", lambda: queries.factor_fits(**filters))
+
+    # Only the open tab's figure is built; switching tabs reruns the script
+    tabs = st.tabs([f"➕ {factor_label(feature)}" for feature in FACTORS], key="factor_tab", on_change="rerun")
+    for feature, tab in zip(FACTORS, tabs):
+        if not tab.open:
+            continue
+        with tab:
+            fit = fits.loc[feature]
+            fig = agg(f"scatter_{feature}", lambda: factor_scatter(df, feature, fit))
+            st.plotly_chart(fig, use_container_width=True)
+            if pd.notna(fit["slope"]):
+                st.caption(f"Least-squares fit over {int(fit['n'])} rows: slope {fit['slope']:.3f}, "
+                           f"intercept {fit['intercept']:.3f}, R² {fit['r2']:.3f}")
+            else:
+                st.caption(f"Not enough distinct values for a fit ({int(fit['n'])} rows).")
+
+    cache_stats = AGG_CACHE.stats()
+    st.sidebar.caption(f"Aggregation cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                       f"{cache_stats['entries']} entries, {cache_stats['mb']} MB")
+
+    st.success("Dashboard loaded successfully.")
+
+
+if __name__ == "__main__":
+    st.set_page_config(**PAGE_CONFIG)
+    render()
@@ -1,115 +1,169 @@
-import psycopg2  # type: ignore
-import pandas as pd
+import os
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import seaborn as sns
-import os
 
-# Output directory
-os.makedirs("outputs", exist_ok=True)
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.chart_jobs import ChartRegistry, content_hash
+from etl_common.parquet_store import read_processed
+from pm25_features import PM25Aggregates
+
+# "postgres" reads the materialized views; "files" reads the temporal aggregates written by process_pm25.py
+BACKEND = os.getenv("PM25_BACKEND", "postgres")
+PARQUET_PATH = "data/processed/pm25_geo_enriched.parquet"
+CSV_PATH = "data/processed/pm25_geo_enriched.csv"
+TEMPORAL_PARQUET_PATH = "data/processed/pm25_temporal.parquet"
+TEMPORAL_CSV_PATH = "data/processed/pm25_temporal.csv"
+
+# Each chart is a pure function of (data, spec); charts are skipped until the views are refreshed again
+charts = ChartRegistry("outputs")
+
+
+def load_aggregates():
+    # Raw readings for the histogram, limited to the located ones every other chart (and backend) aggregates
+    readings = read_processed(PARQUET_PATH, CSV_PATH, columns=["pm25", "city", "country"])
+    pm25 = readings.dropna(subset=["pm25", "city", "country"])["pm25"].to_numpy()
+    return PM25Aggregates(read_processed(TEMPORAL_PARQUET_PATH, TEMPORAL_CSV_PATH), pm25)
+
+
+# Read only the aggregated rows each chart plots (views or stored aggregates), once per run
+def daily(queries):
+    return queries.daily_avg().set_index("date")["pm25"]
+
+def top_cities(queries):
+    return queries.top_cities(10).set_index("city")["pm25"]
+
+def histogram(queries):
+    return queries.histogram(bins=30)
+
+def countries(queries):
+    return queries.country_avg().set_index("country")["pm25"]
 
-# PostgreSQL connection
-conn = psycopg2.connect(
-    dbname="airqualitydb",
-    user="saisrivatsat",
-    host="localhost",
-    port=5433
-)
+def months(queries):
+    return queries.month_avg().set_index("month")["pm25"]
+
+def weekdays(queries):
+    return queries.weekday_avg().set_index("weekday")["pm25"]
+
+def years(queries):
+    return queries.yearly_avg().set_index("year")["pm25"]
 
-# Load data
-query = "SELECT * FROM pm25_data WHERE city IS NOT NULL;"
-df = pd.read_sql(query, conn)
-conn.close()
-df["date"] = pd.to_datetime(df["date"])
 
 # -------- 1. Daily Average PM2.5 Over Time --------
-plt.figure(figsize=(12, 6))
-daily_avg = df.groupby("date")["pm25"].mean()
-daily_avg.plot()
-max_day = daily_avg.idxmax()
-max_val = daily_avg.max()
-plt.annotate(f"Peak: {max_val:.2f}", xy=(max_day, max_val), xytext=(max_day, max_val + 100),
-             arrowprops=dict(facecolor='black', arrowstyle="->"))
-plt.title("Daily Average PM2.5")
-plt.xlabel("Date")
-plt.ylabel("PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/daily_pm25_trend.png")
-plt.close()
+@charts.chart("daily_pm25_trend.png", prepare=daily)
+def daily_trend(daily_avg, spec):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    daily_avg.plot(ax=ax)
+    max_day = daily_avg.idxmax()
+    max_val = daily_avg.max()
+    ax.annotate(f"Peak: {max_val:.2f}", xy=(max_day, max_val), xytext=(max_day, max_val + 100),
+                arrowprops=dict(facecolor='black', arrowstyle="->"))
+    ax.set_title("Daily Average PM2.5")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 2. Top 10 Cities with Highest Avg PM2.5 --------
-plt.figure(figsize=(12, 6))
-top_cities = df.groupby("city")["pm25"].mean().sort_values(ascending=False).head(10)
-ax = sns.barplot(x=top_cities.values, y=top_cities.index, palette="Reds_r")
-for i, v in enumerate(top_cities.values):
-    ax.text(v + 2, i, f"{v:.1f}", color='black', va='center')
-plt.title("Top 10 Cities by Avg PM2.5")
-plt.xlabel("Avg PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/top10_cities_pm25.png")
-plt.close()
+@charts.chart("top10_cities_pm25.png", prepare=top_cities)
+def top10_cities(top_cities, spec):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.barplot(x=top_cities.values, y=top_cities.index, palette="Reds_r", ax=ax)
+    for i, v in enumerate(top_cities.values):
+        ax.text(v + 2, i, f"{v:.1f}", color='black', va='center')
+    ax.set_title("Top 10 Cities by Avg PM2.5")
+    ax.set_xlabel("Avg PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 3. Distribution of PM2.5 --------
-plt.figure(figsize=(10, 5))
-sns.histplot(df["pm25"], bins=30, kde=True, color="blue")
-plt.axvline(df["pm25"].mean(), color='red', linestyle='--')
-plt.text(df["pm25"].mean() + 10, 1000, f"Mean: {df['pm25'].mean():.2f}", color="red")
-plt.title("Distribution of PM2.5 Levels")
-plt.xlabel("PM2.5 (µg/m³)")
-plt.ylabel("Frequency")
-plt.tight_layout()
-plt.savefig("outputs/pm25_distribution.png")
-plt.close()
+@charts.chart("pm25_distribution.png", prepare=histogram)
+def distribution(data, spec):
+    histogram, mean_pm25 = data
+    fig, ax = plt.subplots(figsize=(10, 5))
+    # Bucketed in SQL; a KDE over 30 bucket midpoints would be misleading, so bars only
+    sns.histplot(x=histogram["pm25"], weights=histogram["count"], bins=30, color="blue", ax=ax)
+    ax.axvline(mean_pm25, color='red', linestyle='--')
+    ax.text(mean_pm25 + 10, 1000, f"Mean: {mean_pm25:.2f}", color="red")
+    ax.set_title("Distribution of PM2.5 Levels")
+    ax.set_xlabel("PM2.5 (µg/m³)")
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 4. Avg PM2.5 by Country --------
-plt.figure(figsize=(14, 6))
-country_avg = df.groupby("country")["pm25"].mean().sort_values(ascending=False)
-ax = sns.barplot(x=country_avg.index, y=country_avg.values, palette="Blues")
-for i, v in enumerate(country_avg.values):
-    ax.text(i, v + 2, f"{v:.1f}", color='black', ha='center')
-plt.xticks(rotation=45, ha="right")
-plt.title("Average PM2.5 by Country")
-plt.ylabel("Avg PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/country_pm25.png")
-plt.close()
+@charts.chart("country_pm25.png", prepare=countries)
+def country_avg(country_avg, spec):
+    fig, ax = plt.subplots(figsize=(14, 6))
+    sns.barplot(x=country_avg.index, y=country_avg.values, palette="Blues", ax=ax)
+    for i, v in enumerate(country_avg.values):
+        ax.text(i, v + 2, f"{v:.1f}", color='black', ha='center')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    ax.set_title("Average PM2.5 by Country")
+    ax.set_ylabel("Avg PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 5. Avg PM2.5 by Month --------
-df["month"] = df["date"].dt.month
-monthly_avg = df.groupby("month")["pm25"].mean()
-plt.figure(figsize=(10, 5))
-sns.lineplot(x=monthly_avg.index, y=monthly_avg.values, marker='o')
-plt.title("Average PM2.5 by Month")
-plt.xlabel("Month")
-plt.ylabel("PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/monthly_avg_pm25.png")
-plt.close()
+@charts.chart("monthly_avg_pm25.png", prepare=months)
+def monthly_avg(monthly_avg, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(x=monthly_avg.index, y=monthly_avg.values, marker='o', ax=ax)
+    ax.set_title("Average PM2.5 by Month")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 6. Avg PM2.5 by Day of Week --------
-df["weekday"] = df["date"].dt.day_name()
-weekday_avg = df.groupby("weekday")["pm25"].mean()
-ordered_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-weekday_avg = weekday_avg.reindex(ordered_days)
-plt.figure(figsize=(10, 5))
-ax = sns.barplot(x=weekday_avg.index, y=weekday_avg.values, palette="coolwarm")
-for i, v in enumerate(weekday_avg.values):
-    ax.text(i, v + 1, f"{v:.1f}", ha='center')
-plt.title("Average PM2.5 by Day of the Week")
-plt.ylabel("PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/weekday_avg_pm25.png")
-plt.close()
+@charts.chart("weekday_avg_pm25.png", prepare=weekdays)
+def weekday_avg(weekday_avg, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.barplot(x=weekday_avg.index, y=weekday_avg.values, palette="coolwarm", ax=ax)
+    for i, v in enumerate(weekday_avg.values):
+        ax.text(i, v + 1, f"{v:.1f}", ha='center')
+    ax.set_title("Average PM2.5 by Day of the Week")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
 
 # -------- 7. Avg PM2.5 by Year --------
-df["year"] = df["date"].dt.year
-yearly_avg = df.groupby("year")["pm25"].mean()
-plt.figure(figsize=(10, 5))
-sns.lineplot(x=yearly_avg.index, y=yearly_avg.values, marker='o')
-plt.title("Average PM2.5 by Year")
-plt.xlabel("Year")
-plt.ylabel("PM2.5 (µg/m³)")
-plt.tight_layout()
-plt.savefig("outputs/yearly_avg_pm25.png")
-plt.close()
-
-print("All visualizations saved to `outputs/` folder.")
+@charts.chart("yearly_avg_pm25.png", prepare=years)
+def yearly_avg(yearly_avg, spec):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(x=yearly_avg.index, y=yearly_avg.values, marker='o', ax=ax)
+    ax.set_title("Average PM2.5 by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
+
+if __name__ == "__main__":
+    if BACKEND == "files":
+        stats = charts.run(load_aggregates, force="--force" in sys.argv, source_key=content_hash(
+            TEMPORAL_PARQUET_PATH, TEMPORAL_CSV_PATH, PARQUET_PATH, CSV_PATH))
+    else:
+        from etl_common.pg_pool import get_pool
+        from etl_common.pg_views import PM25_VIEWS, create_views
+        from pm25_queries import PM25Queries
+
+        # PostgreSQL connection pool (settings from env, see etl_common/pg_pool.py)
+        pool = get_pool("airqualitydb")
+        with pool.connection() as conn:
+            create_views(conn, PM25_VIEWS)
+        queries = PM25Queries(pool)
+
+        # The views only change when a load refreshes them, so their refresh time versions the inputs
+        stats = charts.run(lambda: queries, source_key=str(queries.version()), force="--force" in sys.argv)
+    if stats["failed"]:
+        sys.exit(1)
+    print("All visualizations saved to `outputs/` folder.")
@@ -1,59 +1,117 @@
-import requests
 import pandas as pd
 import os
+import sys
+import threading
 from dotenv import load_dotenv # type: ignore
-import time
+
+from openaq_client import OpenAQClient, fetch_concurrently, DEFAULT_CONCURRENCY
+from fetch_state import FetchState
+from etl_common.instrumentation import print_summary, stage
+from etl_common.streaming import CsvWriter, iter_csv
+
+RAW_CSV_PATH = "data/raw/pm25_daily_full.csv"
+RAW_JSON_PATH = "data/raw/pm25_daily_full.json"
 
 # Load the API key
 load_dotenv()
 API_KEY = os.getenv("OPENAQ_API_KEY")
 
-headers = {
-    "X-API-Key": API_KEY
-}
+# Shared client: token-bucket rate limit + retry/backoff on 429/5xx
+client = OpenAQClient(api_key=API_KEY)
+
+# Serialises appends to the raw files and checkpoint updates across worker threads
+write_lock = threading.Lock()
 
 # 1. Get list of sensors that measure PM2.5
 def get_pm25_sensors(limit=50):
-    url = "https://api.openaq.org/v3/parameters/2/latest"
-    params = {"limit": limit}
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch sensor list: {response.text}")
-    results = response.json().get("results", [])
+    body = client.get("/parameters/2/latest", {"limit": limit})
+    if body is None:
+        raise Exception("Failed to fetch sensor list")
+    results = body.get("results", [])
     # API responses use the key `sensorId` to identify each sensor.
     # The previous implementation looked for `sensorsId`, which never
     # exists and resulted in an empty sensor list.  Fetch the correct key
     # and guard against missing values.
     return [r["sensorId"] for r in results if r.get("sensorId") is not None]
 
-# 2. Get daily average values for a given sensor ID
-def get_daily_values(sensor_id, limit=365):
-    url = f"https://api.openaq.org/v3/sensors/{sensor_id}/days"
-    params = {"limit": limit}
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code != 200:
-        print(f"Sensor {sensor_id} failed: {response.status_code}")
-        return []
-    return response.json().get("results", [])
-
-# 3. Loop through sensors and collect data
-def fetch_all_pm25_daily(sensor_limit=50, days_limit=365):
+# 2. Get daily average values for a given sensor ID (follows pagination)
+def get_daily_values(sensor_id, limit=365, since=None):
+    params = {"datetime_from": since} if since else {}
+    return client.paginate(f"/sensors/{sensor_id}/days", params, max_records=limit)
+
+# 3. Append new rows to the raw CSV/JSON files
+def append_raw(df):
+    os.makedirs(os.path.dirname(RAW_CSV_PATH), exist_ok=True)
+    if os.path.exists(RAW_CSV_PATH) and os.path.getsize(RAW_CSV_PATH) > 0:
+        header = list(pd.read_csv(RAW_CSV_PATH, nrows=0).columns)
+        added = [column for column in df.columns if column not in header]
+        if added:
+            # Records with fields the file lacks widen its header; the rows written so far are copied over
+            # chunk by chunk, as text, with the new columns left empty
+            print(f"Adding columns {added} to {RAW_CSV_PATH}")
+            header += added
+            with CsvWriter(RAW_CSV_PATH, header) as out:
+                for chunk in iter_csv(RAW_CSV_PATH, dtype=str, keep_default_na=False):
+                    out.write(chunk.reindex(columns=header))
+        # Appended rows follow the file's column layout so they line up with the header
+        df.reindex(columns=header).to_csv(RAW_CSV_PATH, mode="a", header=False, index=False)
+    else:
+        df.to_csv(RAW_CSV_PATH, index=False)
+    lines = df.to_json(orient="records", lines=True)
+    with open(RAW_JSON_PATH, "a") as f:
+        f.write(lines if lines.endswith("\n") else lines + "\n")
+
+# 4. Fetch only the days after a sensor's high-water mark, then checkpoint it
+def fetch_sensor_increment(sensor_id, state, days_limit=365):
+    since = state.high_water_mark(sensor_id)
+    daily_data = get_daily_values(sensor_id, days_limit, since)
+    # `datetime_from` is inclusive, so drop the day we already have
+    new_data = [
+        entry for entry in daily_data
+        if since is None or entry.get("period", {}).get("datetimeFrom", {}).get("utc", "") > since
+    ]
+    for entry in new_data:
+        entry["sensor_id"] = sensor_id  # keep track of sensor
+    last_utc = max((e["period"]["datetimeFrom"]["utc"] for e in new_data), default=since)
+
+    with write_lock:
+        if new_data:
+            append_raw(pd.json_normalize(new_data))
+        state.update(sensor_id, last_utc, len(new_data))
+    return len(new_data)
+
+# 5. Seed high-water marks from an existing raw CSV written before checkpointing existed
+def seed_state_from_raw(state):
+    if state.sensors or not os.path.exists(RAW_CSV_PATH):
+        return
+    raw = pd.read_csv(RAW_CSV_PATH, usecols=["sensor_id", "period.datetimeFrom.utc"]).dropna()
+    marks = raw.groupby("sensor_id")["period.datetimeFrom.utc"].agg(["max", "size"])
+    for sensor_id, row in marks.iterrows():
+        state.update(int(sensor_id), row["max"], int(row["size"]), save=False)
+    state.flush()
+
+# 6. Fetch all sensors concurrently, appending as each one completes
+def fetch_all_pm25_daily(sensor_limit=50, days_limit=365, concurrency=DEFAULT_CONCURRENCY, full_refresh=False):
+    state = FetchState()
+    if full_refresh:
+        state.reset()
+        for path in (RAW_CSV_PATH, RAW_JSON_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+    seed_state_from_raw(state)
     sensors = get_pm25_sensors(sensor_limit)
-    all_data = []
-    for i, sensor_id in enumerate(sensors):
-        print(f"Fetching sensor {i+1}/{len(sensors)} (ID: {sensor_id})...")
-        daily_data = get_daily_values(sensor_id, days_limit)
-        for entry in daily_data:
-            entry["sensor_id"] = sensor_id  # keep track of sensor
-        all_data.extend(daily_data)
-        time.sleep(0.5)  # avoid hammering API
-    return pd.json_normalize(all_data)
+    new_counts = fetch_concurrently(
+        sensors, lambda sensor_id: fetch_sensor_increment(sensor_id, state, days_limit),
+        concurrency=concurrency, label="sensor"
+    )
+    return sum(new_counts.values())
 
 if __name__ == "__main__":
-    df = fetch_all_pm25_daily(sensor_limit=50, days_limit=365)
-    print(f"\nTotal records fetched: {len(df)}")
-
-    os.makedirs("data/raw", exist_ok=True)
-    df.to_csv("data/raw/pm25_daily_full.csv", index=False)
-    df.to_json("data/raw/pm25_daily_full.json", orient="records", lines=True)
-    print("Data saved to data/raw/pm25_daily_full.csv and .json")
+    # Incremental by default; pass --full to discard the checkpoint and re-download everything
+    with stage("fetch") as metrics:
+        total = fetch_all_pm25_daily(sensor_limit=50, days_limit=365, full_refresh="--full" in sys.argv)
+        metrics.add(rows_out=total)
+    print(f"\nNew records fetched: {total}")
+    print("Fetch stats:", client.stats.summary())
+    print(f"Data appended to {RAW_CSV_PATH} and .json (checkpoint: {FetchState().path})")
+    print_summary()
@@ -0,0 +1,51 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+STATE_PATH = "data/raw/fetch_state.json"
+
+
+class FetchState:
+    """JSON manifest of per-sensor high-water marks (last `period.datetimeFrom.utc` fetched).
+
+    Every update is flushed to disk atomically, so an interrupted run resumes
+    from the last sensor that was fully written.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.sensors = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.sensors = json.load(f).get("sensors", {})
+
+    def high_water_mark(self, sensor_id):
+        return self.sensors.get(str(sensor_id), {}).get("last_utc")
+
+    def update(self, sensor_id, last_utc, new_records, save=True):
+        with self._lock:
+            entry = self.sensors.setdefault(str(sensor_id), {"records": 0})
+            if last_utc and (entry.get("last_utc") is None or last_utc > entry["last_utc"]):
+                entry["last_utc"] = last_utc
+            entry["records"] += new_records
+            entry["checked_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            if save:
+                self._save()
+
+    def flush(self):
+        with self._lock:
+            self._save()
+
+    def reset(self):
+        with self._lock:
+            self.sensors = {}
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sensors": self.sensors}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
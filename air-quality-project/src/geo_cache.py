@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import time
+
+CACHE_PATH = "data/cache/geo_cache.sqlite"
+DEFAULT_TTL_DAYS = float(os.getenv("GEO_CACHE_TTL_DAYS", "30"))
+DEFAULT_GRID_DEG = float(os.getenv("GEO_GRID_DEG", "0.01"))   # ~1 km cells at the equator
+
+
+class GeoCache:
+    """On-disk SQLite cache for sensor coordinates and reverse-geocode results.
+
+    Reverse-geocode results are keyed on a grid cell rather than the exact
+    coordinates, so sensors that fall in the same cell share one lookup.
+    Entries older than `ttl_days` are treated as misses and evicted on open.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_days=DEFAULT_TTL_DAYS, grid_deg=DEFAULT_GRID_DEG):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.grid_deg = grid_deg
+        self.stats = {"sensor_hits": 0, "sensor_misses": 0, "geocode_hits": 0, "geocode_misses": 0}
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sensors (
+                sensor_id INTEGER PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                fetched_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS geocodes (
+                grid_deg REAL,
+                lat_cell INTEGER,
+                lon_cell INTEGER,
+                city TEXT,
+                country TEXT,
+                fetched_at REAL,
+                PRIMARY KEY (grid_deg, lat_cell, lon_cell)
+            );
+        """)
+        self.evict_expired()
+
+    def evict_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM sensors WHERE fetched_at < ?", (cutoff,)).rowcount
+            removed += self.conn.execute("DELETE FROM geocodes WHERE fetched_at < ?", (cutoff,)).rowcount
+        return removed
+
+    # ---- Sensor coordinates ----
+    def get_sensor(self, sensor_id):
+        row = self.conn.execute(
+            "SELECT latitude, longitude FROM sensors WHERE sensor_id = ?", (int(sensor_id),)
+        ).fetchone()
+        self.stats["sensor_hits" if row else "sensor_misses"] += 1
+        return {"latitude": row[0], "longitude": row[1]} if row else None
+
+    def put_sensor(self, sensor_id, latitude, longitude):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sensors VALUES (?, ?, ?, ?)",
+                (int(sensor_id), latitude, longitude, time.time()),
+            )
+
+    # ---- Reverse geocoding on a snapped grid ----
+    def cell(self, lat, lon):
+        return round(lat / self.grid_deg), round(lon / self.grid_deg)
+
+    def cell_center(self, lat, lon):
+        lat_cell, lon_cell = self.cell(lat, lon)
+        return lat_cell * self.grid_deg, lon_cell * self.grid_deg
+
+    def get_place(self, lat, lon):
+        """Return (city, country) for the cell containing (lat, lon), or None on a miss."""
+        row = self.conn.execute(
+            "SELECT city, country FROM geocodes WHERE grid_deg = ? AND lat_cell = ? AND lon_cell = ?",
+            (self.grid_deg, *self.cell(lat, lon)),
+        ).fetchone()
+        self.stats["geocode_hits" if row else "geocode_misses"] += 1
+        return tuple(row) if row else None
+
+    def put_place(self, lat, lon, city, country):
+        # Empty results are cached too, so unresolvable cells are not re-queried every run
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (self.grid_deg, *self.cell(lat, lon), city, country, time.time()),
+            )
+
+    def report(self):
+        lines = ["Geo cache report:"]
+        for kind in ("sensor", "geocode"):
+            hits, misses = self.stats[f"{kind}_hits"], self.stats[f"{kind}_misses"]
+            total = hits + misses
+            rate = f"{hits / total:.0%}" if total else "n/a"
+            lines.append(f"  {kind:<8} hits={hits} misses={misses} hit_rate={rate}")
+        return "\n".join(lines)
+
+    def close(self):
+        self.conn.close()
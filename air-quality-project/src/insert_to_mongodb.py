@@ -1,18 +1,142 @@
 import json
-from pymongo import MongoClient # type: ignore
+import os
+import sys
+from pathlib import Path
 
-# Mongo connection (local default)
-client = MongoClient("mongodb://localhost:27017/")
+from pymongo import ASCENDING, MongoClient, ReplaceOne # type: ignore
+from pymongo.errors import BulkWriteError # type: ignore
 
-# Choose DB and collection
-db = client["airquality"]
-collection = db["pm25_raw"]
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.instrumentation import stage
 
-# Load your raw JSON file
-with open("data/raw/pm25_daily_full.json", "r") as f:
-    records = [json.loads(line) for line in f]
+RAW_JSON_PATH = "data/raw/pm25_daily_full.json"
+CHUNK_SIZE = int(os.getenv("MONGO_CHUNK_SIZE", "5000"))
+NATURAL_KEY = ["sensor_id", "period.datetimeFrom.utc"]
 
-# Insert into MongoDB
-result = collection.insert_many(records)
 
-print(f"Inserted {len(result.inserted_ids)} records into MongoDB collection 'pm25_raw'")
+# 1. Stream the JSONL file in fixed-size chunks instead of loading it whole
+def unflatten(record):
+    # fetch_openaq writes json_normalize'd rows ("period.datetimeFrom.utc"); restore the nesting
+    doc = {}
+    for key, value in record.items():
+        target = doc
+        *parents, leaf = key.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return doc
+
+def iter_chunks(path=RAW_JSON_PATH, chunk_size=CHUNK_SIZE, stats=None):
+    chunk = []
+    with open(path, "r") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                chunk.append(unflatten(json.loads(line)))
+            except json.JSONDecodeError as e:
+                print(f"Skipping malformed line {line_no}: {e}")
+                if stats is not None:
+                    stats["malformed"] += 1
+                continue
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+# 2. Unique compound index so re-ingesting the same file deduplicates
+def ensure_indexes(collection, chunk_size=CHUNK_SIZE):
+    """Back the natural key with a unique index, first fixing up collections loaded before it existed.
+
+    Earlier loads inserted the JSONL rows as they were, with flat "period.datetimeFrom.utc" keys and
+    repeats; those documents are re-nested and duplicates collapsed (keeping the most recently inserted
+    copy), otherwise the index build fails with E11000.
+    """
+    if "sensor_day_unique" in collection.index_information():
+        return
+    # Flat documents have no nested period, so they are the ones missing the key's path
+    requests, renested = [], 0
+    for doc in collection.find({NATURAL_KEY[1]: {"$exists": False}}):
+        if any("." in key for key in doc):
+            requests.append(ReplaceOne({"_id": doc["_id"]}, unflatten(doc)))
+        if len(requests) == chunk_size:
+            renested += collection.bulk_write(requests, ordered=False).modified_count
+            requests = []
+    if requests:
+        renested += collection.bulk_write(requests, ordered=False).modified_count
+    if renested:
+        print(f"Re-nested {renested} flat documents in {collection.name}")
+
+    duplicates = collection.aggregate([
+        {"$group": {"_id": {field.replace(".", "_"): f"${field}" for field in NATURAL_KEY},
+                    "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    # ObjectIds grow with insertion time: keep the newest copy of each key
+    stale = [_id for group in duplicates for _id in sorted(group["ids"])[:-1]]
+    for start in range(0, len(stale), chunk_size):
+        collection.delete_many({"_id": {"$in": stale[start:start + chunk_size]}})
+    if stale:
+        print(f"Removed {len(stale)} duplicate documents from {collection.name}")
+
+    collection.create_index([(field, ASCENDING) for field in NATURAL_KEY], unique=True, name="sensor_day_unique")
+
+
+# 3. Write one chunk; unordered so a bad document doesn't abort the rest
+def insert_chunk(collection, docs, stats):
+    try:
+        result = collection.insert_many(docs, ordered=False)
+        stats["inserted"] += len(result.inserted_ids)
+    except BulkWriteError as e:
+        details = e.details
+        stats["inserted"] += details.get("nInserted", 0)
+        for error in details.get("writeErrors", []):
+            if error.get("code") == 11000:
+                stats["duplicates"] += 1
+            else:
+                stats["failed"] += 1
+                print(f"Insert failed: {error.get('errmsg')}")
+
+def upsert_chunk(collection, docs, stats):
+    requests = [
+        ReplaceOne({"sensor_id": d.get("sensor_id"), "period.datetimeFrom.utc": d.get("period", {}).get("datetimeFrom", {}).get("utc")},
+                   d, upsert=True)
+        for d in docs
+    ]
+    try:
+        result = collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        details = e.details
+        stats["inserted"] += details.get("nUpserted", 0)
+        stats["updated"] += details.get("nModified", 0)
+        for error in details.get("writeErrors", []):
+            stats["failed"] += 1
+            print(f"Upsert failed: {error.get('errmsg')}")
+        return
+    stats["inserted"] += result.upserted_count
+    stats["updated"] += result.modified_count
+
+
+if __name__ == "__main__":
+    # Mongo connection (local default)
+    client = MongoClient("mongodb://localhost:27017/")
+
+    # Choose DB and collection
+    db = client["airquality"]
+    collection = db["pm25_raw"]
+    ensure_indexes(collection)
+
+    # --upsert replaces existing documents (picks up revised values); default only adds new ones
+    write_chunk = upsert_chunk if "--upsert" in sys.argv else insert_chunk
+    stats = {"inserted": 0, "updated": 0, "duplicates": 0, "failed": 0, "malformed": 0}
+    with stage("load/mongodb") as metrics:
+        for chunk in iter_chunks(stats=stats):
+            write_chunk(collection, chunk, stats)
+            metrics.add(rows_in=len(chunk))
+        metrics.add(rows_out=stats["inserted"] + stats["updated"])
+
+    print(f"Inserted {stats['inserted']} records into MongoDB collection 'pm25_raw' "
+          f"(updated {stats['updated']}, duplicates skipped {stats['duplicates']}, "
+          f"failed {stats['failed']}, malformed lines {stats['malformed']})")
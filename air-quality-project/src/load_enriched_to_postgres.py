@@ -1,28 +1,25 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
-import psycopg2 # type: ignore
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.pg_loader import load_dataframe
+from etl_common.pg_pool import connection
+from etl_common.pg_views import PM25_VIEWS, refresh_views
+from etl_common.schemas import PM25_DATA
 
 # Load enriched CSV
-df = pd.read_csv("data/processed/pm25_geo_enriched.csv")
+df = pd.read_csv("data/processed/pm25_geo_enriched.csv", parse_dates=["date"])
 
 # Clean nulls if necessary
 df = df.dropna(subset=["date", "pm25", "city", "country"])
 
-# Connect to Postgres
-conn = psycopg2.connect(
-    host="localhost",
-    port=5433,
-    database="airqualitydb",
-    user="saisrivatsat"
-)
-cur = conn.cursor()
+# Connection settings come from env (see etl_common/pg_pool.py)
+with connection("airqualitydb") as conn:
+    # Bulk insert via COPY, one transaction per chunk
+    load_dataframe(conn, PM25_DATA, df)
 
-# Insert data
-for _, row in df.iterrows():
-    cur.execute(
-        "INSERT INTO pm25_data (date, pm25, sensor_id, city, country) VALUES (%s, %s, %s, %s, %s)",
-        (row["date"], row["pm25"], row["sensor_id"], row["city"], row["country"])
-    )
-conn.commit()
-cur.close()
-conn.close()
+    # Rebuild the dashboard/analysis aggregates without blocking their readers
+    refresh_views(conn, PM25_VIEWS)
 print("Enriched data inserted into PostgreSQL.")
@@ -1,44 +1,135 @@
-import psycopg2 # type: ignore
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+from bson import json_util # type: ignore
 from pymongo import MongoClient # type: ignore
 
-# MongoDB connection
-mongo_client = MongoClient("mongodb://localhost:27017/")
-mongo_db = mongo_client["airquality"]
-mongo_collection = mongo_db["pm25_raw"]
-
-# PostgreSQL connection
-pg_conn = psycopg2.connect(
-    dbname="airqualitydb",
-    user="saisrivatsat",  
-    host="localhost",
-    port=5433
-)
-pg_cursor = pg_conn.cursor()
-
-# Fetch documents from MongoDB
-documents = mongo_collection.find()
-
-insert_query = """
-INSERT INTO pm25_data (date, pm25, sensor_id, city, country)
-VALUES (%s, %s, %s, %s, %s)
-"""
-
-count = 0
-for doc in documents:
-    try:
-        pg_cursor.execute(insert_query, (
-            doc.get("date"),
-            doc.get("pm25"),
-            doc.get("sensor_id"),
-            doc.get("city"),
-            doc.get("country")
-        ))
-        count += 1
-    except Exception as e:
-        print(f"Skipping document due to error: {e}")
-
-# Commit & close
-pg_conn.commit()
-pg_cursor.close()
-pg_conn.close()
-print(f"Migrated {count} records from MongoDB to PostgreSQL.")
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.pg_loader import create_table, load_dataframe
+from etl_common.pg_pool import connection
+from etl_common.pg_views import PM25_VIEWS, refresh_views
+from etl_common.schemas import PM25_DATA
+
+BATCH_SIZE = int(os.getenv("MIGRATE_BATCH_SIZE", "5000"))
+CHECKPOINT_PATH = "data/migrate_checkpoint.json"
+DEAD_LETTER_PATH = "data/migrate_dead_letter.jsonl"
+
+# Only pull the fields we convert; raw OpenAQ documents carry ~30 more
+PROJECTION = {
+    "_id": 1, "sensor_id": 1, "date": 1, "pm25": 1, "value": 1,
+    "city": 1, "country": 1, "period.datetimeFrom.utc": 1,
+}
+
+
+# 1. Checkpoint on the last migrated _id so an interrupted run resumes
+def load_checkpoint():
+    if not os.path.exists(CHECKPOINT_PATH):
+        return None
+    with open(CHECKPOINT_PATH, "r") as f:
+        return json_util.loads(f.read()).get("last_id")
+
+def save_checkpoint(last_id):
+    tmp_path = f"{CHECKPOINT_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json_util.dumps({"last_id": last_id}))
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def open_dead_letter(resuming):
+    """Open the dead-letter file: truncated on a fresh run, appended to on a resume.
+
+    Returns (file, _ids already recorded) so the batch re-read after an
+    interruption does not record its rejects a second time.
+    """
+    seen = set()
+    if resuming and os.path.exists(DEAD_LETTER_PATH):
+        with open(DEAD_LETTER_PATH, "r") as f:
+            seen = {json_util.loads(line)["document"]["_id"] for line in f if line.strip()}
+    return open(DEAD_LETTER_PATH, "a" if resuming else "w"), seen
+
+
+# 2. Convert a batch of documents; return (rows, rejected documents with reasons)
+def convert_batch(docs):
+    df = pd.DataFrame({
+        # Processed docs carry `date`/`pm25`; raw OpenAQ docs carry `period.datetimeFrom.utc`/`value`
+        "date": [d.get("date") or (d.get("period") or {}).get("datetimeFrom", {}).get("utc") for d in docs],
+        "pm25": [d.get("pm25", d.get("value")) for d in docs],
+        "sensor_id": [d.get("sensor_id") for d in docs],
+        "city": [d.get("city") for d in docs],
+        "country": [d.get("country") for d in docs],
+    })
+    df["date"] = pd.to_datetime(df["date"], errors="coerce", utc=True).dt.tz_convert(None)
+    df["pm25"] = pd.to_numeric(df["pm25"], errors="coerce")
+    df["sensor_id"] = pd.to_numeric(df["sensor_id"], errors="coerce")
+
+    reasons = pd.Series("", index=df.index)
+    reasons[df["pm25"].isna()] = "invalid pm25"
+    reasons[df["date"].isna()] = "invalid date"
+    reasons[df["sensor_id"].isna()] = "missing sensor_id"
+    valid = reasons == ""
+    rejected = [(docs[i], reasons[i]) for i in df.index[~valid]]
+    return df[valid], rejected
+
+
+# 3. Stream documents in _id order, one DataFrame per batch
+def stream_batches(collection, dead_letter, stats, batch_size=BATCH_SIZE):
+    last_id = load_checkpoint()
+    query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+    if last_id is not None:
+        print(f"Resuming after _id {last_id}")
+    cursor = collection.find(query, PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+    docs = []
+    for doc in cursor:
+        docs.append(doc)
+        if len(docs) == batch_size:
+            yield from _emit(docs, dead_letter, stats)
+            docs = []
+    if docs:
+        yield from _emit(docs, dead_letter, stats)
+    # load_dataframe commits each chunk before pulling the next one,
+    # so reaching this point means the final batch is committed as well
+    if stats["pending_id"] is not None:
+        save_checkpoint(stats["pending_id"])
+
+def _emit(docs, dead_letter, stats):
+    # The previous batch was committed before this one was requested; checkpoint it now
+    if stats["pending_id"] is not None:
+        save_checkpoint(stats["pending_id"])
+    rows, rejected = convert_batch(docs)
+    for doc, reason in rejected:
+        if doc["_id"] not in stats["dead_ids"]:
+            dead_letter.write(json_util.dumps({"reason": reason, "document": doc}) + "\n")
+            stats["dead_ids"].add(doc["_id"])
+    stats["read"] += len(docs)
+    stats["rejected"] += len(rejected)
+    stats["pending_id"] = docs[-1]["_id"]
+    yield rows
+
+
+if __name__ == "__main__":
+    # MongoDB connection
+    mongo_client = MongoClient("mongodb://localhost:27017/")
+    mongo_collection = mongo_client["airquality"]["pm25_raw"]
+
+    # PostgreSQL connection (settings from env, see etl_common/pg_pool.py)
+    os.makedirs(os.path.dirname(DEAD_LETTER_PATH), exist_ok=True)
+    dead_letter, dead_ids = open_dead_letter(resuming=load_checkpoint() is not None)
+    stats = {"read": 0, "rejected": 0, "pending_id": None, "dead_ids": dead_ids}
+    with connection("airqualitydb") as pg_conn, dead_letter:
+        create_table(pg_conn, PM25_DATA)
+
+        # COPY each batch through a staging table and commit it before reading the next.
+        # Mongo documents carry no coordinates and rarely a city: keep what the enriched load stored.
+        result = load_dataframe(
+            pg_conn, PM25_DATA, stream_batches(mongo_collection, dead_letter, stats),
+            chunk_size=BATCH_SIZE, create=False, keep_existing=True,
+        )
+
+        # Rebuild the dashboard/analysis aggregates without blocking their readers
+        refresh_views(pg_conn, PM25_VIEWS)
+    mongo_client.close()
+    print(f"Migrated {result['rows']} records from MongoDB to PostgreSQL "
+          f"({stats['read']} read, {stats['rejected']} rejected -> {DEAD_LETTER_PATH}).")
@@ -0,0 +1,191 @@
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.instrumentation import network
+
+# OpenAQ v3 defaults (override via environment, e.g. to point at a local stub server)
+BASE_URL = os.getenv("OPENAQ_BASE_URL", "https://api.openaq.org/v3")
+# Per-key quota of the free tier. One token bucket is shared by every worker thread, so the sustained rate
+# is min(60/min, 2000/h) ~ 0.56 requests/s whatever OPENAQ_CONCURRENCY is: workers only overlap the latency
+# of the requests the bucket lets through. Raise the quota (or set OPENAQ_RATE_LIMIT) for a larger plan.
+QUOTA_PER_MINUTE = int(os.getenv("OPENAQ_QUOTA_PER_MINUTE", "60"))
+QUOTA_PER_HOUR = int(os.getenv("OPENAQ_QUOTA_PER_HOUR", "2000"))
+DEFAULT_RATE = float(os.getenv("OPENAQ_RATE_LIMIT") or min(QUOTA_PER_MINUTE / 60, QUOTA_PER_HOUR / 3600))
+DEFAULT_BURST = int(os.getenv("OPENAQ_BURST", "5"))
+DEFAULT_CONCURRENCY = int(os.getenv("OPENAQ_CONCURRENCY", "8"))
+MAX_PAGE_SIZE = 1000                                               # OpenAQ hard limit per page
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PaginationError(RuntimeError):
+    """A page failed once retries were exhausted; `results` holds the records of the pages before it."""
+
+    def __init__(self, path, page, results):
+        super().__init__(f"GET {path} page {page} failed ({len(results)} records fetched before it)")
+        self.path = path
+        self.page = page
+        self.results = results
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available; return the seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class FetchStats:
+    """Counters shared by all worker threads of one client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "elapsed_s": round(elapsed, 2),
+            "requests_per_s": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "throttled_s": round(self.throttled_seconds, 2),
+        }
+
+
+class OpenAQClient:
+    """Rate-limited OpenAQ client with retry/backoff and page iteration.
+
+    One `requests.Session` is kept per worker thread so connections are reused
+    without sharing a session across threads.
+    """
+
+    def __init__(self, api_key=None, base_url=BASE_URL, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_retries=5, backoff=0.5, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"X-API-Key": api_key} if api_key else {}
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = FetchStats()
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+            self._local.session.headers.update(self.headers)
+        return self._local.session
+
+    def get(self, path, params=None):
+        """GET `path` and return the decoded JSON body, or None once retries are exhausted."""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            self.stats.add(throttled_seconds=self.bucket.acquire())
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+                self.stats.add(requests=1)
+                network(response)
+            except requests.RequestException as e:
+                self.stats.add(requests=1)
+                network()
+                status, retry_after = f"error ({e})", None
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES:
+                    print(f"GET {path} failed: {response.status_code}")
+                    self.stats.add(failures=1)
+                    return None
+                status, retry_after = response.status_code, response.headers.get("Retry-After")
+
+            if attempt == self.max_retries:
+                break
+            # Honour Retry-After when the server sends it, else exponential backoff with jitter
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            self.stats.add(retries=1, throttled_seconds=delay)
+            print(f"GET {path} -> {status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        self.stats.add(failures=1)
+        return None
+
+    def paginate(self, path, params=None, max_records=None, page_size=MAX_PAGE_SIZE):
+        """Collect `results` across pages until a short page or `max_records` is reached.
+
+        Raises PaginationError when a page still fails after retries, rather than
+        returning the pages before it as if they were everything.
+        """
+        params = dict(params or {})
+        if max_records:
+            page_size = min(page_size, max_records)
+        results = []
+        page = 1
+        while True:
+            body = self.get(path, {**params, "limit": page_size, "page": page})
+            if body is None:
+                raise PaginationError(path, page, results)
+            batch = body.get("results", [])
+            results.extend(batch)
+            if len(batch) < page_size or (max_records and len(results) >= max_records):
+                break
+            page += 1
+        return results[:max_records] if max_records else results
+
+
+def fetch_concurrently(items, fn, concurrency=DEFAULT_CONCURRENCY, label="item"):
+    """Run `fn(item)` over a bounded thread pool; return {item: result} (failed items are skipped)."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(fn, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), start=1):
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                print(f"{label} {item} failed: {e}")
+                continue
+            print(f"Fetched {label} {done}/{len(futures)} (ID: {item})")
+    return results
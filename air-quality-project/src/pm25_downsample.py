@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+# Points the browser gets per horizontal pixel of a chart; the width is the widest the charts are drawn at
+VIEWPORT_PX = int(os.getenv("PM25_VIEWPORT_PX", "1200"))
+POINTS_PER_PX = float(os.getenv("PM25_POINTS_PER_PX", "1"))
+# Map markers: about one per `MARKER_PX` square of the map at its initial zoom
+MARKER_PX = int(os.getenv("PM25_MARKER_PX", "12"))
+# Mapbox GL draws the whole world 512 px wide at zoom 0
+WORLD_PX = 512
+METHODS = ("lttb", "minmax", "none")
+
+
+def point_budget(width_px=VIEWPORT_PX, points_per_px=POINTS_PER_PX):
+    """Most points worth sending for a chart `width_px` wide (more than one per pixel is not visible)."""
+    return max(int(width_px * points_per_px), 3)
+
+
+def map_budget(width_px=VIEWPORT_PX, height_px=500, marker_px=MARKER_PX):
+    """Most markers a map of this size can show without them covering each other."""
+    return max((width_px // marker_px) * (height_px // marker_px), 1)
+
+
+def mercator(lat, lon):
+    """Web Mercator position of each point as fractions of the world's width/height, in [0, 1)."""
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -85.05, 85.05))
+    return (np.asarray(lon, dtype=np.float64) + 180) / 360, (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+
+
+def lttb(x, y, n):
+    """Indices of `n` points picked by Largest-Triangle-Three-Buckets (Steinarsson, 2013).
+
+    The first and last points are kept; every bucket in between contributes the
+    point forming the largest triangle with the previous pick and the next
+    bucket's mean, which keeps peaks and the overall shape of the line.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    picked = np.empty(n, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    previous = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Mean of the next bucket (the last point for the final bucket)
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else size
+        next_x, next_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[previous] - next_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y - y[previous]))
+        previous = picked[i + 1] = lo + int(np.argmax(area))
+    return picked
+
+
+def minmax(x, y, n):
+    """Indices of the minimum and maximum of `y` in each of `n // 2` equal-count buckets, in order of `x`.
+
+    Cheaper than LTTB and keeps every extreme, so spikes never disappear.
+    """
+    size = len(y)
+    if n >= size or n < 2:
+        return np.arange(size)
+    edges = np.linspace(0, size, n // 2 + 1).astype(np.int64)
+    bucket = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    # Sorted by (bucket, y), each bucket's run starts at its minimum and ends at its maximum
+    order = np.lexsort((np.asarray(y, dtype=np.float64), bucket))
+    return np.unique(np.concatenate([order[edges[:-1]], order[edges[1:] - 1]]))
+
+
+def downsample(df, x, y, max_points, method="lttb"):
+    """Rows of `df` (sorted by `x`) reduced to at most `max_points` with `method` ("lttb", "minmax" or "none")."""
+    if method == "none" or len(df) <= max_points:
+        return df
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype("datetime64[ns]").astype(np.int64)
+    pick = {"lttb": lttb, "minmax": minmax}[method](xs, df[y].to_numpy(), max_points)
+    return df.iloc[pick].reset_index(drop=True)
+
+
+def sensor_points(df, how="mean"):
+    """One map point per sensor from reading rows: mean position and the mean (or latest) PM2.5.
+
+    Same columns as the SQL backends' `sensor_map`: sensor_id, country, city,
+    latitude, longitude, pm25, readings.
+    """
+    df = df.dropna(subset=["latitude", "longitude"])
+    keys = ["sensor_id", "country", "city"]
+    grouped = df.groupby(keys, sort=False, observed=True)
+    points = grouped.agg(latitude=("latitude", "mean"), longitude=("longitude", "mean"),
+                         pm25=("pm25", "mean"), readings=("pm25", "size")).reset_index()
+    if how == "latest":
+        latest = df.loc[grouped["date"].idxmax(), keys + ["pm25"]]
+        points = points.drop(columns="pm25").merge(latest, on=keys, how="left")
+    return points[keys + ["latitude", "longitude", "pm25", "readings"]]
+
+
+def thin_points(points, max_points, zoom=1, marker_px=MARKER_PX):
+    """Merge map points that would overlap at `zoom` until at most `max_points` remain.
+
+    Points are snapped to a grid of `marker_px` squares of the Web Mercator map
+    at `zoom`; each occupied cell becomes one point at the mean
+    position, with the readings-weighted PM2.5, the city of its worst sensor
+    and the number of sensors merged. The grid is coarsened until the budget holds.
+    """
+    if len(points) <= max_points:
+        return points.assign(sensors=1)
+    mx, my = mercator(points["latitude"], points["longitude"])
+    cell = marker_px / (WORLD_PX * 2 ** zoom)
+    while True:
+        key = np.floor(mx / cell).astype(np.int64) * (int(1 / cell) + 2) + np.floor(my / cell).astype(np.int64)
+        if len(np.unique(key)) <= max_points:
+            break
+        cell *= 2
+
+    weighted = points.assign(cell=key, weight=points["pm25"] * points["readings"])
+    worst = weighted.loc[weighted.groupby("cell")["pm25"].idxmax(), ["cell", "sensor_id", "country", "city"]]
+    merged = weighted.groupby("cell").agg(latitude=("latitude", "mean"), longitude=("longitude", "mean"),
+                                          weight=("weight", "sum"), readings=("readings", "sum"),
+                                          sensors=("sensor_id", "size")).reset_index()
+    merged["pm25"] = merged["weight"] / merged["readings"]
+    return merged.merge(worst, on="cell")[list(points.columns) + ["sensors"]]
@@ -0,0 +1,114 @@
+import pandas as pd
+
+from pm25_features import WEEKDAYS
+
+_AVG = "avg(pm25) AS pm25"
+
+
+class PM25DuckDB:
+    """The `PM25Queries` reads as SQL over the processed readings in an embedded DuckDB.
+
+    `engine` is an `etl_common.duckdb_engine.DuckDBEngine` with the enriched
+    dataset registered as `table`. Rows missing pm25, city or country are
+    ignored, as in the other backends; filters are the same optional
+    `country`/`city`/`start`/`end` keywords.
+    """
+
+    def __init__(self, engine, table="pm25_geo_enriched"):
+        self.engine = engine
+        self.table = table
+
+    def _where(self, country=None, city=None, start=None, end=None):
+        clauses, params = ["pm25 IS NOT NULL", "city IS NOT NULL", "country IS NOT NULL"], []
+        if country not in (None, "All"):
+            clauses.append("country = ?")
+            params.append(country)
+        if city not in (None, "All"):
+            clauses.append("city = ?")
+            params.append(city)
+        if start is not None:
+            clauses.append("CAST(date AS DATE) >= ?")
+            params.append(pd.Timestamp(start).date())
+        if end is not None:
+            clauses.append("CAST(date AS DATE) <= ?")
+            params.append(pd.Timestamp(end).date())
+        return "WHERE " + " AND ".join(clauses), params
+
+    def _frame(self, select, filters, tail=""):
+        where, params = self._where(**filters)
+        return self.engine.query(f"SELECT {select} FROM {self.table} {where} {tail}", params)
+
+    def countries(self):
+        return self._frame("DISTINCT country", {}, "ORDER BY country")["country"].tolist()
+
+    def cities(self, country=None):
+        return self._frame("DISTINCT city", {"country": country}, "ORDER BY city")["city"].tolist()
+
+    def date_bounds(self, country=None, city=None):
+        row = self._frame("min(date) AS start, max(date) AS end", {"country": country, "city": city}).iloc[0]
+        return pd.Timestamp(row["start"]), pd.Timestamp(row["end"])
+
+    def kpis(self, **filters):
+        row = self._frame(f"{_AVG}, max(pm25) AS pm25_max, count(DISTINCT city) AS n_cities", filters).iloc[0]
+        return row["pm25"], row["pm25_max"], int(row["n_cities"])
+
+    def daily_avg(self, **filters):
+        df = self._frame(f"CAST(date AS DATE) AS date, {_AVG}", filters, "GROUP BY 1 ORDER BY 1")
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def top_cities(self, n=10, **filters):
+        return self._frame(f"city, {_AVG}", filters, f"GROUP BY city ORDER BY pm25 DESC LIMIT {int(n)}")
+
+    def country_avg(self, **filters):
+        return self._frame(f"country, {_AVG}", filters, "GROUP BY country ORDER BY pm25 DESC")
+
+    def month_avg(self, **filters):
+        # Month of year (1-12), pooled across years
+        return self._frame(f"CAST(month(date) AS INTEGER) AS month, {_AVG}", filters, "GROUP BY 1 ORDER BY 1")
+
+    def weekday_avg(self, **filters):
+        df = self._frame(f"CAST(isodow(date) AS INTEGER) AS weekday, {_AVG}", filters, "GROUP BY 1 ORDER BY 1")
+        df["weekday"] = df["weekday"].map(lambda day: WEEKDAYS[day - 1])
+        return df.set_index("weekday").reindex(WEEKDAYS).reset_index()
+
+    def yearly_avg(self, **filters):
+        return self._frame(f"CAST(year(date) AS INTEGER) AS year, {_AVG}", filters, "GROUP BY 1 ORDER BY 1")
+
+    def histogram(self, bins=30, **filters):
+        """PM2.5 distribution as `bins` equal-width buckets (midpoint, count, empty ones included) plus the mean."""
+        where, params = self._where(**filters)
+        df = self.engine.query(
+            f"""
+            WITH readings AS (SELECT pm25 FROM {self.table} {where}),
+            bounds AS (
+                SELECT min(pm25) AS lo, greatest(max(pm25), min(pm25) + 1e-9) AS hi, avg(pm25) AS mean FROM readings
+            ),
+            buckets AS (
+                SELECT least(CAST(floor((pm25 - lo) / (hi - lo) * {int(bins)}) AS INTEGER) + 1, {int(bins)}) AS bucket,
+                       count(*) AS n
+                FROM readings, bounds GROUP BY 1
+            )
+            SELECT lo + (bucket - 0.5) * (hi - lo) / {int(bins)} AS pm25, coalesce(n, 0) AS count, mean
+            FROM bounds CROSS JOIN range(1, {int(bins)} + 1) AS r(bucket) LEFT JOIN buckets USING (bucket)
+            WHERE lo IS NOT NULL
+            ORDER BY 1
+            """,
+            params,
+        )
+        mean = df["mean"].iloc[0] if len(df) else float("nan")
+        return df[["pm25", "count"]], mean
+
+    def sensor_map(self, how="mean", **filters):
+        """One row per sensor (mean position, mean or latest PM2.5) instead of one point per reading."""
+        where, params = self._where(**filters)
+        value = "arg_max(pm25, date) AS pm25" if how == "latest" else _AVG
+        return self.engine.query(
+            f"""
+            SELECT sensor_id, country, city, avg(latitude) AS latitude, avg(longitude) AS longitude,
+                   {value}, count(*) AS readings
+            FROM {self.table} {where} AND latitude IS NOT NULL AND longitude IS NOT NULL
+            GROUP BY sensor_id, country, city
+            """,
+            params,
+        )
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+GRAINS = ("daily", "monthly", "weekday", "yearly")
+MEASURES = ["pm25_sum", "pm25_count", "pm25_max"]
+
+
+def time_codes(dates):
+    """Integer time features from datetime64 values, via unit casts instead of .dt accessors.
+
+    `day` counts days since 1970-01-01, `weekday` is 0 = Monday, `month` is 1-12.
+    """
+    values = np.asarray(dates, dtype="datetime64[ns]")
+    day = values.astype("datetime64[D]").astype(np.int64)
+    months = values.astype("datetime64[M]").astype(np.int64)
+    return {
+        "year": (months // 12 + 1970).astype(np.int16),
+        "month": (months % 12 + 1).astype(np.int8),
+        "weekday": ((day + 3) % 7).astype(np.int8),  # 1970-01-01 was a Thursday
+        "day": day.astype(np.int32),
+    }
+
+
+def add_time_features(df, date_column="date"):
+    return df.assign(**time_codes(df[date_column]))
+
+
+def in_date_range(dates, start=None, end=None):
+    """Mask of `dates` within the inclusive day range `start`..`end`, the days `PM25Aggregates` filters on.
+
+    `end` covers its whole day (`< end + 1 day`), so readings after midnight on the last day are kept.
+    """
+    mask = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start).normalize()).to_numpy()
+    if end is not None:
+        mask &= (dates < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+    return mask
+
+
+def daily_cells(df):
+    """Sum/count/max of pm25 per (country, city, day), from one linear `np.bincount` pass over the rows."""
+    df = df.dropna(subset=["pm25", "city", "country"])
+    countries = pd.Categorical(df["country"])
+    cities = pd.Categorical(df["city"])
+    day = time_codes(df["date"])["day"].astype(np.int64)
+    pm25 = df["pm25"].to_numpy(dtype=np.float64)
+
+    # Dense cell key per (country, city, day); factorize keeps only the occupied cells
+    day_min = int(day.min()) if len(day) else 0
+    n_days = int(day.max()) - day_min + 1 if len(day) else 1
+    place = countries.codes.astype(np.int64) * len(cities.categories) + cities.codes
+    cell_ids, cells = pd.factorize(place * n_days + (day - day_min))
+    n_cells = len(cells)
+    pm25_sum = np.bincount(cell_ids, weights=pm25, minlength=n_cells)
+    pm25_count = np.bincount(cell_ids, minlength=n_cells)
+    pm25_max = np.full(n_cells, -np.inf)
+    np.maximum.at(pm25_max, cell_ids, pm25)
+
+    cell_place, cell_day = np.divmod(cells, n_days)
+    return pd.DataFrame({
+        "country": countries.categories[cell_place // len(cities.categories)],
+        "city": cities.categories[cell_place % len(cities.categories)],
+        "day": (cell_day + day_min).astype(np.int32),
+        "pm25_sum": pm25_sum,
+        "pm25_count": pm25_count,
+        "pm25_max": pm25_max,
+    })
+
+
+def combine_cells(parts):
+    """Merge `daily_cells` of separate chunks of rows into the cells of their union."""
+    return pd.concat(parts, ignore_index=True).groupby(["country", "city", "day"], sort=False).agg(
+        pm25_sum=("pm25_sum", "sum"), pm25_count=("pm25_count", "sum"), pm25_max=("pm25_max", "max")
+    ).reset_index()
+
+
+def rollup(daily):
+    """Daily cells plus their monthly, weekday and yearly rollups, as one long frame.
+
+    Each row has a `grain` and an integer `period` (day number, yyyymm,
+    weekday 0-6 or year); the rollups read the cells, never the readings.
+    """
+    codes = time_codes(daily["day"].to_numpy().astype("datetime64[D]"))
+    periods = {"daily": daily["day"], "monthly": codes["year"].astype(np.int32) * 100 + codes["month"],
+               "weekday": codes["weekday"], "yearly": codes["year"]}
+    frames = []
+    for grain, period in periods.items():
+        grouped = daily.assign(period=np.asarray(period, dtype=np.int32)).groupby(
+            ["country", "city", "period"], sort=False
+        ).agg(pm25_sum=("pm25_sum", "sum"), pm25_count=("pm25_count", "sum"), pm25_max=("pm25_max", "max"))
+        frames.append(grouped.reset_index().assign(grain=grain))
+    return pd.concat(frames, ignore_index=True)[["grain", "country", "city", "period"] + MEASURES]
+
+
+def temporal_aggregates(df):
+    """Sum/count/max of pm25 per (country, city) at daily, monthly, weekday and yearly grain."""
+    return rollup(daily_cells(df))
+
+
+class PM25Aggregates:
+    """Chart-ready reads over `temporal_aggregates` output, mirroring `PM25Queries`.
+
+    Filters are `country`/`city` ("All" or None for no filter) and an inclusive
+    `start`/`end` date range. Without a date range the stored monthly/weekday/
+    yearly cells answer directly; with one, the daily cells are re-bucketed.
+    `pm25` (the raw readings) is only needed for `histogram`.
+    """
+
+    def __init__(self, temporal, pm25=None):
+        self.cells = {grain: temporal[temporal["grain"] == grain] for grain in GRAINS}
+        self.pm25 = pm25
+        days = self.cells["daily"]["period"]
+        self.first_day, self.last_day = (int(days.min()), int(days.max())) if len(days) else (0, -1)
+
+    @staticmethod
+    def _day(value):
+        return None if value is None else int(time_codes([pd.Timestamp(value)])["day"][0])
+
+    def _daily(self, country=None, city=None, start=None, end=None):
+        cells = self.cells["daily"]
+        mask = np.ones(len(cells), dtype=bool)
+        if country not in (None, "All"):
+            mask &= (cells["country"] == country).to_numpy()
+        if city not in (None, "All"):
+            mask &= (cells["city"] == city).to_numpy()
+        if start is not None:
+            mask &= cells["period"].to_numpy() >= self._day(start)
+        if end is not None:
+            mask &= cells["period"].to_numpy() <= self._day(end)
+        return cells[mask]
+
+    def _cells(self, grain, country=None, city=None, start=None, end=None):
+        """Cells at `grain`, from the stored rollup when the date range covers every day."""
+        if (start is None or self._day(start) <= self.first_day) and (end is None or self._day(end) >= self.last_day):
+            start = end = None
+        if start is None and end is None and grain != "daily":
+            cells = self.cells[grain]
+            if country not in (None, "All"):
+                cells = cells[cells["country"] == country]
+            if city not in (None, "All"):
+                cells = cells[cells["city"] == city]
+            return cells
+        daily = self._daily(country, city, start, end)
+        codes = time_codes(daily["period"].to_numpy().astype("datetime64[D]"))
+        period = {"daily": daily["period"], "monthly": codes["year"].astype(np.int32) * 100 + codes["month"],
+                  "weekday": codes["weekday"], "yearly": codes["year"]}[grain]
+        return daily.assign(period=np.asarray(period, dtype=np.int32))
+
+    @staticmethod
+    def _mean_by(cells, column, name=None):
+        grouped = cells.groupby(column, sort=True)[["pm25_sum", "pm25_count"]].sum()
+        return (grouped["pm25_sum"] / grouped["pm25_count"]).rename("pm25").rename_axis(name or column).reset_index()
+
+    def kpis(self, **filters):
+        cells = self._daily(**filters)
+        count = cells["pm25_count"].sum()
+        return cells["pm25_sum"].sum() / count if count else np.nan, cells["pm25_max"].max(), cells["city"].nunique()
+
+    def daily_avg(self, **filters):
+        daily = self._mean_by(self._cells("daily", **filters), "period", "date")
+        daily["date"] = daily["date"].to_numpy().astype("datetime64[D]").astype("datetime64[ns]")
+        return daily
+
+    def top_cities(self, n=10, **filters):
+        return self._mean_by(self._cells("yearly", **filters), "city").nlargest(n, "pm25").reset_index(drop=True)
+
+    def country_avg(self, **filters):
+        return self._mean_by(self._cells("yearly", **filters), "country").sort_values("pm25", ascending=False)
+
+    def month_avg(self, **filters):
+        cells = self._cells("monthly", **filters)
+        return self._mean_by(cells.assign(month=cells["period"] % 100), "month")
+
+    def weekday_avg(self, **filters):
+        weekday = self._mean_by(self._cells("weekday", **filters), "period", "weekday")
+        weekday["weekday"] = [WEEKDAYS[day] for day in weekday["weekday"]]
+        return weekday.set_index("weekday").reindex(WEEKDAYS).reset_index()
+
+    def yearly_avg(self, **filters):
+        return self._mean_by(self._cells("yearly", **filters), "period", "year")
+
+    def histogram(self, bins=30):
+        """PM2.5 distribution as `bins` equal-width buckets (midpoint, count) plus the mean, like `PM25Queries`."""
+        counts, edges = np.histogram(self.pm25, bins=bins)
+        return pd.DataFrame({"pm25": (edges[:-1] + edges[1:]) / 2, "count": counts}), float(np.mean(self.pm25))
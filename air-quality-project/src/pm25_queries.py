@@ -0,0 +1,165 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.pg_views import PM25_VIEWS, views_version
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_AVG = "SUM(pm25_sum) / SUM(pm25_count) AS pm25"
+
+
+class PM25Queries:
+    """Aggregated PM2.5 reads backed by the materialized views in `etl_common.pg_views`.
+
+    `pool` is an `etl_common.pg_pool.ConnectionPool`.
+
+    Every method returns only the rows a chart plots. Filters are optional:
+    `country`/`city` ("All" or None for no filter) and an inclusive `start`/`end`
+    date range. Without a date range, the pre-bucketed monthly/weekday/yearly
+    views answer directly; with one, the daily view is re-aggregated in SQL.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def _frame(self, sql, params=()):
+        # Each read borrows a pooled connection, so concurrent sessions don't share a cursor
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            columns = [column.name for column in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=columns)
+
+    @staticmethod
+    def _where(country=None, city=None, start=None, end=None, date_column=None):
+        clauses, params = [], []
+        if country not in (None, "All"):
+            clauses.append("country = %s")
+            params.append(country)
+        if city not in (None, "All"):
+            clauses.append("city = %s")
+            params.append(city)
+        if date_column and start is not None:
+            clauses.append(f"{date_column} >= %s")
+            params.append(pd.Timestamp(start).date())
+        if date_column == "day" and end is not None:
+            clauses.append(f"{date_column} <= %s")
+            params.append(pd.Timestamp(end).date())
+        elif date_column and end is not None:
+            # A TIMESTAMP column (pm25_data.date): keep the readings after midnight on the end day too,
+            # the same [start, end + 1 day) range as pm25_features.in_date_range
+            clauses.append(f"{date_column} < %s")
+            params.append((pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).date())
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def version(self):
+        with self.pool.connection() as conn:
+            return views_version(conn, PM25_VIEWS)
+
+    def countries(self):
+        return self._frame("SELECT DISTINCT country FROM pm25_city_avg ORDER BY country")["country"].tolist()
+
+    def cities(self, country=None):
+        where, params = self._where(country)
+        return self._frame(f"SELECT DISTINCT city FROM pm25_city_avg {where} ORDER BY city", params)["city"].tolist()
+
+    def date_bounds(self, country=None, city=None):
+        where, params = self._where(country, city)
+        row = self._frame(f"SELECT min(day) AS start, max(day) AS end FROM pm25_daily {where}", params).iloc[0]
+        return pd.Timestamp(row["start"]), pd.Timestamp(row["end"])
+
+    def kpis(self, **filters):
+        where, params = self._where(**filters, date_column="day")
+        row = self._frame(
+            f"SELECT {_AVG}, MAX(pm25_max) AS pm25_max, COUNT(DISTINCT city) AS n_cities FROM pm25_daily {where}",
+            params,
+        ).iloc[0]
+        return row["pm25"], row["pm25_max"], int(row["n_cities"])
+
+    def daily_avg(self, **filters):
+        where, params = self._where(**filters, date_column="day")
+        df = self._frame(f"SELECT day AS date, {_AVG} FROM pm25_daily {where} GROUP BY day ORDER BY day", params)
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def top_cities(self, n=10, **filters):
+        if filters.get("start") is None and filters.get("end") is None:
+            where, params = self._where(filters.get("country"), filters.get("city"))
+            sql = f"SELECT city, pm25_avg AS pm25 FROM pm25_city_avg {where} ORDER BY pm25_avg DESC LIMIT %s"
+        else:
+            where, params = self._where(**filters, date_column="day")
+            sql = f"SELECT city, {_AVG} FROM pm25_daily {where} GROUP BY city ORDER BY pm25 DESC LIMIT %s"
+        return self._frame(sql, params + [n])
+
+    def country_avg(self, **filters):
+        if filters.get("start") is None and filters.get("end") is None:
+            where, params = self._where(filters.get("country"), filters.get("city"))
+            source = "pm25_city_avg"
+        else:
+            where, params = self._where(**filters, date_column="day")
+            source = "pm25_daily"
+        return self._frame(f"SELECT country, {_AVG} FROM {source} {where} GROUP BY country ORDER BY pm25 DESC", params)
+
+    def _bucketed(self, column, bucket_view, view_expr, daily_expr, **filters):
+        # Pre-bucketed view when no date range is set, else re-bucket the daily view
+        if filters.get("start") is None and filters.get("end") is None:
+            where, params = self._where(filters.get("country"), filters.get("city"))
+            source, expr = bucket_view, view_expr
+        else:
+            where, params = self._where(**filters, date_column="day")
+            source, expr = "pm25_daily", daily_expr
+        return self._frame(f"SELECT {expr} AS {column}, {_AVG} FROM {source} {where} GROUP BY 1 ORDER BY 1", params)
+
+    def month_avg(self, **filters):
+        # Month of year (1-12), pooled across years
+        return self._bucketed("month", "pm25_monthly", "EXTRACT(MONTH FROM month)::int",
+                              "EXTRACT(MONTH FROM day)::int", **filters)
+
+    def weekday_avg(self, **filters):
+        df = self._bucketed("weekday", "pm25_weekday", "weekday", "EXTRACT(ISODOW FROM day)::int", **filters)
+        df["weekday"] = df["weekday"].map(lambda day: WEEKDAYS[day - 1])
+        return df.set_index("weekday").reindex(WEEKDAYS).reset_index()
+
+    def yearly_avg(self, **filters):
+        return self._bucketed("year", "pm25_yearly", "year", "EXTRACT(YEAR FROM day)::int", **filters)
+
+    def histogram(self, bins=30, **filters):
+        """PM2.5 distribution as `bins` equal-width buckets (midpoint, count, empty ones included) plus the mean."""
+        where, params = self._where(**filters, date_column="date")
+        # The rows the views aggregate (pg_views._PM25_ROWS)
+        rows = "pm25 IS NOT NULL AND city IS NOT NULL AND country IS NOT NULL"
+        where = where + (" AND " if where else "WHERE ") + rows
+        df = self._frame(
+            f"""
+            WITH bounds AS (
+                SELECT min(pm25) AS lo, GREATEST(max(pm25), min(pm25) + 1e-9) AS hi, avg(pm25) AS mean
+                FROM pm25_data {where}
+            ),
+            buckets AS (
+                SELECT LEAST(width_bucket(pm25, lo, hi, %s), %s) AS bucket, count(*) AS n
+                FROM pm25_data, bounds {where} GROUP BY 1
+            )
+            SELECT lo + (bucket - 0.5) * (hi - lo) / %s AS pm25, COALESCE(n, 0) AS count, mean
+            FROM bounds CROSS JOIN generate_series(1, %s) AS bucket LEFT JOIN buckets USING (bucket)
+            WHERE lo IS NOT NULL
+            ORDER BY 1
+            """,
+            params + [bins, bins] + params + [bins, bins],
+        )
+        mean = df["mean"].iloc[0] if len(df) else float("nan")
+        return df[["pm25", "count"]], mean
+
+    def sensor_map(self, how="mean", **filters):
+        """One row per sensor (mean position, mean or latest PM2.5) instead of one point per reading."""
+        where, params = self._where(**filters, date_column="date")
+        where = where + (" AND " if where else "WHERE ") + "latitude IS NOT NULL AND longitude IS NOT NULL"
+        value = "(array_agg(pm25 ORDER BY date DESC))[1]" if how == "latest" else "avg(pm25)"
+        return self._frame(
+            f"""
+            SELECT sensor_id, country, city, avg(latitude) AS latitude, avg(longitude) AS longitude,
+                   {value} AS pm25, count(*) AS readings
+            FROM pm25_data {where} GROUP BY sensor_id, country, city
+            """,
+            params,
+        )
@@ -3,76 +3,242 @@ import requests
 from tqdm import tqdm
 import time
 import os
+import sys
+from pathlib import Path
+
+from geo_cache import GeoCache
+from openaq_client import TokenBucket
+from pm25_features import add_time_features, combine_cells, daily_cells, rollup
+from sensor_index import cluster_levels, combine_sensor_cells, sensor_cells, sensor_table
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # repo root, for etl_common
+from etl_common.instrumentation import network, print_summary, stage, timed
+from etl_common.parquet_store import DatasetWriter, write_dataset
+from etl_common.streaming import CHUNK_SIZE, CsvWriter, iter_csv
 
 # Load raw CSV (replace this path if needed)
 RAW_CSV_PATH = "data/raw/pm25_daily_full.csv"
 OUTPUT_CSV_PATH = "data/processed/pm25_geo_enriched.csv"
+OUTPUT_PARQUET_PATH = "data/processed/pm25_geo_enriched.parquet"
+TEMPORAL_CSV_PATH = "data/processed/pm25_temporal.csv"
+TEMPORAL_PARQUET_PATH = "data/processed/pm25_temporal.parquet"
+SENSORS_CSV_PATH = "data/processed/pm25_sensors.csv"
+SENSORS_PARQUET_PATH = "data/processed/pm25_sensors.parquet"
+CLUSTERS_CSV_PATH = "data/processed/pm25_sensor_clusters.csv"
+CLUSTERS_PARQUET_PATH = "data/processed/pm25_sensor_clusters.parquet"
 
-# Step 1: Load and clean raw data
-print("Loading and cleaning raw data...")
-df = pd.read_csv(RAW_CSV_PATH)
+# Only these 3 of the raw export's 33 columns are ever parsed
+RAW_COLUMNS = ["value", "sensor_id", "period.datetimeFrom.utc"]
+OUTPUT_COLUMNS = ["date", "pm25", "sensor_id", "latitude", "longitude", "city", "country"]
 
-# Drop rows with missing PM2.5 values or sensor_id
-df_clean = df[["value", "sensor_id", "period.datetimeFrom.utc"]].dropna()
-df_clean = df_clean.rename(columns={"value": "pm25", "period.datetimeFrom.utc": "date"})
+# Explicit storage types for the Parquet copy (partitioned by year)
+DTYPES = {
+    "date": "datetime64[ns]",
+    "pm25": "float64",
+    "sensor_id": "int64",
+    "latitude": "float64",
+    "longitude": "float64",
+    "city": "category",
+    "country": "category",
+    "year": "int64",
+    "month": "int8",
+    "weekday": "int8",
+    "day": "int32",
+}
+TEMPORAL_DTYPES = {
+    "grain": "category",
+    "country": "category",
+    "city": "category",
+    "period": "int32",
+    "pm25_sum": "float64",
+    "pm25_count": "int64",
+    "pm25_max": "float64",
+}
+SENSOR_DTYPES = {
+    "sensor_id": "int64",
+    "country": "category",
+    "city": "category",
+    "latitude": "float64",
+    "longitude": "float64",
+    "pm25": "float64",
+    "pm25_max": "float64",
+    "pm25_last": "float64",
+    "last_date": "datetime64[ns]",
+    "readings": "int64",
+}
+CLUSTER_DTYPES = {
+    "zoom": "int64",
+    "sensor_id": "int64",
+    "country": "category",
+    "city": "category",
+    "latitude": "float64",
+    "longitude": "float64",
+    "pm25": "float64",
+    "readings": "int64",
+    "sensors": "int64",
+}
 
-# Ensure correct types
-df_clean["date"] = pd.to_datetime(df_clean["date"])
-df_clean["sensor_id"] = df_clean["sensor_id"].astype(int)
 
-# Step 2: Fetch sensor coordinates
-print("Fetching sensor coordinates...")
-API_KEY = os.getenv("OPENAQ_API_KEY") 
-headers = {"x-api-key": API_KEY}
+@timed("clean")
+def read_clean(path=RAW_CSV_PATH, chunksize=CHUNK_SIZE):
+    """Yield the raw readings chunk by chunk, cleaned and typed (nothing for an empty export)."""
+    if os.path.getsize(path) == 0:
+        return
+    for chunk in iter_csv(path, chunksize, usecols=RAW_COLUMNS):
+        # Drop rows with missing PM2.5 values or sensor_id
+        chunk = chunk[RAW_COLUMNS].dropna()
+        chunk = chunk.rename(columns={"value": "pm25", "period.datetimeFrom.utc": "date"})
 
-unique_sensors = df_clean["sensor_id"].unique()
-sensor_coords = {}
+        # Ensure correct types
+        chunk["date"] = pd.to_datetime(chunk["date"], utc=True).dt.tz_convert(None)
+        chunk["sensor_id"] = chunk["sensor_id"].astype(int)
+        yield chunk
+
+
+@timed("coordinates")
+def fetch_coordinates(sensor_ids, cache):
+    # Cached on disk; only unknown/expired sensors hit the API
+    API_KEY = os.getenv("OPENAQ_API_KEY")
+    headers = {"x-api-key": API_KEY}
+    sensor_coords = {}
+
+    for sensor_id in tqdm(sensor_ids, desc="Coordinates"):
+        cached = cache.get_sensor(sensor_id)
+        if cached is not None:
+            sensor_coords[sensor_id] = cached
+            continue
+        url = f"https://api.openaq.org/v3/sensors/{sensor_id}"
+        try:
+            res = requests.get(url, headers=headers)
+            network(res)
+            if res.status_code == 200:
+                data = res.json().get("data", {})
+                coords = data.get("coordinates", {})
+                sensor_coords[sensor_id] = coords
+                cache.put_sensor(sensor_id, coords.get("latitude"), coords.get("longitude"))
+            else:
+                print(f"Sensor {sensor_id} failed: {res.status_code}")
+        except Exception as e:
+            network()
+            print(f"Error fetching sensor {sensor_id}: {e}")
+        time.sleep(0.2)  # to avoid rate-limiting
+    return sensor_coords
 
-for sensor_id in tqdm(unique_sensors, desc="Coordinates"):
-    url = f"https://api.openaq.org/v3/sensors/{sensor_id}"
-    try:
-        res = requests.get(url, headers=headers)
-        if res.status_code == 200:
-            data = res.json().get("data", {})
-            coords = data.get("coordinates", {})
-            sensor_coords[sensor_id] = coords
-        else:
-            print(f"Sensor {sensor_id} failed: {res.status_code}")
-    except Exception as e:
-        print(f"Error fetching sensor {sensor_id}: {e}")
-    time.sleep(0.2)  # to avoid rate-limiting
 
-df_clean["latitude"] = df_clean["sensor_id"].map(lambda x: sensor_coords.get(x, {}).get("latitude"))
-df_clean["longitude"] = df_clean["sensor_id"].map(lambda x: sensor_coords.get(x, {}).get("longitude"))
+# Reverse geocoding using Nominatim (max 1 request/sec per their usage policy)
+nominatim_bucket = TokenBucket(rate=1, capacity=1)
 
-# Step 3: Reverse geocoding using Nominatim
-def reverse_geocode(lat, lon):
+def reverse_geocode(lat, lon, cache):
     if pd.isna(lat) or pd.isna(lon):
         return None, None
+    cached = cache.get_place(lat, lon)
+    if cached is not None:
+        return cached
+    # Query the cell centre so every sensor in the cell gets the same answer
+    lat, lon = cache.cell_center(lat, lon)
+    nominatim_bucket.acquire()
     try:
         res = requests.get(
             f"https://nominatim.openstreetmap.org/reverse",
             params={"lat": lat, "lon": lon, "format": "json"},
             headers={"User-Agent": "air-quality-project"}
         )
+        network(res)
         if res.status_code == 200:
             data = res.json()
             city = data.get("address", {}).get("city") or data.get("address", {}).get("town") or data.get("address", {}).get("village")
             country = data.get("address", {}).get("country")
+            cache.put_place(lat, lon, city, country)
             return city, country
     except Exception as e:
+        network()
         print(f"Reverse geocode error: {e}")
     return None, None
 
-print("Performing reverse geocoding...")
-geo_data = df_clean[["latitude", "longitude"]].drop_duplicates()
-geo_data["city"], geo_data["country"] = zip(*geo_data.apply(lambda row: reverse_geocode(row["latitude"], row["longitude"]), axis=1))
 
-# Merge back enriched data
-df_enriched = df_clean.merge(geo_data, on=["latitude", "longitude"], how="left")
+def sensor_locations(sensor_ids, cache):
+    """One row per sensor: sensor_id, latitude, longitude, city, country."""
+    sensor_coords = fetch_coordinates(sensor_ids, cache)
+    sensors = pd.DataFrame({"sensor_id": sensor_ids})
+    sensors["latitude"] = sensors["sensor_id"].map(lambda x: sensor_coords.get(x, {}).get("latitude"))
+    sensors["longitude"] = sensors["sensor_id"].map(lambda x: sensor_coords.get(x, {}).get("longitude"))
+
+    print("Performing reverse geocoding...")
+    geo_data = sensors[["latitude", "longitude"]].drop_duplicates()
+    with stage("reverse_geocode", rows_in=len(geo_data)) as metrics:
+        geo_data["city"], geo_data["country"] = zip(*geo_data.apply(
+            lambda row: reverse_geocode(row["latitude"], row["longitude"], cache), axis=1
+        ))
+        metrics.add(rows_out=int(geo_data["city"].notna().sum()))
+    return sensors.merge(geo_data, on=["latitude", "longitude"], how="left")
+
+
+def write_enriched(sensors, raw_path=RAW_CSV_PATH, csv_path=OUTPUT_CSV_PATH, parquet_path=OUTPUT_PARQUET_PATH,
+                   temporal_csv_path=TEMPORAL_CSV_PATH, temporal_parquet_path=TEMPORAL_PARQUET_PATH,
+                   sensors_csv_path=SENSORS_CSV_PATH, sensors_parquet_path=SENSORS_PARQUET_PATH,
+                   clusters_csv_path=CLUSTERS_CSV_PATH, clusters_parquet_path=CLUSTERS_PARQUET_PATH,
+                   chunksize=CHUNK_SIZE):
+    """Enrich, type and write the readings chunk by chunk; only the daily and per-sensor cells are kept
+    across chunks."""
+    cells = per_sensor = None
+    with stage("write_enriched") as metrics, CsvWriter(csv_path, OUTPUT_COLUMNS) as csv_out, \
+            DatasetWriter(parquet_path, DTYPES) as parquet_out:
+        for chunk in read_clean(raw_path, chunksize):
+            metrics.add(rows_in=len(chunk))
+            enriched = chunk.merge(sensors, on="sensor_id", how="left")
+            # Integer-coded time features (year, month, weekday 0 = Monday, day number), derived once and stored
+            enriched = add_time_features(enriched)
+            csv_out.write(enriched)
+            parquet_out.write(enriched)
+            cells = daily_cells(enriched) if cells is None else combine_cells([cells, daily_cells(enriched)])
+            per_sensor = sensor_cells(enriched) if per_sensor is None else \
+                combine_sensor_cells([per_sensor, sensor_cells(enriched)])
+        metrics.add(rows_out=csv_out.rows)
+    if cells is None:
+        # No readings at all: roll up an empty frame so every output is still written, with its columns
+        empty = add_time_features(pd.DataFrame({column: pd.Series(dtype=DTYPES[column]) for column in OUTPUT_COLUMNS}))
+        cells, per_sensor = daily_cells(empty), sensor_cells(empty)
+
+    # Daily/monthly/weekday/yearly sums, counts and maxima per city, read by the dashboard and analyzer
+    with stage("temporal_rollup", rows_in=len(cells)) as metrics:
+        temporal = rollup(cells)
+        temporal.to_csv(temporal_csv_path, index=False)
+        write_dataset(temporal, temporal_parquet_path, TEMPORAL_DTYPES, partition_cols=["grain"])
+        metrics.add(rows_out=len(temporal))
+
+    # Located sensors (sorted by grid cell on load, see sensor_index.py) and their map clusters per zoom level
+    with stage("sensor_index", rows_in=len(per_sensor)) as metrics:
+        table = sensor_table(sensors, per_sensor)
+        clusters = cluster_levels(table)
+        table.to_csv(sensors_csv_path, index=False)
+        write_dataset(table, sensors_parquet_path, SENSOR_DTYPES, partition_cols=[])
+        clusters.to_csv(clusters_csv_path, index=False)
+        write_dataset(clusters, clusters_parquet_path, CLUSTER_DTYPES, partition_cols=["zoom"])
+        metrics.add(rows_out=len(clusters))
+    return csv_out.rows
+
+
+if __name__ == "__main__":
+    # Step 1: Scan the raw data once for the sensors it contains (3 columns, chunk by chunk)
+    print("Loading and cleaning raw data...")
+    sensor_ids = set()
+    with stage("scan_sensors") as metrics:
+        for chunk in read_clean():
+            sensor_ids.update(chunk["sensor_id"].unique().tolist())
+            metrics.add(rows_in=len(chunk))
+        metrics.add(rows_out=len(sensor_ids))
+
+    # Step 2-3: Fetch sensor coordinates and reverse geocode them (cached on disk)
+    print("Fetching sensor coordinates...")
+    cache = GeoCache()
+    sensors = sensor_locations(sorted(sensor_ids), cache)
+    print(cache.report())
+    cache.close()
 
-# Step 4: Save final enriched data
-print(f"Saving final enriched dataset to: {OUTPUT_CSV_PATH}")
-df_enriched[["date", "pm25", "sensor_id", "city", "country"]].to_csv(OUTPUT_CSV_PATH, index=False)
+    # Step 4: Stream the readings again, writing the enriched CSV, Parquet and temporal aggregates incrementally
+    print(f"Saving final enriched dataset to: {OUTPUT_CSV_PATH} and {OUTPUT_PARQUET_PATH}")
+    rows = write_enriched(sensors)
+    print(f"Saved {rows} rows and temporal aggregates to: {TEMPORAL_PARQUET_PATH}")
 
-print("Process completed.")
+    print("Process completed.")
+    print_summary()
@@ -0,0 +1,166 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from pm25_downsample import MARKER_PX, WORLD_PX, mercator
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 1.0      # side of the lookup grid's cells
+MAX_ZOOM = 12       # deepest zoom with stored clusters (a 12 px marker spans ~230 m there)
+SENSOR_COLUMNS = ["sensor_id", "country", "city", "latitude", "longitude", "pm25", "pm25_max", "pm25_last",
+                  "last_date", "readings"]
+CLUSTER_COLUMNS = ["zoom", "sensor_id", "country", "city", "latitude", "longitude", "pm25", "readings", "sensors"]
+
+
+def sensor_cells(df):
+    """Sum/count/max of pm25 per sensor, with its latest reading; combinable across chunks of rows."""
+    df = df.dropna(subset=["pm25"])
+    grouped = df.groupby("sensor_id", sort=False)
+    cells = grouped.agg(pm25_sum=("pm25", "sum"), readings=("pm25", "size"), pm25_max=("pm25", "max"),
+                        last_date=("date", "max"))
+    cells["pm25_last"] = df.loc[grouped["date"].idxmax(), ["sensor_id", "pm25"]].set_index("sensor_id")["pm25"]
+    return cells.reset_index()
+
+
+def combine_sensor_cells(parts):
+    """Merge `sensor_cells` of separate chunks of rows into the cells of their union."""
+    cells = pd.concat(parts, ignore_index=True)
+    latest = cells.sort_values("last_date", kind="stable").groupby("sensor_id").tail(1)
+    totals = cells.groupby("sensor_id", sort=False).agg(pm25_sum=("pm25_sum", "sum"), readings=("readings", "sum"),
+                                                        pm25_max=("pm25_max", "max"))
+    return totals.join(latest.set_index("sensor_id")[["last_date", "pm25_last"]]).reset_index()
+
+
+def sensor_table(sensors, cells):
+    """One row per located sensor (SENSOR_COLUMNS): its place from `sensors`, its readings from `cells`."""
+    table = sensors.dropna(subset=["latitude", "longitude"]).merge(cells, on="sensor_id", how="inner")
+    table["pm25"] = table["pm25_sum"] / table["readings"]
+    return table[SENSOR_COLUMNS].reset_index(drop=True)
+
+
+def cluster_levels(table, max_zoom=MAX_ZOOM, marker_px=MARKER_PX):
+    """The sensors merged into one marker per `marker_px` square of the map, at zoom 0..`max_zoom`.
+
+    Each cluster sits at its sensors' mean position with their readings-weighted
+    mean PM2.5, and is labelled with its worst sensor (CLUSTER_COLUMNS). Levels
+    stop at the first zoom where no two sensors share a marker.
+    """
+    mx, my = mercator(table["latitude"], table["longitude"])
+    weighted = table.assign(weight=table["pm25"] * table["readings"])
+    levels = []
+    for zoom in range(max_zoom + 1):
+        cells = WORLD_PX * 2 ** zoom // marker_px
+        key = np.floor(mx * cells).astype(np.int64) * (cells + 1) + np.floor(my * cells).astype(np.int64)
+        by_cell = weighted.assign(cell=key)
+        worst = by_cell.loc[by_cell.groupby("cell")["pm25"].idxmax(), ["cell", "sensor_id", "country", "city"]]
+        merged = by_cell.groupby("cell").agg(latitude=("latitude", "mean"), longitude=("longitude", "mean"),
+                                             weight=("weight", "sum"), readings=("readings", "sum"),
+                                             sensors=("sensor_id", "size")).reset_index()
+        merged["pm25"] = merged["weight"] / merged["readings"]
+        levels.append(merged.merge(worst, on="cell").assign(zoom=zoom))
+        if len(merged) == len(table):  # every sensor is its own marker from here on
+            break
+    return pd.concat(levels, ignore_index=True)[CLUSTER_COLUMNS]
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def viewport(lat, lon, zoom, width_px, height_px):
+    """(south, west, north, east) a Mapbox map of this size shows around (lat, lon) at `zoom`."""
+    world = WORLD_PX * 2 ** zoom
+    _, y = mercator(lat, lon)
+    top, bottom = float(y) - height_px / 2 / world, float(y) + height_px / 2 / world
+
+    def latitude(y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * min(max(y, 0.0), 1.0)))))
+
+    half_width = width_px / 2 / world * 360
+    if half_width >= 180:
+        return latitude(bottom), -180.0, latitude(top), 180.0
+    west, east = (lon - half_width + 180) % 360 - 180, (lon + half_width + 180) % 360 - 180
+    return latitude(bottom), west, latitude(top), east
+
+
+def fit_zoom(radius_km, height_px, max_zoom=MAX_ZOOM):
+    """Deepest zoom whose map height still spans a circle of `radius_km` (at the equator)."""
+    km_per_px = 2 * math.pi * EARTH_RADIUS_KM / WORLD_PX
+    return int(min(max(math.log2(km_per_px * height_px / (2 * radius_km)), 0), max_zoom))
+
+
+class SensorIndex:
+    """Grid index over sensor locations: bounding-box and radius lookups plus pre-clustered map markers.
+
+    Sensors (`sensor_table` rows) are kept sorted by the `CELL_DEG` grid cell
+    they fall in, so a bounding box is one binary search per grid row followed by
+    an exact check of the candidates; a radius query is the box around the circle
+    filtered by haversine distance. `clusters` (`cluster_levels` output) answers
+    `clusters_in` per zoom level. Everything is numpy over arrays built once.
+    """
+
+    def __init__(self, table, clusters=None, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self.cols = int(math.ceil(360 / cell_deg)) + 1
+        rows, cols = self._cell(table["latitude"].to_numpy(), table["longitude"].to_numpy())
+        order = np.argsort(rows * self.cols + cols, kind="stable")
+        self.table = table.iloc[order].reset_index(drop=True)
+        self.keys = (rows * self.cols + cols)[order]
+        self.lat = self.table["latitude"].to_numpy(dtype=np.float64)
+        self.lon = self.table["longitude"].to_numpy(dtype=np.float64)
+        self.clusters = {}
+        if clusters is not None:
+            for zoom, level in clusters.groupby("zoom", sort=True):
+                level = level.reset_index(drop=True)
+                self.clusters[int(zoom)] = (level, level["latitude"].to_numpy(), level["longitude"].to_numpy())
+
+    def __len__(self):
+        return len(self.table)
+
+    def _cell(self, lat, lon):
+        rows = np.floor((np.clip(lat, -90, 90) + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.clip(lon, -180, 180) + 180) / self.cell_deg).astype(np.int64)
+        return rows, cols
+
+    def _box(self, south, west, north, east):
+        if west > east:  # across the antimeridian
+            return np.concatenate([self._box(south, west, north, 180.0), self._box(south, -180.0, north, east)])
+        (row_lo, row_hi), (col_lo, col_hi) = self._cell(np.array([south, north]), np.array([west, east]))
+        row_keys = np.arange(row_lo, row_hi + 1) * self.cols
+        starts = np.searchsorted(self.keys, row_keys + col_lo, side="left")
+        ends = np.searchsorted(self.keys, row_keys + col_hi, side="right")
+        candidates = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends) if e > s] or [np.empty(0, int)])
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        return candidates[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)]
+
+    def within(self, south, west, north, east):
+        """Sensors inside the box (west > east wraps across the antimeridian)."""
+        return self.table.iloc[self._box(south, west, north, east)]
+
+    def near(self, lat, lon, radius_km, limit=None):
+        """Sensors within `radius_km` of (lat, lon), nearest first, with their `distance_km`."""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        if south <= -90 or north >= 90:
+            west, east = -180.0, 180.0
+        else:
+            # Widest longitude span of the circle, at its pole-most latitude
+            dlon = math.degrees(radius_km / EARTH_RADIUS_KM / math.cos(math.radians(max(abs(south), abs(north)))))
+            west, east = ((-180.0, 180.0) if dlon >= 180 else
+                          ((lon - dlon + 180) % 360 - 180, (lon + dlon + 180) % 360 - 180))
+        candidates = self._box(south, west, north, east)
+        distance = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        inside = distance <= radius_km
+        order = np.argsort(distance[inside], kind="stable")[:limit]
+        return self.table.iloc[candidates[inside][order]].assign(distance_km=distance[inside][order])
+
+    def clusters_in(self, zoom, south, west, north, east):
+        """Stored markers of zoom level `zoom` whose position is in the box; deeper zooms get the deepest level."""
+        if not self.clusters:  # no located sensors
+            return pd.DataFrame(columns=CLUSTER_COLUMNS)
+        level, lat, lon = self.clusters[min(max(int(zoom), 0), max(self.clusters))]
+        in_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+        return level[(lat >= south) & (lat <= north) & in_lon]
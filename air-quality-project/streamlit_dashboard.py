@@ -1,92 +1,297 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from pathlib import Path
 
-# Load data
+# Data (Parquet when processed, else the CSV it mirrors) is found from this file, not the working directory
 BASE = Path(__file__).resolve().parent
-df = pd.read_csv(BASE / "data" / "processed" / "pm25_geo_enriched.csv")
-df["date"] = pd.to_datetime(df["date"])
-df = df.dropna(subset=["pm25", "city", "country"])
-
-# Configure page
-st.set_page_config(page_title="PM2.5 Dashboard", layout="wide")
-st.title("🌍 Air Quality (PM2.5) Interactive Dashboard")
-
-# Sidebar filters
-st.sidebar.header("🔍 Filter Data")
-country = st.sidebar.selectbox("Select Country", ["All"] + sorted(df["country"].dropna().unique()))
-if country != "All":
-    df = df[df["country"] == country]
-
-city = st.sidebar.selectbox("Select City", ["All"] + sorted(df["city"].dropna().unique()))
-if city != "All":
-    df = df[df["city"] == city]
-
-# Date range filter
-min_date, max_date = df["date"].min(), df["date"].max()
-start_date, end_date = st.sidebar.date_input("Select Date Range", [min_date, max_date])
-df = df[(df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))]
-
-# Download button
-csv = df.to_csv(index=False).encode("utf-8")
-st.sidebar.download_button("📥 Download Filtered CSV", data=csv, file_name="filtered_pm25_data.csv", mime="text/csv")
-
-# KPIs
-st.markdown("### 📊 Key Metrics")
-col1, col2, col3 = st.columns(3)
-col1.metric("Avg PM2.5", f"{df['pm25'].mean():.2f} µg/m³")
-col2.metric("Max PM2.5", f"{df['pm25'].max():.2f} µg/m³")
-col3.metric("Unique Cities", df["city"].nunique())
-
-# 1. PM2.5 trend over time
-st.subheader("📈 Daily PM2.5 Trend")
-daily_avg = df.groupby("date")["pm25"].mean().reset_index()
-fig_trend = px.line(daily_avg, x="date", y="pm25", labels={"pm25": "PM2.5 (µg/m³)"})
-st.plotly_chart(fig_trend, use_container_width=True)
-
-# 2. Top 10 cities by average PM2.5
-st.subheader("🏙️ Top 10 Cities by Avg PM2.5")
-top_cities = df.groupby("city")["pm25"].mean().sort_values(ascending=False).head(10).reset_index()
-fig_top = px.bar(top_cities, x="pm25", y="city", orientation="h", labels={"pm25": "Avg PM2.5", "city": "City"})
-st.plotly_chart(fig_top, use_container_width=True)
-
-# 3. Geographic distribution
-st.subheader("🗺️ Sensor Locations by PM2.5")
-df["pm25_clipped"] = df["pm25"].clip(lower=1, upper=300)
-map_df = df.dropna(subset=["latitude", "longitude"])
-fig_map = px.scatter_mapbox(
-    map_df,
-    lat="latitude",
-    lon="longitude",
-    color="pm25",
-    size="pm25_clipped",
-    hover_name="city",
-    hover_data=["country", "pm25"],
-    color_continuous_scale="Reds",
-    size_max=15,
-    zoom=1,
-    height=500,
-)
-fig_map.update_layout(mapbox_style="open-street-map", margin={"r": 0, "t": 40, "l": 0, "b": 0})
-st.plotly_chart(fig_map, use_container_width=True)
-
-# 4. Monthly & weekday patterns
-st.subheader("📅 PM2.5 Patterns by Time")
-col1, col2 = st.columns(2)
-
-with col1:
-    df["month"] = df["date"].dt.month
-    month_avg = df.groupby("month")["pm25"].mean().reset_index()
-    fig_month = px.line(month_avg, x="month", y="pm25", markers=True, title="Monthly Avg PM2.5")
-    st.plotly_chart(fig_month, use_container_width=True)
-
-with col2:
-    df["weekday"] = df["date"].dt.day_name()
-    weekday_avg = df.groupby("weekday")["pm25"].mean().reindex([
-        "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"
-    ]).reset_index()
-    fig_week = px.bar(weekday_avg, x="weekday", y="pm25", title="Weekday Avg PM2.5")
-    st.plotly_chart(fig_week, use_container_width=True)
-
-st.success("All visualizations rendered successfully.")
+sys.path.append(str(BASE.parent))  # repo root, for etl_common
+sys.path.append(str(BASE / "src"))
+
+# "files" reads the processed dataset into memory; "postgres" pulls only aggregated rows from the
+# materialized views refreshed by the loaders (see src/pm25_queries.py); "duckdb" runs the same reads
+# as SQL over the processed Parquet/CSV in an embedded DuckDB (see src/pm25_duckdb.py)
+BACKEND = os.getenv("PM25_BACKEND", "files")
+PARQUET_PATH = BASE / "data" / "processed" / "pm25_geo_enriched.parquet"
+CSV_PATH = BASE / "data" / "processed" / "pm25_geo_enriched.csv"
+TEMPORAL_PARQUET_PATH = BASE / "data" / "processed" / "pm25_temporal.parquet"
+TEMPORAL_CSV_PATH = BASE / "data" / "processed" / "pm25_temporal.csv"
+SENSORS_PARQUET_PATH = BASE / "data" / "processed" / "pm25_sensors.parquet"
+SENSORS_CSV_PATH = BASE / "data" / "processed" / "pm25_sensors.csv"
+CLUSTERS_PARQUET_PATH = BASE / "data" / "processed" / "pm25_sensor_clusters.parquet"
+CLUSTERS_CSV_PATH = BASE / "data" / "processed" / "pm25_sensor_clusters.csv"
+MAP_HEIGHT = 500
+PAGE_CONFIG = {"page_title": "PM2.5 Dashboard", "layout": "wide"}
+
+def load_pm25():
+    from etl_common.dtypes import optimize_dtypes
+    from etl_common.parquet_store import read_processed
+
+    df = read_processed(
+        PARQUET_PATH, CSV_PATH,
+        columns=["date", "pm25", "sensor_id", "latitude", "longitude", "city", "country"],
+        parse_dates=["date"],
+    )
+    df = df.dropna(subset=["pm25", "city", "country"])
+    # float32 keeps coordinates to ~1 m; pm25 stays float64
+    return optimize_dtypes(df, name="pm25_geo_enriched", date_columns=["date"],
+                           float32_columns=["latitude", "longitude"])
+
+def load_temporal():
+    # Precomputed by src/process_pm25.py; derived here only when the processed files predate it
+    from etl_common.data_cache import load_frame
+    from etl_common.parquet_store import read_processed
+    from pm25_features import temporal_aggregates
+
+    if TEMPORAL_PARQUET_PATH.exists() or TEMPORAL_CSV_PATH.exists():
+        return read_processed(TEMPORAL_PARQUET_PATH, TEMPORAL_CSV_PATH)
+    return temporal_aggregates(load_frame("pm25_geo_enriched", load_pm25, PARQUET_PATH, CSV_PATH))
+
+# Dashboard reads share the process-wide pool; a short timeout keeps a slow query from hanging a rerun
+PG_READ_TIMEOUT_MS = int(os.getenv("PM25_PG_READ_TIMEOUT_MS", "15000"))
+
+@st.cache_resource(show_spinner=False)
+def pg_queries():
+    from etl_common.pg_pool import get_pool
+    from pm25_queries import PM25Queries
+
+    return PM25Queries(get_pool("airqualitydb", statement_timeout_ms=PG_READ_TIMEOUT_MS))
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def duckdb_queries(signature):
+    from etl_common.duckdb_engine import DuckDBEngine
+    from pm25_duckdb import PM25DuckDB
+
+    return PM25DuckDB(DuckDBEngine().register("pm25_geo_enriched", PARQUET_PATH, CSV_PATH))
+
+@st.cache_resource(show_spinner=False)
+def file_queries(signature):
+    from etl_common.data_cache import load_frame
+    from pm25_features import PM25Aggregates
+
+    return PM25Aggregates(load_frame("pm25_temporal", load_temporal, TEMPORAL_PARQUET_PATH, TEMPORAL_CSV_PATH,
+                                     PARQUET_PATH, CSV_PATH))
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def sensor_index(signature):
+    # Built by src/process_pm25.py; derived from the readings only when the processed files predate it
+    from etl_common.data_cache import load_frame
+    from etl_common.parquet_store import read_processed
+    from sensor_index import SensorIndex, cluster_levels, sensor_cells, sensor_table
+
+    if SENSORS_PARQUET_PATH.exists() or SENSORS_CSV_PATH.exists():
+        return SensorIndex(read_processed(SENSORS_PARQUET_PATH, SENSORS_CSV_PATH, parse_dates=["last_date"]),
+                           read_processed(CLUSTERS_PARQUET_PATH, CLUSTERS_CSV_PATH))
+    rows = load_frame("pm25_geo_enriched", load_pm25, PARQUET_PATH, CSV_PATH)
+    places = rows[["sensor_id", "latitude", "longitude", "city", "country"]].drop_duplicates("sensor_id")
+    table = sensor_table(places, sensor_cells(rows))
+    return SensorIndex(table, cluster_levels(table))
+
+def load_queries():
+    """(sql, rows, queries, dataset): the SQL backend or None, the readings frame on the files backend or None,
+    the object answering the charts and the dataset key their cached results are stored under."""
+    from etl_common.data_cache import file_signature, load_frame
+
+    if BACKEND == "postgres":
+        sql = pg_queries()
+        return sql, None, sql, ("pm25_views", sql.version())
+    if BACKEND == "duckdb":
+        sql = duckdb_queries(file_signature(PARQUET_PATH, CSV_PATH))
+        return sql, None, sql, ("pm25_duckdb", file_signature(PARQUET_PATH, CSV_PATH))
+    # Parsed once per server process and shared (read-only) across sessions; the charts and KPIs
+    # come from the stored temporal aggregates, the rows only feed the map and the download
+    df = load_frame("pm25_geo_enriched", load_pm25, PARQUET_PATH, CSV_PATH)
+    dataset = ("pm25_geo_enriched", file_signature(PARQUET_PATH, CSV_PATH, TEMPORAL_PARQUET_PATH, TEMPORAL_CSV_PATH))
+    return None, df, file_queries(dataset[1]), dataset
+
+def load_sensor_index():
+    from etl_common.data_cache import file_signature
+
+    return sensor_index(file_signature(SENSORS_PARQUET_PATH, SENSORS_CSV_PATH, CLUSTERS_PARQUET_PATH,
+                                       CLUSTERS_CSV_PATH, PARQUET_PATH, CSV_PATH))
+
+def warm():
+    """Load the data render() reads into the process-wide caches (see etl_common/dashboards.py)."""
+    load_queries()
+    load_sensor_index()
+
+def render():
+    """Draw the dashboard into the current page (the caller sets the page config)."""
+    st.title("🌍 Air Quality (PM2.5) Interactive Dashboard")
+    with st.spinner("Loading data..."):
+        # Deferred until the title is on screen; already loaded after the first render or the warm-up
+        import pandas as pd
+        import plotly.express as px
+        from etl_common.agg_cache import AGG_CACHE, cached
+        from pm25_downsample import (METHODS, VIEWPORT_PX, downsample, map_budget, point_budget, sensor_points,
+                                     thin_points)
+        from pm25_features import in_date_range
+        from sensor_index import MAX_ZOOM, fit_zoom, viewport
+
+        sql, df, queries, dataset = load_queries()
+        index = load_sensor_index()
+
+    # Sidebar filters
+    st.sidebar.header("🔍 Filter Data")
+    if sql:
+        country = st.sidebar.selectbox("Select Country", ["All"] + sql.countries())
+        city = st.sidebar.selectbox("Select City", ["All"] + sql.cities(country))
+        min_date, max_date = sql.date_bounds(country, city)
+        start_date, end_date = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+    else:
+        country = st.sidebar.selectbox("Select Country", ["All"] + sorted(df["country"].dropna().unique()))
+        if country != "All":
+            df = df[df["country"] == country]
+
+        city = st.sidebar.selectbox("Select City", ["All"] + sorted(df["city"].dropna().unique()))
+        if city != "All":
+            df = df[df["city"] == city]
+
+        # Date range filter
+        min_date, max_date = df["date"].min(), df["date"].max()
+        start_date, end_date = st.sidebar.date_input("Select Date Range", [min_date, max_date])
+        df = df[in_date_range(df["date"], start_date, end_date)]
+    filters = {"country": country, "city": city, "start": start_date, "end": end_date}
+
+    # Charts get at most about one point per pixel of their width (PM25_VIEWPORT_PX, PM25_POINTS_PER_PX)
+    st.sidebar.header("🗜️ Chart Detail")
+    trend_method = st.sidebar.selectbox("Trend downsampling", METHODS, format_func={
+        "lttb": "LTTB (keeps shape)", "minmax": "Min/max per bucket (keeps spikes)", "none": "Off (every day)"}.get)
+    map_value = st.sidebar.radio("Map value per sensor", ["mean", "latest"], horizontal=True)
+    map_window = st.sidebar.number_input("Map window (last N days, 0 = whole range)", min_value=0, value=0, step=30)
+    map_start = max(pd.Timestamp(start_date), pd.Timestamp(end_date) - pd.Timedelta(days=map_window - 1)) \
+        if map_window else pd.Timestamp(start_date)
+
+    # The map draws only the sensors in view: the whole world, or around a location ("sensors near me")
+    st.sidebar.header("📍 Map Area")
+    near_me = st.sidebar.checkbox("Sensors near a location")
+    if near_me:
+        here_lat = st.sidebar.number_input("Latitude", min_value=-90.0, max_value=90.0, value=28.61)
+        here_lon = st.sidebar.number_input("Longitude", min_value=-180.0, max_value=180.0, value=77.21)
+        radius_km = st.sidebar.slider("Radius (km)", min_value=5, max_value=2000, value=100, step=5)
+        map_center, map_zoom = (here_lat, here_lon), fit_zoom(radius_km, MAP_HEIGHT)
+    else:
+        map_zoom = st.sidebar.slider("Map zoom", min_value=0, max_value=MAX_ZOOM, value=1)
+        in_place = index.table
+        if country != "All":
+            in_place = in_place[in_place["country"] == country]
+        if city != "All":
+            in_place = in_place[in_place["city"] == city]
+        map_center = (float(in_place["latitude"].mean()), float(in_place["longitude"].mean())) \
+            if len(in_place) else (20.0, 0.0)
+    if near_me or country != "All" or city != "All":
+        # One screen of margin on every side, so markers are already there after a small pan
+        map_box = viewport(*map_center, map_zoom, 3 * VIEWPORT_PX, 3 * MAP_HEIGHT)
+    else:
+        # No location chosen: panning does not rerun the script, so every sensor must be on the map
+        map_box = (-90.0, -180.0, 90.0, 180.0)
+
+    # Aggregates are memoized per (dataset version, chart, filter state) and shared across sessions
+    agg = cached(dataset, filters)
+
+    # Download button (row-level on the files backend; the SQL backends never pull raw rows)
+    if sql:
+        csv = agg("daily_avg", lambda: sql.daily_avg(**filters)).to_csv(index=False).encode("utf-8")
+        st.sidebar.download_button("📥 Download Daily Averages CSV", data=csv, file_name="filtered_pm25_daily.csv",
+                                   mime="text/csv")
+    else:
+        csv = df.to_csv(index=False).encode("utf-8")
+        st.sidebar.download_button("📥 Download Filtered CSV", data=csv, file_name="filtered_pm25_data.csv",
+                                   mime="text/csv")
+
+    # KPIs
+    st.markdown("### 📊 Key Metrics")
+    col1, col2, col3 = st.columns(3)
+    avg_pm25, max_pm25, n_cities = agg("kpis", lambda: queries.kpis(**filters))
+    col1.metric("Avg PM2.5", f"{avg_pm25:.2f} µg/m³")
+    col2.metric("Max PM2.5", f"{max_pm25:.2f} µg/m³")
+    col3.metric("Unique Cities", n_cities)
+
+    # 1. PM2.5 trend over time
+    st.subheader("📈 Daily PM2.5 Trend")
+    daily_avg = agg("daily_avg", lambda: queries.daily_avg(**filters))
+    budget = point_budget()
+    trend = agg(f"daily_trend/{trend_method}/{budget}",
+                lambda: downsample(daily_avg, "date", "pm25", budget, trend_method))
+    fig_trend = px.line(trend, x="date", y="pm25", labels={"pm25": "PM2.5 (µg/m³)"})
+    if len(trend) < len(daily_avg):
+        st.caption(f"{len(trend):,} of {len(daily_avg):,} days plotted ({trend_method}).")
+    st.plotly_chart(fig_trend, use_container_width=True)
+
+    # 2. Top 10 cities by average PM2.5
+    st.subheader("🏙️ Top 10 Cities by Avg PM2.5")
+    top_cities = agg("top_cities", lambda: queries.top_cities(10, **filters))
+    fig_top = px.bar(top_cities, x="pm25", y="city", orientation="h", labels={"pm25": "Avg PM2.5", "city": "City"})
+    st.plotly_chart(fig_top, use_container_width=True)
+
+    # 3. Geographic distribution
+    st.subheader("🗺️ Sensor Locations by PM2.5")
+    # One point per sensor (never one per reading), merged where markers would overlap at the map's zoom.
+    # Unfiltered, the clusters stored per zoom level answer directly; otherwise the filtered per-sensor values
+    # are limited to the sensors the index finds in view before merging.
+    map_filters = {**filters, "start": map_start}
+    map_budget_points = map_budget(height_px=MAP_HEIGHT)
+    unfiltered = country == "All" and city == "All" and map_value == "mean" and not map_window and \
+        pd.Timestamp(start_date) <= pd.Timestamp(min_date).normalize() and \
+        pd.Timestamp(end_date) >= pd.Timestamp(max_date).normalize()
+
+    def sensor_map():
+        if sql:
+            return sql.sensor_map(how=map_value, **map_filters)
+        return sensor_points(df[df["date"] >= map_start], how=map_value)
+
+    if unfiltered:
+        map_df = index.clusters_in(map_zoom, *map_box)
+    else:
+        points = cached(dataset, {**map_filters, "how": map_value})("sensor_map", sensor_map)
+        in_view = points[points["sensor_id"].isin(index.within(*map_box)["sensor_id"])]
+        map_df = thin_points(in_view, map_budget_points, zoom=map_zoom)
+    map_df = map_df.assign(pm25_clipped=lambda d: d["pm25"].clip(lower=1, upper=300))
+    fig_map = px.scatter_mapbox(
+        map_df,
+        lat="latitude",
+        lon="longitude",
+        color="pm25",
+        size="pm25_clipped",
+        hover_name="city",
+        hover_data=["country", "pm25", "readings", "sensors"],
+        color_continuous_scale="Reds",
+        size_max=15,
+        zoom=map_zoom,
+        center={"lat": map_center[0], "lon": map_center[1]},
+        height=MAP_HEIGHT,
+    )
+    fig_map.update_layout(mapbox_style="open-street-map", margin={"r": 0, "t": 40, "l": 0, "b": 0})
+    st.plotly_chart(fig_map, use_container_width=True)
+    st.caption(f"{len(map_df):,} markers for {int(map_df['sensors'].sum()):,} sensors in view (zoom {map_zoom}).")
+
+    if near_me:
+        nearby = index.near(here_lat, here_lon, radius_km, limit=25)
+        st.markdown(f"**{len(nearby)} nearest sensors within {radius_km} km** (all-time mean and latest PM2.5)")
+        st.dataframe(nearby[["sensor_id", "city", "country", "distance_km", "pm25", "pm25_last", "last_date"]]
+                     .round({"distance_km": 1, "pm25": 1, "pm25_last": 1}), hide_index=True, use_container_width=True)
+
+    # 4. Monthly & weekday patterns
+    st.subheader("📅 PM2.5 Patterns by Time")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        month_avg = agg("month_avg", lambda: queries.month_avg(**filters))
+        fig_month = px.line(month_avg, x="month", y="pm25", markers=True, title="Monthly Avg PM2.5")
+        st.plotly_chart(fig_month, use_container_width=True)
+
+    with col2:
+        weekday_avg = agg("weekday_avg", lambda: queries.weekday_avg(**filters))
+        fig_week = px.bar(weekday_avg, x="weekday", y="pm25", title="Weekday Avg PM2.5")
+        st.plotly_chart(fig_week, use_container_width=True)
+
+    cache_stats = AGG_CACHE.stats()
+    st.sidebar.caption(f"Aggregation cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                       f"{cache_stats['entries']} entries, {cache_stats['mb']} MB")
+
+    st.success("All visualizations rendered successfully.")
+
+
+if __name__ == "__main__":
+    st.set_page_config(**PAGE_CONFIG)
+    render()
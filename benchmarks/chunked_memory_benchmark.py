@@ -0,0 +1,122 @@
+"""Peak RSS of the processing scripts, chunked vs whole-file, as the raw input grows.
+
+Usage:
+    python benchmarks/chunked_memory_benchmark.py [scale ...]
+
+Each raw file is replicated `scale` times (default 1 10 100) into a temporary
+directory, with sensor ids / indicator names offset per copy so the copies are
+distinct rows that land in the same cities / cube cells (the outputs that are
+held in memory grow with distinct keys, not with rows). Every (dataset, scale, chunk size) runs in a fresh subprocess,
+so `peak MB` is that process's own max RSS (Python heap and Arrow buffers
+alike); `base MB` is the RSS right after imports. The pm25 run covers the
+streaming enrich/write stage of process_pm25.py with the committed sensor
+locations, so no network is involved. The unemployment run skips the cube
+verification, which re-reads the whole output by design.
+"""
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+PM25_DIR = ROOT / "air-quality-project"
+UNEMPLOYMENT_DIR = ROOT / "Global-Unemployment"
+PM25_RAW = PM25_DIR / "data" / "raw" / "pm25_daily_full.csv"
+PM25_ENRICHED = PM25_DIR / "data" / "processed" / "pm25_geo_enriched.csv"
+UNEMPLOYMENT_RAW = UNEMPLOYMENT_DIR / "data" / "raw" / "global_unemployment_data.csv"
+
+CHUNK_SIZES = {"chunked": 50_000, "whole": 0}
+SENSOR_OFFSET = 10**9
+
+
+def replicate(src, dst, scale, key_column, offset):
+    """Copy `src` to `dst` `scale` times over, shifting `key_column` per copy; streams, never loads the file."""
+    import pandas as pd
+
+    with open(dst, "w", newline="", encoding="utf-8") as out:
+        for copy in range(scale):
+            for chunk in pd.read_csv(src, chunksize=100_000, dtype={key_column: str}):
+                chunk[key_column] = chunk[key_column].map(lambda v: offset(v, copy))
+                chunk.to_csv(out, index=False, header=out.tell() == 0)
+
+
+def child(dataset, raw_path, out_dir, chunksize, scale):
+    """Runs in the subprocess: one processing run, reporting (rows, seconds, base MB, peak MB) as JSON."""
+    sys.path.append(str(ROOT))
+    import pandas as pd
+
+    out_dir = Path(out_dir)
+    if dataset == "pm25":
+        sys.path.append(str(PM25_DIR / "src"))
+        import process_pm25
+
+        # Every copy's sensors sit where the original sensor does
+        sensors = pd.read_csv(PM25_ENRICHED).groupby("sensor_id", as_index=False).first()
+        sensors = pd.concat([sensors.assign(sensor_id=sensors["sensor_id"] + copy * SENSOR_OFFSET)
+                             for copy in range(scale)], ignore_index=True)
+        sensors = sensors[["sensor_id", "latitude", "longitude", "city", "country"]]
+        base_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        started = time.perf_counter()
+        rows = process_pm25.write_enriched(
+            sensors, raw_path=raw_path, csv_path=out_dir / "enriched.csv", parquet_path=out_dir / "enriched.parquet",
+            temporal_csv_path=out_dir / "temporal.csv", temporal_parquet_path=out_dir / "temporal.parquet",
+            chunksize=chunksize,
+        )
+    else:
+        sys.path.append(str(UNEMPLOYMENT_DIR / "src"))
+        import process_unemployment
+
+        base_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        started = time.perf_counter()
+        rows, _, _, _ = process_unemployment.process(
+            raw_path=raw_path, cleaned_path=str(out_dir / "cleaned.csv"), parquet_path=out_dir / "cleaned.parquet",
+            cube_path=out_dir / "cube.csv", chunksize=chunksize, verify=False,
+        )
+    print(json.dumps({"rows": rows, "s": time.perf_counter() - started, "base_mb": base_mb,
+                      "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run(scales=(1, 10, 100)):
+    datasets = {
+        "pm25": (PM25_RAW, "sensor_id", lambda v, copy: str(int(v) + copy * SENSOR_OFFSET) if v == v else v),
+        "unemployment": (UNEMPLOYMENT_RAW, "indicator_name", lambda v, copy: v if copy == 0 else f"{v} #{copy}"),
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (src, key_column, offset) in datasets.items():
+            for scale in scales:
+                raw_path = Path(tmp) / f"{name}_x{scale}.csv"
+                replicate(src, raw_path, scale, key_column, offset)
+                for mode, chunksize in CHUNK_SIZES.items():
+                    out_dir = Path(tmp) / f"{name}_x{scale}_{mode}"
+                    out_dir.mkdir()
+                    proc = subprocess.run(
+                        [sys.executable, __file__, "--child", name, str(raw_path), str(out_dir), str(chunksize),
+                         str(scale)],
+                        capture_output=True, text=True,
+                    )
+                    if proc.returncode != 0:
+                        raise RuntimeError(f"{name} x{scale} {mode} failed:\n{proc.stderr}")
+                    result = json.loads(proc.stdout.strip().splitlines()[-1])
+                    results.append({"dataset": name, "scale": scale, "mode": mode,
+                                    "raw_mb": raw_path.stat().st_size / 1e6, **result})
+                    shutil.rmtree(out_dir)
+                raw_path.unlink()
+    return results
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        dataset, raw_path, out_dir, chunksize, scale = sys.argv[2:7]
+        child(dataset, raw_path, out_dir, int(chunksize), int(scale))
+        sys.exit(0)
+
+    scales = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100]
+    print(f"{'dataset':<14}{'scale':>6}{'mode':>9}{'raw MB':>9}{'rows':>11}{'s':>8}{'base MB':>9}{'peak MB':>9}")
+    for r in run(scales):
+        print(f"{r['dataset']:<14}{r['scale']:>6}{r['mode']:>9}{r['raw_mb']:>9.1f}{r['rows']:>11}{r['s']:>8.1f}"
+              f"{r['base_mb']:>9.0f}{r['peak_mb']:>9.0f}")
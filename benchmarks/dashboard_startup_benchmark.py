@@ -0,0 +1,108 @@
+"""Cold-start and first-paint time of each dashboard, standalone and through the combined launcher.
+
+Usage:
+    python benchmarks/dashboard_startup_benchmark.py [--repeats N]
+
+Every case runs in a fresh interpreter (nothing imported, no Streamlit cache)
+through Streamlit's AppTest, which executes the script like a new browser
+session would:
+- "standalone": `streamlit run <project>/streamlit_dashboard.py`;
+- "launcher":   the root `streamlit_dashboard.py` with that dashboard selected;
+- "launcher, warmed": the same session once the launcher's background warm-up
+  (`etl_common.dashboards.warm_all`) has finished, i.e. what every session after
+  server start gets. Its warm-up time is reported as startup.
+First paint is the time from the start of the script run until the dashboard's
+title is sent to the browser; full render is the whole run; rerun is a second
+run of the same session (an interaction with every cache hot). Imports of Streamlit itself
+are excluded, the dashboards' own imports are not; the "baseline" row is
+AppTest's overhead for a script that draws nothing but a title.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DASHBOARDS = {"Air Quality": "air-quality-project", "World Happiness": "World-Happiness",
+              "Global Unemployment": "Global-Unemployment"}
+MODES = ["standalone", "launcher", "launcher, warmed"]
+# AppTest's own cost of a first run, paid by every case (a script that only draws a title)
+BASELINE_SCRIPT = 'import streamlit as st\nst.title("Baseline")\nst.write("page")\n'
+LAUNCHER_HEADINGS = ("", "ETL Analytics Dashboards", "Dashboards")  # "" is any non-heading element
+TIMEOUT_S = 300
+
+
+def child(choice, mode):
+    """Run one case in this (fresh) process and print its timings as JSON."""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    first_delta = []
+    enqueue = ForwardMsgQueue.enqueue
+
+    def timed_enqueue(self, msg):
+        if not first_delta and msg.HasField("delta") and msg.delta.new_element.heading.body not in LAUNCHER_HEADINGS:
+            first_delta.append(time.perf_counter())
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = timed_enqueue
+    sys.path.append(str(ROOT))
+    startup = None
+    if mode == "launcher, warmed":
+        from etl_common.dashboards import warm_all
+
+        started = time.perf_counter()
+        warm_all()
+        startup = time.perf_counter() - started
+
+    if mode == "baseline":
+        at = AppTest.from_string(BASELINE_SCRIPT, default_timeout=TIMEOUT_S)
+    elif mode == "standalone":
+        at = AppTest.from_file(str(ROOT / DASHBOARDS[choice] / "streamlit_dashboard.py"), default_timeout=TIMEOUT_S)
+    else:
+        at = AppTest.from_file(str(ROOT / "streamlit_dashboard.py"), default_timeout=TIMEOUT_S)
+        at.session_state["dashboard_selector"] = choice
+    run_started = time.perf_counter()
+    at.run()
+    full = time.perf_counter() - run_started
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    started = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - started
+    print(json.dumps({"startup_s": startup, "first_paint_s": first_delta[0] - run_started, "full_s": full,
+                      "rerun_s": rerun}))
+
+
+def measure(choice, mode):
+    out = subprocess.run([sys.executable, __file__, "--child", choice, mode], capture_output=True, text=True,
+                         check=True, cwd=ROOT).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'dashboard':<21}{'mode':<18}{'startup ms':>11}{'first paint ms':>16}{'full render ms':>16}"
+          f"{'rerun ms':>10}")
+    cases = [("-", "baseline")] + [(choice, mode) for choice in DASHBOARDS for mode in MODES]
+    for choice, mode in cases:
+        runs = [measure(choice, mode) for _ in range(args.repeats)]
+        median = {key: statistics.median(r[key] for r in runs) if runs[0][key] is not None else None
+                  for key in runs[0]}
+        startup = f"{median['startup_s'] * 1000:.0f}" if median["startup_s"] is not None else "-"
+        print(f"{choice:<21}{mode:<18}{startup:>11}{median['first_paint_s'] * 1000:>16.0f}"
+              f"{median['full_s'] * 1000:>16.0f}{median['rerun_s'] * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
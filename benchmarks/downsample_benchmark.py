@@ -0,0 +1,102 @@
+"""Payload size and build time of the PM2.5 trend and map figures, before and after downsampling.
+
+Usage:
+    python benchmarks/downsample_benchmark.py [years ...]
+
+For each history length (default 1 5 20 years) a synthetic daily series and
+sensor-day readings (sensor locations from benchmarks/synthetic.py) go through
+the dashboard's figure code twice: "before" plots every day and one map marker
+per reading row; "after" plots the LTTB / min-max series at the default point
+budget and one merged marker per sensor (`pm25_downsample`). Payload is the
+figure JSON Streamlit ships to the browser, and build time covers the pandas
+work, `plotly.express` and that serialization. Plotly's browser render time
+grows with the number of points, so points are reported alongside.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "air-quality-project" / "src"))
+from pm25_downsample import downsample, map_budget, point_budget, sensor_points, thin_points
+from synthetic import CITIES, openaq_sensors
+
+SENSORS = 100
+
+
+def daily_series(days, seed=0):
+    rng = np.random.default_rng(seed)
+    day = np.arange(days)
+    pm25 = 35 * (1 + 0.4 * np.cos(2 * np.pi * day / 365)) * rng.lognormal(0, 0.35, days)
+    return pd.DataFrame({"date": pd.Timestamp("2000-01-01") + pd.to_timedelta(day, unit="D"), "pm25": pm25})
+
+
+def readings(days, seed=0):
+    sensors = openaq_sensors(SENSORS * 365, seed).head(SENSORS)
+    rng = np.random.default_rng(seed)
+    index = np.repeat(np.arange(len(sensors)), days)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2000-01-01") + pd.to_timedelta(np.tile(np.arange(days), len(sensors)), unit="D"),
+        "pm25": sensors["level"].to_numpy()[index] * rng.lognormal(0, 0.35, len(index)),
+        "sensor_id": sensors["sensor_id"].to_numpy()[index],
+        "latitude": sensors["latitude"].to_numpy()[index],
+        "longitude": sensors["longitude"].to_numpy()[index],
+        "city": sensors["city"].to_numpy()[index],
+        "country": sensors["country"].to_numpy()[index],
+    })
+
+
+def trend_figure(daily):
+    return px.line(daily, x="date", y="pm25", labels={"pm25": "PM2.5 (µg/m³)"})
+
+
+def map_figure(map_df, hover):
+    map_df = map_df.assign(pm25_clipped=lambda d: d["pm25"].clip(lower=1, upper=300))
+    return px.scatter_mapbox(map_df, lat="latitude", lon="longitude", color="pm25", size="pm25_clipped",
+                             hover_name="city", hover_data=hover, color_continuous_scale="Reds", size_max=15,
+                             zoom=1, height=500)
+
+
+def measure(figure, data):
+    """Points, figure JSON bytes and seconds for `figure(data())`, the data preparation included."""
+    started = time.perf_counter()
+    df = data()
+    payload = len(figure(df).to_json())
+    return len(df), payload, time.perf_counter() - started
+
+
+def run(years=(1, 5, 20)):
+    # Plotly builds its figure templates on first use; keep that out of the first case
+    trend_figure(daily_series(10)).to_json()
+    results = []
+    for n_years in years:
+        days = 365 * n_years
+        daily = daily_series(days)
+        rows = readings(days)
+        cases = {
+            ("trend", "before"): (trend_figure, lambda: daily),
+            ("trend", "lttb"): (trend_figure, lambda: downsample(daily, "date", "pm25", point_budget(), "lttb")),
+            ("trend", "minmax"): (trend_figure, lambda: downsample(daily, "date", "pm25", point_budget(), "minmax")),
+            ("map", "before"): (lambda df: map_figure(df, ["country", "pm25"]), lambda: rows),
+            ("map", "per sensor"): (lambda df: map_figure(df, ["country", "pm25", "readings", "sensors"]),
+                                    lambda: thin_points(sensor_points(rows), map_budget())),
+        }
+        for (chart, variant), (figure, data) in cases.items():
+            points, payload, seconds = measure(figure, data)
+            results.append({"years": n_years, "chart": chart, "variant": variant, "points": points,
+                            "payload_kb": payload / 1024, "build_ms": seconds * 1000})
+    return results
+
+
+if __name__ == "__main__":
+    years = [int(arg) for arg in sys.argv[1:]] or [1, 5, 20]
+    print(f"{SENSORS} sensors in {len({c[0] for c in CITIES})} cities; point budget {point_budget()} (trend), "
+          f"{map_budget()} (map)")
+    print(f"{'years':>6}  {'chart':<7}{'variant':<12}{'points':>10}{'payload KB':>12}{'build ms':>10}")
+    for r in run(years):
+        print(f"{r['years']:>6}  {r['chart']:<7}{r['variant']:<12}{r['points']:>10,}{r['payload_kb']:>12.1f}"
+              f"{r['build_ms']:>10.1f}")
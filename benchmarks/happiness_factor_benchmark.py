@@ -0,0 +1,91 @@
+"""Cost of the happiness dashboard's factor section on a cold filter state, before and after lazy tabs.
+
+Usage:
+    python benchmarks/happiness_factor_benchmark.py [scale ...]
+
+The cleaned happiness rows are replicated `scale` times (default 1 10 100).
+"before" builds and serializes the six `trendline="ols"` scatter plots the
+section used to render on every new filter state (plotly fits each with
+statsmodels); "after" runs `HappinessQueries.factor_fits` once and builds the
+one figure of the open tab with its least-squares line drawn from that fit.
+statsmodels' import, which "before" paid on the first rerun of every server
+process, is timed separately in a fresh interpreter.
+"""
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "World-Happiness"))
+from happiness_queries import FACTORS, HappinessQueries
+
+REPEATS = 5
+
+
+def trendline_figure(df, feature):
+    return px.scatter(df, x=feature, y="life_ladder", trendline="ols")
+
+
+def fitted_figure(df, feature, fit):
+    fig = px.scatter(df, x=feature, y="life_ladder")
+    x = df[feature].where(df["life_ladder"].notna())
+    ends = [x.min(), x.max()]
+    fig.add_scatter(x=ends, y=[fit["intercept"] + fit["slope"] * end for end in ends], mode="lines")
+    return fig
+
+
+def before(df):
+    return sum(len(trendline_figure(df, feature).to_json()) for feature in FACTORS)
+
+
+def after(queries):
+    fits = queries.factor_fits()
+    return len(fitted_figure(queries.rows(), FACTORS[0], fits.loc[FACTORS[0]]).to_json())
+
+
+def median_s(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def import_seconds(module):
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    return float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+def run(scales=(1, 10, 100)):
+    df = pd.read_csv(ROOT / "World-Happiness" / "data" / "cleaned" / "cleaned_happiness.csv")
+    # Warm plotly (and statsmodels, timed on its own below) so neither first case pays for imports
+    before(df.head(50))
+    results = [{"scale": "-", "variant": "import statsmodels.api", "rows": 0, "payload_kb": 0.0,
+                "seconds": import_seconds("statsmodels.api")}]
+    for scale in scales:
+        rows = pd.concat([df] * scale, ignore_index=True)
+        queries = HappinessQueries(rows)
+        # The numpy fits and statsmodels' (via plotly) must draw the same line
+        reference = px.get_trendline_results(trendline_figure(rows, FACTORS[0])).px_fit_results.iloc[0]
+        fit = queries.factor_fits().loc[FACTORS[0]]
+        assert np.allclose(reference.params, [fit["intercept"], fit["slope"]])
+        for variant, fn in (("before: 6 ols figures", lambda: before(rows)),
+                            ("after: fits + open tab", lambda: after(queries))):
+            payload, seconds = median_s(fn)
+            results.append({"scale": scale, "variant": variant, "rows": len(rows), "payload_kb": payload / 1024,
+                            "seconds": seconds})
+    return results
+
+
+if __name__ == "__main__":
+    scales = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100]
+    print(f"{'scale':>6}  {'variant':<26}{'rows':>9}{'payload KB':>12}{'ms':>9}")
+    for r in run(scales):
+        print(f"{r['scale']:>6}  {r['variant']:<26}{r['rows']:>9,}{r['payload_kb']:>12.1f}{r['seconds'] * 1000:>9.1f}")
@@ -0,0 +1,72 @@
+"""Compare PostgreSQL load paths: row-by-row execute vs execute_values vs COPY (append and upsert).
+
+Usage:
+    python benchmarks/pg_load_benchmark.py [rows]
+
+Connects to airqualitydb through etl_common/pg_pool.py, so PGHOST/PGPORT/PGUSER
+or PG_DSN="postgresql://user@host:5432/db" pick the target server.
+
+Each method loads the same synthetic pm25_data-shaped frame into its own
+scratch table, which is dropped afterwards.
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from etl_common.pg_loader import create_table, load_dataframe
+from etl_common.pg_pool import connection
+from etl_common.schemas import PM25_DATA
+
+def synthetic_pm25(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "pm25": rng.gamma(2.0, 12.0, rows).round(1),
+        "sensor_id": rng.integers(1_000, 9_000_000, rows),
+        "city": rng.choice(["Delhi", "Beijing", "Lahore", "Seoul", "Paris"], rows),
+        "country": rng.choice(["India", "China", "Pakistan", "South Korea", "France"], rows),
+    })
+
+
+def load_row_by_row(conn, df, table):
+    # The pre-COPY implementation: one execute per row, single commit at the end
+    create_table(conn, PM25_DATA, table)
+    started = time.perf_counter()
+    cur = conn.cursor()
+    for _, row in df.iterrows():
+        cur.execute(
+            f"INSERT INTO {table} (date, pm25, sensor_id, city, country) VALUES (%s, %s, %s, %s, %s)",
+            (row["date"], row["pm25"], int(row["sensor_id"]), row["city"], row["country"])
+        )
+    conn.commit()
+    cur.close()
+    elapsed = time.perf_counter() - started
+    return {"method": "row", "mode": "append", "rows": len(df), "elapsed_s": round(elapsed, 3), "rows_per_s": round(len(df) / elapsed)}
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = synthetic_pm25(rows)
+    results = []
+    with connection("airqualitydb") as conn:
+        for method, upsert in (("row", False), ("values", False), ("copy", False), ("copy", True)):
+            table = f"bench_pm25_{method}{'_upsert' if upsert else ''}"
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.commit()
+            if method == "row":
+                results.append(load_row_by_row(conn, df, table))
+            else:
+                results.append(load_dataframe(conn, PM25_DATA, df, method=method, table=table, upsert=upsert))
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE {table}")
+            conn.commit()
+
+    baseline = results[0]["elapsed_s"]
+    print(f"\n{'method':<15}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'speedup':>9}")
+    for r in results:
+        print(f"{r['method'] + ' ' + r['mode']:<15}{r['rows']:>10}{r['elapsed_s']:>10.2f}{r['rows_per_s']:>12,}{baseline / r['elapsed_s']:>8.1f}x")
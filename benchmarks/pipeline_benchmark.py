@@ -0,0 +1,332 @@
+"""Per-stage timings of the three pipelines on seeded synthetic data, saved as JSON for comparison across commits.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--rows 10000,100000] [--datasets pm25,unemployment,happiness]
+                                            [--stages process,melt,load,aggregate,render] [--pg] [--seed 0]
+    python benchmarks/pipeline_benchmark.py --compare BEFORE.json AFTER.json
+
+Raw inputs come from benchmarks/synthetic.py and are cached in
+benchmarks/.data/ by (dataset, rows, seed). Each (dataset, rows) runs in a
+scratch copy of the project layout, with every stage in its own process so
+its peak RSS is its own:
+
+    melt       unemployment only: the wide table melted to long rows, nothing written
+    process    the project's processing step (PM2.5 sensor locations come from the
+               generator, so no API calls)
+    load       COPY of the processed rows into a scratch table, dropped afterwards;
+               only with --pg (PG_DSN / PGHOST select the server, see etl_common/pg_pool.py)
+    aggregate  the dashboard's file backend: load its structures, answer every chart
+    render     the analyzer script, all charts rebuilt (PM25_BACKEND=files)
+
+Results go to benchmarks/results/<commit>-<timestamp>.json with the machine,
+the parameters and one record per (dataset, rows, stage).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.metadata import version
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not recorded
+    resource = None
+
+# Only the child processes import pandas and the pipelines: Linux carries the parent's peak RSS into
+# every process it starts, so a lean parent keeps each stage's peak its own
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "air-quality-project" / "src"))
+sys.path.append(str(ROOT / "Global-Unemployment" / "src"))
+sys.path.append(str(ROOT / "World-Happiness"))
+
+DATA_DIR = ROOT / "benchmarks" / ".data"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+STAGES = ["melt", "process", "load", "aggregate", "render"]
+
+DATASETS = {
+    "pm25": {
+        "project": "air-quality-project", "raw": "data/raw/pm25_daily_full.csv", "generate": "write_openaq_raw",
+        "cleaned": "data/processed/pm25_geo_enriched.csv", "analyzer": "src/analyze_and_visualize.py",
+        "database": "airqualitydb", "stages": ["process", "load", "aggregate", "render"],
+    },
+    "unemployment": {
+        "project": "Global-Unemployment", "raw": "data/raw/global_unemployment_data.csv",
+        "generate": "write_unemployment_raw", "cleaned": "data/cleaned/cleaned_unemployment.csv",
+        "analyzer": "src/analyze_and_visualize.py", "database": "unemploymentdb", "stages": STAGES,
+    },
+    "happiness": {
+        "project": "World-Happiness", "raw": "world-happiness-report.csv", "generate": "write_happiness_raw",
+        "cleaned": "data/cleaned/cleaned_happiness.csv", "analyzer": "analyze_and_visualize.py",
+        "database": "happinessdb", "stages": ["process", "load", "aggregate", "render"],
+    },
+}
+
+
+def _peak_mb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def generate(dataset, rows, seed, path):
+    import synthetic
+    write = getattr(synthetic, DATASETS[dataset]["generate"])
+    if dataset == "pm25":
+        write(path, rows, seed, sensors_path=Path(path).parent / "sensors.csv")
+    else:
+        write(path, rows, seed)
+
+
+def raw_input(dataset, rows, seed):
+    """Path of the cached synthetic raw file (generated on first use, in a child process)."""
+    cache_dir = DATA_DIR / f"{dataset}-{rows}-s{seed}"
+    path = cache_dir / Path(DATASETS[dataset]["raw"]).name
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        tmp_path = path.with_suffix(".tmp")
+        subprocess.run([sys.executable, __file__, "--generate", dataset, str(rows), str(seed), str(tmp_path)],
+                       check=True)
+        os.replace(tmp_path, path)
+        print(f"Generated {dataset} x {rows:,} rows in {time.perf_counter() - started:.1f}s -> {path}")
+    return path
+
+
+def charts(dataset, q):
+    """Every chart query of the dataset's dashboard against its file-backend structure `q`."""
+    if dataset == "pm25":
+        return [q.kpis(), q.daily_avg(), q.top_cities(10), q.country_avg(), q.month_avg(), q.weekday_avg(),
+                q.yearly_avg(), q.histogram()]
+    if dataset == "unemployment":
+        return [q.cell(), q.options("country_name"), q.breakdown(["year"]), q.breakdown(["country_name"]),
+                q.breakdown(["year", "sex"]), q.breakdown(["age_group"])]
+    return [q.kpis(), q.trend(), q.top10(), q.corr(), q.rows()]
+
+
+def run_stage(dataset, name, workdir):
+    """Run one stage in the current process (cwd = the scratch project); returns the rows it handled."""
+    import pandas as pd
+    from etl_common.pipeline import count_rows
+    from etl_common.streaming import CHUNK_SIZE, iter_csv
+
+    spec = DATASETS[dataset]
+    raw = spec["raw"]
+
+    if name == "melt":
+        from process_unemployment import clean_chunks
+        return sum(len(chunk) for chunk in clean_chunks(raw))
+
+    if name == "process":
+        if dataset == "pm25":
+            from process_pm25 import write_enriched
+            return write_enriched(pd.read_csv("data/raw/sensors.csv"), raw_path=raw)
+        if dataset == "unemployment":
+            from process_unemployment import process
+            return process(raw_path=raw, verify=False)[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(str(ROOT / spec["project"] / "process_happiness.py"), run_name="__main__")
+        return count_rows(spec["cleaned"])
+
+    if name == "load":
+        from etl_common.pg_loader import load_dataframe
+        from etl_common.pg_pool import connection
+        from etl_common.schemas import HAPPINESS_DATA, PM25_DATA, UNEMPLOYMENT_DATA
+        schema = {"pm25": PM25_DATA, "unemployment": UNEMPLOYMENT_DATA, "happiness": HAPPINESS_DATA}[dataset]
+        table = f"bench_{schema.name}"
+
+        def chunks():
+            for chunk in iter_csv(spec["cleaned"], CHUNK_SIZE):
+                # The same filter the project's loader applies before its COPY
+                yield chunk.dropna(subset=["date", "pm25", "city", "country"]) if dataset == "pm25" else chunk
+
+        with connection(spec["database"]) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.commit()
+            try:
+                return load_dataframe(conn, schema, chunks(), table=table)["rows"]
+            finally:
+                conn.rollback()
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.commit()
+
+    if name == "aggregate":
+        from etl_common.parquet_store import read_processed
+        if dataset == "pm25":
+            # As the analyzer's load_aggregates(), without importing its plotting stack
+            from pm25_features import PM25Aggregates
+            pm25 = read_processed("data/processed/pm25_geo_enriched.parquet", spec["cleaned"], columns=["pm25"])
+            temporal = read_processed("data/processed/pm25_temporal.parquet", "data/processed/pm25_temporal.csv")
+            q = PM25Aggregates(temporal, pm25["pm25"].dropna().to_numpy())
+            rows = len(pm25)
+        elif dataset == "unemployment":
+            from unemployment_cube import UnemploymentCube, build_cube
+            df = read_processed("data/cleaned/cleaned_unemployment.parquet", spec["cleaned"])
+            q, rows = UnemploymentCube(build_cube(df)), len(df)
+        else:
+            from happiness_queries import HappinessQueries
+            df = read_processed("data/cleaned/cleaned_happiness.parquet", spec["cleaned"])
+            q, rows = HappinessQueries(df), len(df)
+        charts(dataset, q)
+        return rows
+
+    if name == "render":
+        log = Path(workdir) / "render.log"
+        with open(log, "w") as out:
+            code = subprocess.call([sys.executable, str(ROOT / spec["project"] / spec["analyzer"]), "--force"],
+                                   stdout=out, stderr=subprocess.STDOUT,
+                                   env={**os.environ, "PM25_BACKEND": "files"})
+        if code != 0:
+            raise RuntimeError(f"{spec['analyzer']} exited with {code}, see {log}")
+        return count_rows(spec["cleaned"])
+
+    raise ValueError(f"Unknown stage {name!r}")
+
+
+def child(dataset, name, workdir):
+    # Library imports are not part of any stage
+    import pandas  # noqa: F401
+    import pyarrow.dataset  # noqa: F401
+    os.chdir(workdir)
+    started = time.perf_counter()
+    rows = run_stage(dataset, name, workdir)
+    seconds = time.perf_counter() - started
+    peaks = [peak for peak in (_peak_mb(resource.RUSAGE_SELF), _peak_mb(resource.RUSAGE_CHILDREN))
+             if peak is not None] if resource else []
+    print(json.dumps({"rows": int(rows), "seconds": seconds, "peak_mb": max(peaks) if peaks else None}))
+
+
+def measure(dataset, name, workdir):
+    """Run a stage in a child process; its last stdout line is the measurement."""
+    # Keep the project's own stage metrics log out of benchmark runs
+    env = {**os.environ, "ETL_METRICS": "0", "PYTHONUNBUFFERED": "1"}
+    proc = subprocess.run([sys.executable, __file__, "--child", dataset, name, str(workdir)], capture_output=True,
+                          text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{dataset}/{name} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def scratch_project(dataset, rows, seed, workdir):
+    """Lay out the project's directories under `workdir` with the cached raw input linked in place."""
+    spec = DATASETS[dataset]
+    raw = raw_input(dataset, rows, seed)
+    for directory in ("data/raw", "data/processed", "data/cleaned", "outputs"):
+        (workdir / directory).mkdir(parents=True, exist_ok=True)
+    files = [(raw, spec["raw"])]
+    if dataset == "pm25":
+        files.append((raw.parent / "sensors.csv", "data/raw/sensors.csv"))
+    for source, target in files:
+        try:
+            os.symlink(source, workdir / target)
+        except OSError:  # no symlinks (e.g. Windows without developer mode)
+            shutil.copyfile(source, workdir / target)
+
+
+def benchmark(row_counts, datasets, stages, seed=0):
+    results = []
+    for dataset in datasets:
+        selected = [name for name in DATASETS[dataset]["stages"] if name in stages]
+        if not selected:
+            continue
+        for rows in row_counts:
+            with tempfile.TemporaryDirectory(dir=DATA_DIR, prefix="work-") as tmp:
+                workdir = Path(tmp)
+                scratch_project(dataset, rows, seed, workdir)
+                # Later stages read what processing wrote, so it runs (untimed) when not selected
+                if "process" not in selected and any(name in selected for name in ("load", "aggregate", "render")):
+                    measure(dataset, "process", workdir)
+                for name in selected:
+                    r = measure(dataset, name, workdir)
+                    record = {"dataset": dataset, "rows": rows, "stage": name, "seconds": round(r["seconds"], 4),
+                              "rows_out": r["rows"],
+                              "rows_per_s": round(r["rows"] / r["seconds"]) if r["seconds"] else None,
+                              "peak_mb": r["peak_mb"] and round(r["peak_mb"], 1)}
+                    results.append(record)
+                    print(f"{dataset:<14}{rows:>12,}  {name:<10}{record['seconds']:>10.2f}"
+                          f"{record['rows_per_s'] or 0:>14,}{record['peak_mb'] or 0:>10.0f}")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(before_path, after_path):
+    """Print the stages both result files measured, with the after/before time ratio."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    earlier = {(r["dataset"], r["rows"], r["stage"]): r for r in before["results"]}
+    print(f"{before['commit']} -> {after['commit']}")
+    print(f"{'dataset':<14}{'rows':>12}  {'stage':<10}{'before s':>10}{'after s':>10}{'ratio':>8}"
+          f"{'before MB':>11}{'after MB':>10}")
+    for r in after["results"]:
+        base = earlier.get((r["dataset"], r["rows"], r["stage"]))
+        if base is None:
+            continue
+        ratio = r["seconds"] / base["seconds"] if base["seconds"] else float("nan")
+        print(f"{r['dataset']:<14}{r['rows']:>12,}  {r['stage']:<10}{base['seconds']:>10.2f}{r['seconds']:>10.2f}"
+              f"{ratio:>8.2f}{base['peak_mb'] or 0:>11.0f}{r['peak_mb'] or 0:>10.0f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+        sys.exit(0)
+    if sys.argv[1:2] == ["--generate"]:
+        generate(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on seeded synthetic data.")
+    parser.add_argument("--rows", default="10000,100000",
+                        help="comma-separated row counts (processed rows per dataset, e.g. 10000,1000000,100000000)")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="comma-separated: pm25, unemployment, happiness")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated: " + ", ".join(STAGES))
+    parser.add_argument("--pg", action="store_true", help="include the load stage (needs PostgreSQL)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    stages = [name for name in args.stages.split(",") if args.pg or name != "load"]
+    row_counts = [int(value.replace("_", "")) for value in args.rows.split(",")]
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"{'dataset':<14}{'rows':>12}  {'stage':<10}{'seconds':>10}{'rows/s':>14}{'peak MB':>10}")
+    results = benchmark(row_counts, args.datasets.split(","), stages, args.seed)
+
+    commit = git_commit()
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{commit or 'nocommit'}-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "commit": commit, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count(),
+                    "python": platform.python_version(), "pandas": version("pandas")},
+        "params": {"rows": row_counts, "datasets": args.datasets.split(","), "stages": stages, "seed": args.seed},
+        "results": results,
+    }
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results: {out}")
@@ -0,0 +1,192 @@
+"""Per-chart latency of the dashboard query engines: pandas (reference) vs embedded DuckDB.
+
+Usage:
+    python benchmarks/query_engine_benchmark.py [scale ...]
+
+Each processed dataset is replicated `scale` times (default 1 10 100) into a
+temporary typed Parquet dataset. The "pandas" engine is what each dashboard's
+files backend runs: `PM25Aggregates` over the temporal aggregates, the
+unemployment rollup cube, `HappinessQueries` over the frame; its `(setup)`
+row includes loading the frame and building those structures. The "duckdb" engine
+registers the Parquet dataset as a view and answers every chart with SQL over
+the rows; its setup is only the registration. Every chart result is checked
+against the pandas reference before timings are reported.
+"""
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "air-quality-project" / "src"))
+sys.path.append(str(ROOT / "Global-Unemployment" / "src"))
+sys.path.append(str(ROOT / "World-Happiness"))
+from etl_common.duckdb_engine import DuckDBEngine
+from etl_common.parquet_store import read_dataset, write_dataset
+from happiness_duckdb import HappinessDuckDB
+from happiness_queries import HappinessQueries
+from pm25_duckdb import PM25DuckDB
+from pm25_features import PM25Aggregates, add_time_features, temporal_aggregates
+from unemployment_cube import UnemploymentCube, build_cube
+from unemployment_duckdb import UnemploymentDuckDB
+
+REPEATS = 5
+PM25_DTYPES = {"date": "datetime64[ns]", "pm25": "float64", "sensor_id": "int64", "latitude": "float64",
+               "longitude": "float64", "city": "category", "country": "category", "year": "int64",
+               "month": "int8", "weekday": "int8", "day": "int32"}
+
+
+def pm25_source():
+    df = pd.read_csv(ROOT / "air-quality-project" / "data" / "processed" / "pm25_geo_enriched.csv",
+                     parse_dates=["date"])
+    return add_time_features(df), "sensor_id", PM25_DTYPES
+
+
+def unemployment_source():
+    df = pd.read_csv(ROOT / "Global-Unemployment" / "data" / "cleaned" / "cleaned_unemployment.csv")
+    dtypes = {"country_name": "category", "indicator_name": "category", "sex": "category", "age_group": "category",
+              "age_categories": "category", "year": "int64", "unemployment_rate": "float64"}
+    return df, None, dtypes
+
+
+def happiness_source():
+    df = pd.read_csv(ROOT / "World-Happiness" / "data" / "cleaned" / "cleaned_happiness.csv")
+    dtypes = {column: "float64" for column in df.columns}
+    dtypes.update({"country_name": "category", "year": "int64"})
+    return df, None, dtypes
+
+
+def pm25_pandas(path):
+    df = read_dataset(path).dropna(subset=["pm25", "city", "country"])
+    return PM25Aggregates(temporal_aggregates(df), df["pm25"].to_numpy())
+
+
+def pm25_charts(q):
+    return {
+        "kpis": lambda f: q.kpis(**f),
+        "daily_avg": lambda f: q.daily_avg(**f),
+        "top_cities": lambda f: q.top_cities(10, **f),
+        "country_avg": lambda f: q.country_avg(**f),
+        "month_avg": lambda f: q.month_avg(**f),
+        "weekday_avg": lambda f: q.weekday_avg(**f),
+        "yearly_avg": lambda f: q.yearly_avg(**f),
+    }
+
+
+def unemployment_charts(q):
+    return {
+        "kpis": lambda f: q.cell(**f),
+        "country_options": lambda f: q.options("country_name", **f),
+        "yearly_avg": lambda f: q.breakdown(["year"], **f),
+        "top10": lambda f: q.breakdown(["country_name"], **f).sort_values("unemployment_rate", ascending=False)
+        .head(10).reset_index(drop=True),
+        "gender_trend": lambda f: q.breakdown(["year", "sex"], **f),
+        "age_avg": lambda f: q.breakdown(["age_group"], **f),
+    }
+
+
+def happiness_charts(q):
+    return {
+        "kpis": lambda f: q.kpis(**f),
+        "trend": lambda f: q.trend(**f),
+        "top10": lambda f: q.top10(**f),
+        "corr": lambda f: q.corr(**f),
+        "factor_fits": lambda f: q.factor_fits(**f),
+        "rows": lambda f: q.rows(**f).sort_values(["country_name", "year"]),
+    }
+
+
+DATASETS = {
+    "pm25": {
+        "source": pm25_source, "partition": ["year"], "table": "pm25_geo_enriched",
+        "pandas": pm25_pandas, "duckdb": PM25DuckDB, "charts": pm25_charts,
+        "filters": [{}, {"country": "India", "start": "2020-01-01", "end": "2024-12-31"}],
+    },
+    "unemployment": {
+        "source": unemployment_source, "partition": ["year"], "table": "cleaned_unemployment",
+        "pandas": lambda path: UnemploymentCube(build_cube(read_dataset(path))), "duckdb": UnemploymentDuckDB,
+        "charts": unemployment_charts, "filters": [{}, {"sex": "Female", "year": 2020}],
+    },
+    "happiness": {
+        "source": happiness_source, "partition": ["year"], "table": "cleaned_happiness",
+        "pandas": lambda path: HappinessQueries(read_dataset(path)), "duckdb": HappinessDuckDB,
+        "charts": happiness_charts, "filters": [{}, {"country": "Spain"}],
+    },
+}
+
+
+def same(a, b):
+    """Loose equality of two chart results (frames, tuples, dicts), ignoring dtypes and index labels."""
+    if isinstance(a, dict):
+        return same(list(a.values()), list(b.values()))
+    if isinstance(a, pd.DataFrame):
+        if a.shape != b.shape:
+            return False
+        a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+        for column in a.columns:
+            x, y = a[column], b[column]
+            if pd.api.types.is_numeric_dtype(x) and pd.api.types.is_numeric_dtype(y):
+                if not np.allclose(x.to_numpy(float), y.to_numpy(float), equal_nan=True):
+                    return False
+            elif not (x.astype(str).to_numpy() == y.astype(str).to_numpy()).all():
+                return False
+        return True
+    if isinstance(a, (list, tuple)):
+        if all(isinstance(v, str) for v in a):
+            return list(a) == list(b)
+        return np.allclose(np.asarray(a, float), np.asarray(b, float), equal_nan=True)
+    return a == b
+
+
+def timed(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def run(scales=(1, 10, 100)):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, spec in DATASETS.items():
+            df, key, dtypes = spec["source"]()
+            for scale in scales:
+                copies = [df.assign(**{key: df[key] + copy * 10**9}) if key else df for copy in range(scale)]
+                path = Path(tmp) / f"{name}_x{scale}.parquet"
+                write_dataset(pd.concat(copies, ignore_index=True), path, dtypes, partition_cols=spec["partition"])
+                del copies
+
+                engines = {}
+                engines["pandas"], pandas_setup = timed(lambda: spec["pandas"](path), repeats=1)
+                engines["duckdb"], duckdb_setup = timed(
+                    lambda: spec["duckdb"](DuckDBEngine().register(spec["table"], path)), repeats=1)
+                setup = {"pandas": pandas_setup, "duckdb": duckdb_setup}
+
+                charts = {engine: spec["charts"](q) for engine, q in engines.items()}
+                for chart in charts["pandas"]:
+                    for filters in spec["filters"]:
+                        reference, pandas_s = timed(lambda: charts["pandas"][chart](filters))
+                        answer, duckdb_s = timed(lambda: charts["duckdb"][chart](filters))
+                        if not same(answer, reference):
+                            raise AssertionError(f"{name} x{scale} {chart} {filters}: duckdb differs from pandas")
+                        results.append({"dataset": name, "scale": scale, "chart": chart,
+                                        "filters": "all" if not filters else "filtered",
+                                        "pandas_ms": pandas_s * 1000, "duckdb_ms": duckdb_s * 1000})
+                results.append({"dataset": name, "scale": scale, "chart": "(setup)", "filters": "",
+                                "pandas_ms": setup["pandas"] * 1000, "duckdb_ms": setup["duckdb"] * 1000})
+    return results
+
+
+if __name__ == "__main__":
+    scales = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100]
+    print(f"{'dataset':<14}{'scale':>6}  {'chart':<18}{'filters':<10}{'pandas ms':>11}{'duckdb ms':>11}")
+    for r in run(scales):
+        print(f"{r['dataset']:<14}{r['scale']:>6}  {r['chart']:<18}{r['filters']:<10}"
+              f"{r['pandas_ms']:>11.2f}{r['duckdb_ms']:>11.2f}")
@@ -0,0 +1,105 @@
+"""Lookup latency of the sensor grid index vs scanning every sensor.
+
+Usage:
+    python benchmarks/spatial_index_benchmark.py [sensors ...]
+
+For each sensor count (default 10000 50000 200000), sensors are scattered
+around the synthetic cities of benchmarks/synthetic.py and indexed as
+process_pm25.py does (`sensor_table` columns, clusters for every zoom). Each
+query is timed as the median of repeated calls and checked against a full scan
+with pandas masks / haversine over all sensors.
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "air-quality-project" / "src"))
+from sensor_index import SensorIndex, cluster_levels, haversine_km, viewport
+from synthetic import CITIES
+
+REPEATS = 200
+
+
+def sensors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, len(CITIES), n)
+    return pd.DataFrame({
+        "sensor_id": np.arange(n),
+        "country": [CITIES[i][1] for i in city],
+        "city": [CITIES[i][0] for i in city],
+        # Most sensors within ~50 km of a city, a tenth scattered anywhere
+        "latitude": np.where(rng.random(n) < 0.9, np.array([c[2] for c in CITIES])[city] + rng.normal(0, 0.4, n),
+                             rng.uniform(-60, 75, n)),
+        "longitude": np.where(rng.random(n) < 0.9, np.array([c[3] for c in CITIES])[city] + rng.normal(0, 0.4, n),
+                              rng.uniform(-180, 180, n)),
+        "pm25": rng.gamma(2.0, 12.0, n),
+        "pm25_max": 0.0, "pm25_last": 0.0, "last_date": pd.Timestamp("2024-01-01"),
+        "readings": rng.integers(30, 365, n),
+    })
+
+
+def median_us(fn, repeats=REPEATS):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times) * 1e6
+
+
+def scan_box(table, south, west, north, east):
+    lat, lon = table["latitude"], table["longitude"]
+    in_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+    return table[(lat >= south) & (lat <= north) & in_lon]
+
+
+def scan_near(table, lat, lon, radius_km):
+    distance = haversine_km(lat, lon, table["latitude"].to_numpy(), table["longitude"].to_numpy())
+    return table[distance <= radius_km].assign(distance_km=distance[distance <= radius_km]).sort_values("distance_km")
+
+
+def run(counts=(10_000, 50_000, 200_000)):
+    results = []
+    for n in counts:
+        table = sensors(n)
+        started = time.perf_counter()
+        clusters = cluster_levels(table)
+        cluster_s = time.perf_counter() - started
+        started = time.perf_counter()
+        index = SensorIndex(table, clusters)
+        build_s = time.perf_counter() - started
+        results.append({"sensors": n, "query": f"build (+{cluster_s:.2f}s clustering, {len(clusters):,} markers)",
+                        "rows": len(index), "index_us": build_s * 1e6, "scan_us": float("nan")})
+
+        paris = viewport(48.86, 2.35, 9, 1200, 500)
+        queries = {
+            "bbox Paris z9": (lambda: index.within(*paris), lambda: scan_box(table, *paris)),
+            "bbox Europe": (lambda: index.within(35, -10, 60, 30), lambda: scan_box(table, 35, -10, 60, 30)),
+            "bbox antimeridian": (lambda: index.within(-50, 170, 10, -170), lambda: scan_box(table, -50, 170, 10, -170)),
+            "near Delhi 25 km": (lambda: index.near(28.61, 77.21, 25), lambda: scan_near(table, 28.61, 77.21, 25)),
+            "near Delhi 500 km": (lambda: index.near(28.61, 77.21, 500), lambda: scan_near(table, 28.61, 77.21, 500)),
+        }
+        for name, (indexed, scan) in queries.items():
+            found, index_us = median_us(indexed)
+            expected, scan_us = median_us(scan, repeats=20)
+            if set(found["sensor_id"]) != set(expected["sensor_id"]):
+                raise AssertionError(f"{name}: index and scan disagree ({len(found)} vs {len(expected)})")
+            results.append({"sensors": n, "query": name, "rows": len(found), "index_us": index_us, "scan_us": scan_us})
+        for zoom in (1, 6, 10):
+            box = viewport(28.61, 77.21, zoom, 1200, 500)
+            found, index_us = median_us(lambda: index.clusters_in(zoom, *box))
+            results.append({"sensors": n, "query": f"clusters z{zoom} Delhi", "rows": len(found), "index_us": index_us,
+                            "scan_us": float("nan")})
+    return results
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 50_000, 200_000]
+    print(f"{'sensors':>9}  {'query':<52}{'rows':>8}{'index us':>11}{'scan us':>11}")
+    for r in run(counts):
+        print(f"{r['sensors']:>9,}  {r['query']:<52}{r['rows']:>8,}{r['index_us']:>11.0f}{r['scan_us']:>11.0f}")
@@ -0,0 +1,101 @@
+"""Cold-load time and memory: processed CSVs vs typed, partitioned Parquet.
+
+Usage:
+    python benchmarks/storage_benchmark.py [scale]
+
+`scale` replicates each dataset's rows (default 1) to show how both paths grow.
+Parquet copies are written to a temporary directory, so the benchmark does not
+depend on the processing scripts having been run. `peak MB` is the Python heap
+peak seen by tracemalloc (Arrow's native buffers are not traced there);
+`frame MB` is the deep memory of the resulting DataFrame.
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+from etl_common.parquet_store import read_dataset, write_dataset
+
+DATASETS = {
+    "pm25": {
+        "csv": ROOT / "air-quality-project" / "data" / "processed" / "pm25_geo_enriched.csv",
+        "parse_dates": ["date"],
+        "dtypes": {"date": "datetime64[ns]", "pm25": "float64", "sensor_id": "int64", "latitude": "float64",
+                   "longitude": "float64", "city": "category", "country": "category", "year": "int64"},
+        "columns": ["date", "pm25", "city"],
+        "filters": [("country", "==", "India")],
+    },
+    "unemployment": {
+        "csv": ROOT / "Global-Unemployment" / "data" / "cleaned" / "cleaned_unemployment.csv",
+        "parse_dates": None,
+        "dtypes": {"country_name": "category", "indicator_name": "category", "sex": "category",
+                   "age_group": "category", "age_categories": "category", "year": "int64",
+                   "unemployment_rate": "float64"},
+        "columns": ["country_name", "year", "unemployment_rate"],
+        "filters": [("year", ">=", 2020)],
+    },
+    "happiness": {
+        "csv": ROOT / "World-Happiness" / "data" / "cleaned" / "cleaned_happiness.csv",
+        "parse_dates": None,
+        "dtypes": {"country_name": "category", "year": "int64", "life_ladder": "float64",
+                   "log_gdp_per_capita": "float64", "social_support": "float64",
+                   "healthy_life_expectancy_at_birth": "float64", "freedom_to_make_life_choices": "float64",
+                   "generosity": "float64", "perceptions_of_corruption": "float64",
+                   "positive_affect": "float64", "negative_affect": "float64"},
+        "columns": ["country_name", "year", "life_ladder"],
+        "filters": [("year", "==", 2020)],
+    },
+}
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": len(df),
+        "ms": elapsed * 1000,
+        "peak_mb": peak / 1e6,
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def run(scale=1):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, spec in DATASETS.items():
+            df = pd.read_csv(spec["csv"], parse_dates=spec["parse_dates"])
+            if scale > 1:
+                df = pd.concat([df] * scale, ignore_index=True)
+            if "year" not in df.columns:
+                df["year"] = df["date"].dt.year
+            csv_path = Path(tmp) / f"{name}.csv"
+            parquet_path = Path(tmp) / f"{name}.parquet"
+            df.to_csv(csv_path, index=False)
+            write_dataset(df, parquet_path, spec["dtypes"], partition_cols=["year"])
+            del df
+
+            cases = {
+                "csv": lambda: pd.read_csv(csv_path, parse_dates=spec["parse_dates"]),
+                "parquet": lambda: read_dataset(parquet_path),
+                "parquet projected": lambda: read_dataset(parquet_path, columns=spec["columns"]),
+                "parquet filtered": lambda: read_dataset(parquet_path, columns=spec["columns"], filters=spec["filters"]),
+            }
+            for case, fn in cases.items():
+                results.append({"dataset": name, "case": case, **measure(fn)})
+    return results
+
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    print(f"{'dataset':<14}{'case':<20}{'rows':>10}{'load ms':>10}{'peak MB':>10}{'frame MB':>10}")
+    for r in run(scale):
+        print(f"{r['dataset']:<14}{r['case']:<20}{r['rows']:>10}{r['ms']:>10.1f}{r['peak_mb']:>10.1f}{r['frame_mb']:>10.1f}")
@@ -0,0 +1,250 @@
+"""Seeded synthetic raw inputs in the layout of each pipeline's real source file.
+
+    write_openaq_raw(path, rows, seed)        # 33-column OpenAQ daily export (+ sensor locations)
+    write_unemployment_raw(path, rows, seed)  # wide table, one column per year 2014-2024
+    write_happiness_raw(path, rows, seed)     # World Happiness Report indicators
+
+`rows` counts the rows the processing step produces (readings, melted
+country/indicator/sex/age/year rows, country-years), so the three datasets
+scale alike. Files are written chunk by chunk with one RNG per chunk seeded
+from (seed, chunk), so any size from 10k to 100M rows takes bounded memory
+and the same arguments always give the same bytes. Missing values are sprinkled
+at roughly the real files' rates.
+"""
+import codecs
+import math
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+CHUNK_ROWS = 200_000
+
+# --- Air quality: OpenAQ /sensors/{id}/days rows, json_normalize'd as fetch_openaq.py writes them ---
+
+OPENAQ_COLUMNS = [
+    "value", "coordinates", "sensor_id", "flagInfo.hasFlags", "parameter.id", "parameter.name", "parameter.units",
+    "parameter.displayName", "period.label", "period.interval", "period.datetimeFrom.utc",
+    "period.datetimeFrom.local", "period.datetimeTo.utc", "period.datetimeTo.local", "summary.min", "summary.q02",
+    "summary.q25", "summary.median", "summary.q75", "summary.q98", "summary.max", "summary.avg", "summary.sd",
+    "coverage.expectedCount", "coverage.expectedInterval", "coverage.observedCount", "coverage.observedInterval",
+    "coverage.percentComplete", "coverage.percentCoverage", "coverage.datetimeFrom.utc",
+    "coverage.datetimeFrom.local", "coverage.datetimeTo.utc", "coverage.datetimeTo.local",
+]
+# (city, country, latitude, longitude, UTC offset in hours, typical PM2.5)
+CITIES = [
+    ("Delhi", "India", 28.61, 77.21, 5, 95.0), ("Mumbai", "India", 19.08, 72.88, 5, 45.0),
+    ("Lahore", "Pakistan", 31.55, 74.34, 5, 85.0), ("Dhaka", "Bangladesh", 23.81, 90.41, 6, 75.0),
+    ("Beijing", "China", 39.90, 116.40, 8, 40.0), ("Chengdu", "China", 30.57, 104.07, 8, 45.0),
+    ("Seoul", "South Korea", 37.57, 126.98, 9, 22.0), ("Changwon-si", "South Korea", 35.23, 128.68, 9, 18.0),
+    ("Tokyo", "Japan", 35.68, 139.69, 9, 12.0), ("Bangkok", "Thailand", 13.76, 100.50, 7, 25.0),
+    ("Jakarta", "Indonesia", -6.21, 106.85, 7, 38.0), ("Hanoi", "Vietnam", 21.03, 105.85, 7, 40.0),
+    ("Paris", "France", 48.86, 2.35, 1, 11.0), ("Berlin", "Germany", 52.52, 13.40, 1, 10.0),
+    ("Krakow", "Poland", 50.06, 19.94, 1, 22.0), ("Madrid", "Spain", 40.42, -3.70, 1, 9.0),
+    ("London", "United Kingdom", 51.51, -0.13, 0, 9.0), ("Cairo", "Egypt", 30.04, 31.24, 2, 60.0),
+    ("Lagos", "Nigeria", 6.52, 3.38, 1, 50.0), ("Nairobi", "Kenya", -1.29, 36.82, 3, 20.0),
+    ("Mexico City", "Mexico", 19.43, -99.13, -6, 20.0), ("Santiago", "Chile", -33.45, -70.67, -4, 25.0),
+    ("Denver", "United States", 39.74, -104.99, -7, 7.0), ("Los Angeles", "United States", 34.05, -118.24, -8, 12.0),
+]
+DAYS_PER_SENSOR = 365
+SENSOR_ID_BASE = 1_000_000
+START_DATE = pd.Timestamp("2023-01-01")
+START_SPREAD_DAYS = 365
+HOURS = np.array([f"{h:02d}:00:00" for h in range(25)], dtype=object)
+
+
+def _write_csv(path, chunks, bom=False):
+    """Stream DataFrame chunks into one CSV (Arrow's writer: ~8x faster than DataFrame.to_csv on numeric columns)."""
+    writer = schema = None
+    with open(path, "wb") as out:
+        if bom:
+            out.write(codecs.BOM_UTF8)
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                # Unquoted, like the real exports; no generated value contains a comma, quote or newline
+                out.write((",".join(df.columns) + "\n").encode())
+                schema = table.schema
+                writer = pa_csv.CSVWriter(out, schema, write_options=pa_csv.WriteOptions(
+                    include_header=False, quoting_style="none"))
+            writer.write_table(table.cast(schema))
+        if writer is not None:
+            writer.close()
+
+
+def _date_strings(offsets):
+    """Per (day, UTC offset) strings for the four period timestamps, as lookup arrays [day, offset]."""
+    days = START_DATE + pd.to_timedelta(np.arange(START_SPREAD_DAYS + DAYS_PER_SENSOR + 1), unit="D")
+    table = {}
+    for name, shift in (("from", 0), ("to", 1)):
+        local = days + pd.Timedelta(days=shift)
+        table[f"{name}.local"] = np.stack([
+            (local.strftime("%Y-%m-%dT%H:%M:%S") + f"{'+' if h >= 0 else '-'}{abs(h):02d}:00").to_numpy(object)
+            for h in offsets], axis=1)
+        table[f"{name}.utc"] = np.stack([
+            (local - pd.Timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M:%SZ").to_numpy(object) for h in offsets], axis=1)
+    return table
+
+
+def openaq_sensors(rows, seed=0):
+    """Sensor locations for `rows` readings: sensor_id, latitude, longitude, city, country (what geocoding yields)."""
+    n = max(math.ceil(rows / DAYS_PER_SENSOR), 1)
+    rng = np.random.default_rng([seed, 0])
+    city = rng.integers(0, len(CITIES), n)
+    cities = pd.DataFrame(CITIES, columns=["city", "country", "latitude", "longitude", "utc_offset", "level"])
+    sensors = cities.iloc[city].reset_index(drop=True)
+    sensors.insert(0, "sensor_id", SENSOR_ID_BASE + np.arange(n))
+    sensors["latitude"] = (sensors["latitude"] + rng.uniform(-0.2, 0.2, n)).round(5)
+    sensors["longitude"] = (sensors["longitude"] + rng.uniform(-0.2, 0.2, n)).round(5)
+    sensors["level"] = sensors["level"] * rng.lognormal(0, 0.3, n)
+    sensors["start"] = rng.integers(0, START_SPREAD_DAYS, n)
+    return sensors
+
+
+def write_openaq_raw(path, rows, seed=0, sensors_path=None):
+    """Write `rows` daily PM2.5 readings (365 consecutive days per sensor) in the raw export layout.
+
+    With `sensors_path`, the sensor locations are also written there, so the
+    processing benchmark can skip the coordinate/geocoding API calls.
+    """
+    sensors = openaq_sensors(rows, seed)
+    if sensors_path is not None:
+        sensors[["sensor_id", "latitude", "longitude", "city", "country"]].to_csv(sensors_path, index=False)
+    offsets = sorted({c[4] for c in CITIES})
+    tz_index = sensors["utc_offset"].map({h: i for i, h in enumerate(offsets)}).to_numpy()
+    dates = _date_strings(offsets)
+
+    def chunks():
+        for chunk_no, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            rng = np.random.default_rng([seed, 1, chunk_no])
+            index = np.arange(start, min(start + CHUNK_ROWS, rows))
+            sensor, day = index // DAYS_PER_SENSOR, index % DAYS_PER_SENSOR
+            day_no = sensors["start"].to_numpy()[sensor] + day
+            season = 1 + 0.4 * np.cos(2 * np.pi * ((START_DATE.dayofyear + day_no) % 365) / 365)
+            value = (sensors["level"].to_numpy()[sensor] * season * rng.lognormal(0, 0.35, len(index))).round(2)
+            spread = value * rng.uniform(0.1, 0.5, len(index))
+            observed = rng.integers(6, 25, len(index))
+            tz = tz_index[sensor]
+            df = pd.DataFrame({
+                "value": np.where(rng.random(len(index)) < 0.005, np.nan, value),
+                "coordinates": None,
+                "sensor_id": SENSOR_ID_BASE + sensor,
+                "flagInfo.hasFlags": np.where(rng.random(len(index)) < 0.02, "True", "False"),
+                "parameter.id": 2, "parameter.name": "pm25", "parameter.units": "µg/m³",
+                "parameter.displayName": None, "period.label": "1day", "period.interval": "24:00:00",
+                "period.datetimeFrom.utc": dates["from.utc"][day_no, tz],
+                "period.datetimeFrom.local": dates["from.local"][day_no, tz],
+                "period.datetimeTo.utc": dates["to.utc"][day_no, tz],
+                "period.datetimeTo.local": dates["to.local"][day_no, tz],
+                "summary.min": (value - spread).clip(0).round(1),
+                "summary.q02": (value - 0.9 * spread).clip(0).round(2),
+                "summary.q25": (value - 0.4 * spread).clip(0).round(2),
+                "summary.median": value.round(1),
+                "summary.q75": (value + 0.4 * spread).round(2),
+                "summary.q98": (value + 0.9 * spread).round(2),
+                "summary.max": (value + spread).round(1),
+                "summary.avg": value,
+                "summary.sd": (spread / 2).round(4),
+                "coverage.expectedCount": 24, "coverage.expectedInterval": "24:00:00",
+                "coverage.observedCount": observed,
+                "coverage.observedInterval": HOURS[observed],
+                "coverage.percentComplete": (observed / 24 * 100).round(),
+                "coverage.percentCoverage": (observed / 24 * 100).round(),
+                "coverage.datetimeFrom.utc": dates["from.utc"][day_no, tz],
+                "coverage.datetimeFrom.local": dates["from.local"][day_no, tz],
+                "coverage.datetimeTo.utc": dates["to.utc"][day_no, tz],
+                "coverage.datetimeTo.local": dates["to.local"][day_no, tz],
+            }, columns=OPENAQ_COLUMNS)
+            yield df
+
+    _write_csv(path, chunks())
+    return sensors
+
+
+# --- Global unemployment: one row per country/indicator/sex/age group, one column per year ---
+
+UNEMPLOYMENT_YEARS = [str(year) for year in range(2014, 2025)]
+AGE_GROUPS = [("15-24", "Youth"), ("25+", "Adults"), ("Under 15", "Children")]
+SEXES = ["Female", "Male"]
+N_COUNTRIES = 189
+
+
+def write_unemployment_raw(path, rows, seed=0):
+    """Write a wide table that melts into ~`rows` rows. The 189 countries x 2 sexes x 3 age groups of the real
+    file repeat under numbered indicator names, so the cube's dimensions stay the real size as rows grow."""
+    raw_rows = max(math.ceil(rows / len(UNEMPLOYMENT_YEARS)), 1)
+    combos = N_COUNTRIES * len(SEXES) * len(AGE_GROUPS)
+    countries = np.array([f"Country {i:03d}" for i in range(N_COUNTRIES)], dtype=object)
+    base = np.random.default_rng([seed, 0]).gamma(2.0, 3.5, combos)
+    chunk_raw = max(CHUNK_ROWS // len(UNEMPLOYMENT_YEARS), 1)
+
+    def chunks():
+        for chunk_no, start in enumerate(range(0, raw_rows, chunk_raw)):
+            rng = np.random.default_rng([seed, 1, chunk_no])
+            index = np.arange(start, min(start + chunk_raw, raw_rows))
+            combo, indicator = index % combos, index // combos
+            country = combo % N_COUNTRIES
+            sex = (combo // N_COUNTRIES) % len(SEXES)
+            age = combo // (N_COUNTRIES * len(SEXES))
+            df = pd.DataFrame({
+                "country_name": countries[country],
+                "indicator_name": np.where(indicator == 0, "Unemployment rate by sex and age",
+                                           "Unemployment rate by sex and age #" + indicator.astype(str)),
+                "sex": np.array(SEXES, dtype=object)[sex],
+                "age_group": np.array([a for a, _ in AGE_GROUPS], dtype=object)[age],
+                "age_categories": np.array([c for _, c in AGE_GROUPS], dtype=object)[age],
+            })
+            trend = rng.normal(0, 0.3, (len(index), 1)).cumsum(axis=1)
+            years = base[combo][:, None] * rng.lognormal(0, 0.08, (len(index), len(UNEMPLOYMENT_YEARS))) + trend
+            years = years.clip(0.1).round(3)
+            # The latest years are the ones the real file is missing
+            missing = rng.random(years.shape) < np.linspace(0, 0.02, len(UNEMPLOYMENT_YEARS))
+            years[missing] = np.nan
+            yield pd.concat([df, pd.DataFrame(years, columns=UNEMPLOYMENT_YEARS)], axis=1)
+
+    _write_csv(path, chunks())
+
+
+# --- World happiness: one row per country and year ---
+
+HAPPINESS_YEARS = list(range(2005, 2025))
+# header name: (mean, sd, min, max, share missing)
+HAPPINESS_INDICATORS = {
+    "Life Ladder": (5.47, 1.12, 2.3, 8.0, 0.0),
+    "Log GDP per capita": (9.37, 1.15, 6.6, 11.7, 0.018),
+    "Social support": (0.81, 0.12, 0.29, 0.99, 0.007),
+    "Healthy life expectancy at birth": (63.4, 7.5, 32.3, 77.1, 0.028),
+    "Freedom to make life choices": (0.74, 0.14, 0.26, 0.99, 0.016),
+    "Generosity": (0.0, 0.16, -0.34, 0.7, 0.046),
+    "Perceptions of corruption": (0.75, 0.19, 0.03, 0.98, 0.056),
+    "Positive affect": (0.71, 0.11, 0.32, 0.94, 0.011),
+    "Negative affect": (0.27, 0.085, 0.08, 0.7, 0.008),
+}
+
+
+def write_happiness_raw(path, rows, seed=0):
+    """Write `rows` country-years (20 years per synthetic country) with the report's indicator columns; the
+    indicators share a per-country latent factor so they correlate with Life Ladder as in the real data."""
+    n_countries = max(math.ceil(rows / len(HAPPINESS_YEARS)), 1)
+    latent = np.random.default_rng([seed, 0]).normal(0, 1, n_countries)
+
+    def chunks():
+        for chunk_no, start in enumerate(range(0, rows, CHUNK_ROWS)):
+            rng = np.random.default_rng([seed, 1, chunk_no])
+            index = np.arange(start, min(start + CHUNK_ROWS, rows))
+            country = index // len(HAPPINESS_YEARS)
+            df = pd.DataFrame({
+                "Country name": pd.Series(country).map("Country {:05d}".format).to_numpy(),
+                "year": np.array(HAPPINESS_YEARS)[index % len(HAPPINESS_YEARS)],
+            })
+            for column, (mean, sd, lo, hi, missing) in HAPPINESS_INDICATORS.items():
+                sign = -1 if column in ("Perceptions of corruption", "Negative affect") else 1
+                z = 0.7 * sign * latent[country] + 0.7 * rng.normal(0, 1, len(index))
+                values = (mean + sd * z).clip(lo, hi).round(3)
+                values[rng.random(len(index)) < missing] = np.nan
+                df[column] = values
+            yield df
+
+    # The real file starts with a byte-order mark
+    _write_csv(path, chunks(), bom=True)
@@ -0,0 +1 @@
+"""Helpers shared by the air quality, unemployment and happiness pipelines."""
@@ -0,0 +1,115 @@
+import datetime
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_MB = float(os.getenv("AGG_CACHE_MAX_MB", "128"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("AGG_CACHE_MAX_ENTRIES", "2048"))
+
+
+def normalize_filters(filters):
+    """Turn widget state into a hashable, order-independent key ("All" and None collapse)."""
+    items = []
+    for name, value in sorted(filters.items()):
+        if value is None or (isinstance(value, str) and value == "All"):
+            value = None
+        elif isinstance(value, (datetime.date, pd.Timestamp)):
+            value = pd.Timestamp(value).isoformat()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        elif isinstance(value, (list, tuple)):
+            value = tuple(normalize_filters({"v": v})[0][1] for v in value)
+        items.append((name, value))
+    return tuple(items)
+
+
+def estimate_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(estimate_bytes(v) for v in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_bytes(v) for v in value) + sys.getsizeof(value)
+    if hasattr(value, "data") and isinstance(getattr(value, "data"), tuple):
+        # plotly Figure: dominated by the trace arrays
+        return sum(estimate_bytes(np.asarray(trace[axis])) for trace in value.data for axis in ("x", "y")
+                   if trace[axis] is not None) + 4096
+    return sys.getsizeof(value)
+
+
+class AggregationCache:
+    """Process-wide LRU cache for chart aggregates, bounded by entry count and estimated bytes.
+
+    Keys combine a dataset version (e.g. its file signature), a chart name and
+    the normalized filter state, so sessions with the same filters share results
+    and a reloaded dataset never serves stale aggregates. Cached values are shared:
+    treat them as read-only.
+    """
+
+    def __init__(self, max_mb=DEFAULT_MAX_MB, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = int(max_mb * 1e6)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, dataset, chart, filters, compute):
+        key = (dataset, chart, normalize_filters(filters))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        # Compute outside the lock so slow aggregations don't serialise other sessions
+        value = compute()
+        size = estimate_bytes(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "mb": round(self.bytes / 1e6, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# One cache per server process, shared by every dashboard and session
+AGG_CACHE = AggregationCache()
+
+
+def cached(dataset, filters):
+    """Bind a dataset/filter state once per rerun: `agg("chart_name", lambda: ...)`."""
+    return lambda chart, compute: AGG_CACHE.get_or_compute(dataset, chart, filters, compute)
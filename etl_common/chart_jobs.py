@@ -0,0 +1,172 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from etl_common.instrumentation import stage
+
+MANIFEST_NAME = ".chart_manifest.json"
+# Worker processes for rendering; defaults to every core
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def content_hash(*paths):
+    """sha256 over the bytes of every file under `paths` (directories are walked in sorted order)."""
+    digest = hashlib.sha256()
+    for path in map(str, paths):
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        else:
+            files = [path] if os.path.exists(path) else []
+        for file in files:
+            digest.update(os.path.relpath(file, path).encode() if file != path else b"")
+            with open(file, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+class ChartJob:
+    """One output image: `render(data, spec) -> Figure`, where `data = prepare(source)`.
+
+    `render` must not touch global pyplot state beyond creating its own figure,
+    so jobs can run in any process and in any order.
+    """
+
+    def __init__(self, filename, render, prepare=None, spec=None):
+        self.filename = filename
+        self.render = render
+        self.prepare = prepare
+        self.spec = spec or {}
+
+    def fingerprint(self, source_key):
+        parts = [source_key, self.filename, json.dumps(self.spec, sort_keys=True, default=str),
+                 inspect.getsource(self.render)]
+        if self.prepare is not None:
+            parts.append(inspect.getsource(self.prepare))
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _rows(data):
+    # Row count of a DataFrame/Series/array; None for query objects and other sources
+    shape = getattr(data, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+def _init_worker(style, rc):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    if style:
+        import seaborn as sns
+        sns.set_theme(style=style)
+    if rc:
+        plt.rcParams.update(rc)
+
+
+def _render(job, data, path):
+    import matplotlib.pyplot as plt
+    with stage(f"render/{job.filename}", rows_in=_rows(data)):
+        fig = job.render(data, job.spec)
+        tmp_path = f"{path}.tmp.png"
+        fig.savefig(tmp_path)
+        plt.close(fig)
+        os.replace(tmp_path, path)
+    return job.filename
+
+
+class ChartRegistry:
+    """Charts of one report, rendered in parallel and skipped when their inputs are unchanged.
+
+        charts = ChartRegistry("outputs")
+
+        @charts.chart("trend.png", prepare=yearly_mean, title="...")
+        def trend(data, spec): ...
+
+        charts.run(load_source, source_key=content_hash(DATA_PATH))
+
+    A job is re-rendered only when the fingerprint of (source_key, filename,
+    spec, render/prepare source code) differs from the manifest or the file is
+    missing. On a no-op run `load_source` is never called. Jobs that share a
+    `prepare` function share its result, computed once in the parent process.
+    """
+
+    def __init__(self, output_dir="outputs", style=None, rc=None):
+        self.output_dir = output_dir
+        self.style = style
+        self.rc = rc
+        self.jobs = []
+
+    def chart(self, filename, prepare=None, **spec):
+        def register(render):
+            self.jobs.append(ChartJob(filename, render, prepare, spec))
+            return render
+        return register
+
+    def _manifest_path(self):
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def _load_manifest(self):
+        if not os.path.exists(self._manifest_path()):
+            return {}
+        with open(self._manifest_path(), "r") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        tmp_path = f"{self._manifest_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def run(self, load_source, source_key, workers=None, force=False):
+        started = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = {} if force else self._load_manifest()
+        fingerprints = {job.filename: job.fingerprint(source_key) for job in self.jobs}
+        stale = [
+            job for job in self.jobs
+            if manifest.get(job.filename) != fingerprints[job.filename]
+            or not os.path.exists(os.path.join(self.output_dir, job.filename))
+        ]
+        stats = {"charts": len(self.jobs), "rendered": 0, "skipped": len(self.jobs) - len(stale), "failed": 0}
+        if not stale:
+            print(f"All {len(self.jobs)} charts in {self.output_dir}/ are up to date.")
+            return stats
+
+        with stage("load_source") as metrics:
+            source = load_source()
+            metrics.rows_out = _rows(source)
+        prepared = {}
+        with stage("prepare_charts"):
+            for job in stale:
+                if job.prepare is not None and job.prepare not in prepared:
+                    prepared[job.prepare] = job.prepare(source)
+
+        workers = min(workers or CHART_WORKERS, len(stale))
+        with stage("render", rows_in=len(stale)) as metrics, ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self.style, self.rc)) as pool:
+            futures = {
+                pool.submit(_render, job, prepared[job.prepare] if job.prepare else source,
+                            os.path.join(self.output_dir, job.filename)): job
+                for job in stale
+            }
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    manifest.pop(job.filename, None)
+                    print(f"Chart {job.filename} failed: {e!r}")
+                    continue
+                stats["rendered"] += 1
+                metrics.add(rows_out=1)
+                manifest[job.filename] = fingerprints[job.filename]
+        self._save_manifest(manifest)
+
+        stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+        print(f"Rendered {stats['rendered']} of {stats['charts']} charts ({stats['skipped']} up to date, "
+              f"{stats['failed']} failed) in {stats['elapsed_s']}s on {workers} workers.")
+        return stats
@@ -0,0 +1,77 @@
+import importlib.util
+import os
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# Launcher label -> project folder whose streamlit_dashboard.py defines warm() and render()
+DASHBOARDS = {
+    "Air Quality": "air-quality-project",
+    "World Happiness": "World-Happiness",
+    "Global Unemployment": "Global-Unemployment",
+}
+# "0" leaves every dataset to be loaded by the first session that opens its dashboard
+WARMUP = os.getenv("DASHBOARD_WARMUP", "1") != "0"
+
+_import_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmup = None
+
+
+def load_dashboard(label):
+    """The dashboard module of `label`, imported once per process.
+
+    The three files share a name, so each is imported from its path under its
+    own module name (`dashboard_air_quality_project`, ...). Importing only sets
+    up paths and cached loaders; data and plotting libraries load in `warm()` /
+    `render()`.
+    """
+    name = "dashboard_" + DASHBOARDS[label].lower().replace("-", "_")
+    # Held across the import so a concurrent session never sees a half-executed module
+    with _import_lock:
+        module = sys.modules.get(name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(name, ROOT / DASHBOARDS[label] / "streamlit_dashboard.py")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            sys.modules[name] = module
+    return module
+
+
+def warm_all():
+    """Import every dashboard and run its `warm()`; returns the seconds each took."""
+    started = time.perf_counter()
+    # Plotly builds its default template on the first figure (~0.6 s); pay it here rather than in a session
+    import plotly.express as px
+
+    px.line(x=[0, 1], y=[0, 1]).to_json()
+    timings = {"plotly": time.perf_counter() - started}
+    for label in DASHBOARDS:
+        started = time.perf_counter()
+        try:
+            load_dashboard(label).warm()
+        except Exception:
+            # Missing data or an unreachable backend is reported again when the dashboard is opened
+            print(f"Warm-up of the {label} dashboard failed:")
+            traceback.print_exc()
+        timings[label] = time.perf_counter() - started
+    print("Dashboards warmed: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
+
+
+def start_warmup():
+    """Run `warm_all` on a background thread, once per process (no-op when DASHBOARD_WARMUP=0).
+
+    Datasets land in the same process-wide `st.cache_resource` caches the
+    dashboards read, whose per-key locks make a session that asks for a dataset
+    mid-load wait for it instead of loading it a second time.
+    """
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None and WARMUP:
+            _warmup = threading.Thread(target=warm_all, name="dashboard-warmup", daemon=True)
+            _warmup.start()
+    return _warmup
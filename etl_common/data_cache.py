@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+
+def file_signature(*paths):
+    """(path, mtime_ns, size) for every existing file under `paths`; changes whenever a source is rewritten."""
+    signature = []
+    for path in map(str, paths):
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        elif os.path.exists(path):
+            files = [path]
+        else:
+            files = []
+        for file in files:
+            stat = os.stat(file)
+            signature.append((file, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def freeze(df):
+    """Rebuild `df` on read-only arrays, so writing into its values (`df.loc[i, col] = x`) raises.
+
+    Only the values are protected: adding, dropping or renaming columns still
+    changes the frame object, which is why `load_frame` hands out shallow copies.
+    """
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy(copy=True)
+            codes.flags.writeable = False
+            columns[column] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        else:
+            values = series.to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[column] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _cached_frame(name, signature, _loader):
+    return freeze(_loader())
+
+
+def load_frame(name, loader, *sources):
+    """Load a dataset once per server process and share it across sessions.
+
+    `loader` is only called when the (mtime, size) signature of `sources` changes,
+    so widget interactions never re-parse files. Each call gets its own shallow
+    copy over the shared read-only arrays: columns a session adds, drops or
+    replaces (`df["month"] = ...`) stay in its copy, and writes into the shared
+    values raise.
+    """
+    return _cached_frame(name, file_signature(*sources), loader).copy(deep=False)
@@ -0,0 +1,50 @@
+import os
+import threading
+
+import duckdb  # type: ignore
+
+
+class DuckDBEngine:
+    """Processed datasets as views in an embedded, in-memory DuckDB database.
+
+        engine = DuckDBEngine()
+        engine.register("pm25", PARQUET_PATH, CSV_PATH)
+        engine.query("SELECT country, avg(pm25) FROM pm25 GROUP BY 1")
+
+    Views scan the Parquet dataset (hive partitions included) when it exists,
+    else the CSV it mirrors, so nothing is copied into DuckDB and no server is
+    involved. Each query runs on its own cursor, so one engine can be shared
+    across Streamlit sessions.
+    """
+
+    def __init__(self, threads=None):
+        self.conn = duckdb.connect(":memory:")
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        self.sources = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, parquet_path=None, csv_path=None):
+        if parquet_path is not None and os.path.exists(parquet_path):
+            path = str(parquet_path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "**", "*.parquet")
+            source = f"read_parquet('{path}', hive_partitioning = true)"
+        elif csv_path is not None and os.path.exists(csv_path):
+            source = f"read_csv_auto('{csv_path}', header = true)"
+        else:
+            raise FileNotFoundError(f"No Parquet or CSV found for dataset {name!r}")
+        with self._lock:
+            self.conn.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM {source}')
+        self.sources[name] = source
+        return self
+
+    def query(self, sql, params=None):
+        """Run `sql` (with `?` placeholders for `params`) and return the result as a DataFrame."""
+        with self._lock:
+            cursor = self.conn.cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
@@ -0,0 +1,357 @@
+"""Per-stage performance metrics for the ETL scripts, appended to a JSON-lines log.
+
+    from etl_common.instrumentation import network, stage, timed
+
+    with stage("clean", rows_in=len(df)) as metrics:
+        df = clean(df)
+        metrics.add(rows_out=len(df))
+
+    @timed("clean")               # rows_out = len(result); generators sum the chunks they yield
+    def clean(...): ...
+
+    network(response)             # inside a stage: one HTTP call and its body size
+
+Every stage writes one record to ETL_METRICS_PATH (default
+`.pipeline/metrics.jsonl` at the repo root): run id, commit, project, script,
+stage, wall and CPU seconds, memory, rows in/out, network calls and bytes, and
+status. Memory is the stage's own: `peak_rss_mb` is the highest resident set
+sampled while it ran (every ETL_RSS_INTERVAL seconds, default 0.05; at each
+item for generator stages) and `rss_delta_mb` what it left allocated;
+`process_peak_rss_mb` is the process's lifetime high-water mark. Current RSS is
+read from /proc, so only the latter is recorded on macOS. Records of one
+pipeline run share ETL_RUN_ID (set by run_pipeline.py, else on a script's first
+stage, and inherited by worker processes). Set ETL_METRICS=0 to disable.
+Compare the latest run with the one before:
+
+    python -m etl_common.instrumentation [--run RUN_ID] [--baseline RUN_ID] [--threshold 1.25]
+"""
+import argparse
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, the process peak RSS is not recorded
+    resource = None
+
+ROOT = Path(__file__).resolve().parents[1]
+METRICS_PATH = os.getenv("ETL_METRICS_PATH") or str(ROOT / ".pipeline" / "metrics.jsonl")
+ENABLED = os.getenv("ETL_METRICS", "1") != "0"
+RSS_INTERVAL_S = float(os.getenv("ETL_RSS_INTERVAL", "0.05"))
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_lock = threading.Lock()
+_open = []      # stages currently running in this process; network() and the RSS sampler count towards all
+_records = []   # stages finished in this process, for print_summary()
+_commit = None
+_run_id = None
+_sampler = None
+
+
+def run_id():
+    """Id shared by the records of one run: ETL_RUN_ID, or one made on first use.
+
+    A made-up id is exported to the environment then, so child processes
+    started afterwards (chart workers) join the run.
+    """
+    global _run_id
+    if _run_id is None:
+        _run_id = os.environ.get("ETL_RUN_ID") or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        os.environ["ETL_RUN_ID"] = _run_id
+    return _run_id
+
+
+def _git_commit():
+    global _commit
+    if _commit is None:
+        try:
+            _commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                     text=True, timeout=5).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            _commit = ""
+    return _commit or None
+
+
+def _process_peak_rss_mb():
+    """High-water mark of the whole process so far, not of any one stage."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _rss_mb():
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * PAGE_SIZE / (1 << 20)
+
+
+def _sample_rss():
+    # Runs while any stage is open; the next stage to open starts a new sampler
+    global _sampler
+    while True:
+        time.sleep(RSS_INTERVAL_S)
+        rss = _rss_mb()
+        with _lock:
+            if not _open:
+                _sampler = None
+                return
+            for metrics in _open:
+                metrics.sample_rss(rss)
+
+
+class StageMetrics:
+    """Counters of one running stage; `add` is safe to call from worker threads."""
+
+    def __init__(self, name, rows_in=None, **extra):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.net_calls = 0
+        self.net_bytes = 0
+        self.extra = extra
+        self.rss_start = self.rss_peak = self.rss_end = None
+
+    def sample_rss(self, rss):
+        if rss is not None:
+            self.rss_start = rss if self.rss_start is None else self.rss_start
+            self.rss_peak = rss if self.rss_peak is None else max(self.rss_peak, rss)
+            self.rss_end = rss
+
+    def add(self, rows_in=None, rows_out=None, net_calls=0, net_bytes=0):
+        with _lock:
+            if rows_in is not None:
+                self.rows_in = (self.rows_in or 0) + int(rows_in)
+            if rows_out is not None:
+                self.rows_out = (self.rows_out or 0) + int(rows_out)
+            self.net_calls += net_calls
+            self.net_bytes += net_bytes
+
+    def set(self, **extra):
+        """Attach extra fields (e.g. cache hit rates) to the stage's record."""
+        self.extra.update(extra)
+
+
+def network(response=None, nbytes=None):
+    """Count one network call (and its response body size) towards every stage open in this process."""
+    if nbytes is None:
+        content = getattr(response, "content", None)
+        nbytes = len(content) if content is not None else 0
+    with _lock:
+        for metrics in _open:
+            metrics.net_calls += 1
+            metrics.net_bytes += nbytes
+
+
+def _write(record):
+    os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+    line = json.dumps(record, default=str) + "\n"
+    with _lock, open(METRICS_PATH, "a") as f:
+        f.write(line)
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def _finish(metrics, started_at, wall_s, cpu_s, status):
+    delta = metrics.rss_end - metrics.rss_start if metrics.rss_start is not None else None
+    record = {
+        "run_id": run_id(), "commit": _git_commit(), "project": os.path.basename(os.getcwd()),
+        "script": os.path.basename(sys.argv[0]), "stage": metrics.name, "started_at": started_at,
+        "wall_s": round(wall_s, 4), "cpu_s": round(cpu_s, 4), "peak_rss_mb": _round(metrics.rss_peak),
+        "rss_delta_mb": _round(delta), "process_peak_rss_mb": _process_peak_rss_mb(),
+        "rows_in": metrics.rows_in, "rows_out": metrics.rows_out, "net_calls": metrics.net_calls,
+        "net_bytes": metrics.net_bytes, "status": status, **metrics.extra,
+    }
+    _records.append(record)
+    _write(record)
+
+
+@contextmanager
+def stage(name, rows_in=None, **extra):
+    """Time the block as stage `name` and append its record to the metrics log."""
+    global _sampler
+    metrics = StageMetrics(name, rows_in, **extra)
+    if not ENABLED:
+        yield metrics
+        return
+    run_id()
+    metrics.sample_rss(_rss_mb())
+    with _lock:
+        _open.append(metrics)
+        if _sampler is None:
+            _sampler = threading.Thread(target=_sample_rss, name="rss-sampler", daemon=True)
+            _sampler.start()
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    wall, cpu = time.perf_counter(), time.process_time()
+    status = "ok"
+    try:
+        yield metrics
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        with _lock:
+            _open.remove(metrics)
+        metrics.sample_rss(_rss_mb())
+        _finish(metrics, started_at, time.perf_counter() - wall, time.process_time() - cpu, status)
+
+
+def _timed_generator(fn, name, rows_in):
+    # Only the time spent producing items counts, not the consumer's work between them
+    @wraps(fn)
+    def generator(*args, **kwargs):
+        metrics = StageMetrics(name, rows_in)
+        started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        items, wall_s, cpu_s, status = fn(*args, **kwargs), 0.0, 0.0, "ok"
+        if ENABLED:
+            run_id()
+            metrics.sample_rss(_rss_mb())
+        try:
+            while True:
+                wall, cpu = time.perf_counter(), time.process_time()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    wall_s += time.perf_counter() - wall
+                    cpu_s += time.process_time() - cpu
+                    if ENABLED:
+                        metrics.sample_rss(_rss_mb())
+                if hasattr(item, "__len__"):
+                    metrics.add(rows_out=len(item))
+                yield item
+        except GeneratorExit:  # the caller stopped early; not a failure
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if ENABLED:
+                _finish(metrics, started_at, wall_s, cpu_s, status)
+    return generator
+
+
+def timed(name=None, rows_in=None):
+    """Decorator: run the function as a stage, with rows_out = len(result) when it has one.
+
+    Generator functions are timed across the items they produce (not the
+    caller's work between them), with rows_out summed over their lengths.
+    """
+    def decorate(fn):
+        stage_name = name or fn.__name__
+        if inspect.isgeneratorfunction(fn):
+            return _timed_generator(fn, stage_name, rows_in)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, rows_in) as metrics:
+                result = fn(*args, **kwargs)
+                if metrics.rows_out is None and hasattr(result, "__len__") and not isinstance(result, str):
+                    metrics.rows_out = len(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def _format(value, spec):
+    return "" if value is None else format(value, spec)
+
+
+def summary(records):
+    """Text table of stage records."""
+    lines = [f"{'stage':<36}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'rows in':>10}{'rows out':>10}"
+             f"{'calls':>7}{'net KB':>9}"]
+    for r in records:
+        lines.append(f"{r['stage'][:35]:<36}{_format(r['wall_s'], '.2f'):>9}{_format(r['cpu_s'], '.2f'):>9}"
+                     f"{_format(r['peak_rss_mb'], '.0f'):>9}{_format(r['rows_in'], 'd'):>10}"
+                     f"{_format(r['rows_out'], 'd'):>10}{r['net_calls']:>7}{r['net_bytes'] / 1024:>9.1f}"
+                     + ("  ERROR" if r["status"] != "ok" else ""))
+    return "\n".join(lines)
+
+
+def print_summary():
+    """Print the stages recorded by this process."""
+    if _records:
+        print(f"\nStage metrics (run {run_id()}, log {METRICS_PATH}):")
+        print(summary(_records))
+
+
+def load_records(path=METRICS_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(records, run_id=None, baseline=None, threshold=1.25):
+    """Rows of (project, stage, current record, baseline record, ratio, regressed) for one run against another.
+
+    Defaults to the latest run against the one before it. A stage regresses when
+    its wall time exceeds `threshold` times the baseline's (and by 0.1 s or more,
+    so noise on tiny stages is ignored).
+    """
+    runs = list(dict.fromkeys(r["run_id"] for r in records))
+    if not runs:
+        return []
+    run_id = run_id or runs[-1]
+    if baseline is None:
+        earlier = runs[:runs.index(run_id)]
+        baseline = earlier[-1] if earlier else None
+    def keyed(run):
+        # A stage that runs twice in one script (e.g. a generator read in two passes) is matched by occurrence
+        seen, keys = {}, {}
+        for r in records:
+            if r["run_id"] == run:
+                n = seen[(r["project"], r["stage"])] = seen.get((r["project"], r["stage"]), 0) + 1
+                keys[(r["project"], r["stage"], n)] = r
+        return keys
+
+    before = keyed(baseline)
+    rows = []
+    for (project, name, n), r in keyed(run_id).items():
+        base = before.get((project, name, n))
+        ratio = r["wall_s"] / base["wall_s"] if base and base["wall_s"] else None
+        regressed = ratio is not None and ratio > threshold and r["wall_s"] - base["wall_s"] >= 0.1
+        rows.append((project, name, r, base, ratio, regressed))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage metrics of one ETL run, compared with an earlier run.")
+    parser.add_argument("--run", default=None, help="run id to report (default: latest)")
+    parser.add_argument("--baseline", default=None, help="run id to compare with (default: the previous run)")
+    parser.add_argument("--threshold", type=float, default=1.25, help="wall-time ratio flagged as a regression")
+    parser.add_argument("--path", default=METRICS_PATH, help="metrics log")
+    args = parser.parse_args()
+
+    rows = compare(load_records(args.path), args.run, args.baseline, args.threshold)
+    if not rows:
+        sys.exit(f"No stage metrics in {args.path}")
+    current = rows[0][2]
+    print(f"Run {current['run_id']} (commit {current['commit']})")
+    print(f"{'project':<22}{'stage':<36}{'wall s':>9}{'before':>9}{'ratio':>7}{'cpu s':>9}{'peak MB':>9}"
+          f"{'rows out':>10}{'calls':>7}")
+    for project, name, r, base, ratio, regressed in rows:
+        print(f"{project[:21]:<22}{name[:35]:<36}{r['wall_s']:>9.2f}{_format(base and base['wall_s'], '.2f'):>9}"
+              f"{_format(ratio, '.2f'):>7}{r['cpu_s']:>9.2f}{_format(r['peak_rss_mb'], '.0f'):>9}"
+              f"{_format(r['rows_out'], 'd'):>10}{r['net_calls']:>7}"
+              + ("  REGRESSION" if regressed else "") + ("  ERROR" if r["status"] != "ok" else ""))
+    regressions = sum(row[5] for row in rows)
+    print(f"{len(rows)} stages, {regressions} slower than {args.threshold}x the baseline.")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,126 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+
+
+def write_dataset(df, path, dtypes, partition_cols=("year",)):
+    """Write `df` as a hive-partitioned Parquet dataset with explicit column types.
+
+    `dtypes` maps every stored column to a pandas dtype; columns not listed are
+    dropped. The dataset is written to a sibling temp directory first and then
+    swapped in, so a failed write leaves the previous dataset in place.
+    """
+    with DatasetWriter(path, dtypes, partition_cols) as writer:
+        writer.write(df)
+
+
+class DatasetWriter:
+    """`write_dataset`, one chunk at a time: each `write(df)` adds files to every partition it touches.
+
+        with DatasetWriter(path, dtypes) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+
+    Categorical columns are stored with 32-bit dictionary indices whatever the
+    chunk's category count, so all files share one schema. The dataset is only
+    swapped in when the block exits without an error. A dataset without rows
+    (which would have no partition directories) is written as one empty,
+    unpartitioned file, so every declared column, partition columns included,
+    still reads back.
+    """
+
+    def __init__(self, path, dtypes, partition_cols=("year",)):
+        self.path = str(path)
+        self.tmp_path = f"{self.path}.tmp"
+        self.dtypes = dtypes
+        self.partition_cols = list(partition_cols)
+        self.parts = 0
+        self.rows = 0
+
+    def __enter__(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+        return self
+
+    def _table(self, df):
+        table = pa.Table.from_pandas(df[list(self.dtypes)].astype(self.dtypes), preserve_index=False)
+        schema = pa.schema([
+            # A categorical without categories (no rows) has null values; store it as the strings it holds
+            field.with_type(pa.dictionary(pa.int32(), pa.string() if pa.types.is_null(field.type.value_type)
+                                          else field.type.value_type))
+            if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ], metadata=table.schema.metadata)
+        return table.cast(schema)
+
+    def write(self, df):
+        if df.empty:
+            return
+        pq.write_to_dataset(self._table(df), self.tmp_path, partition_cols=self.partition_cols,
+                            basename_template=f"part-{self.parts}-{{i}}.parquet")
+        self.parts += 1
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            return False
+        if not self.rows:
+            empty = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in self.dtypes.items()})
+            pq.write_table(self._table(empty), os.path.join(self.tmp_path, "part-empty.parquet"))
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp_path, self.path)
+        return False
+
+
+def read_dataset(path, columns=None, filters=None):
+    """Read a Parquet dataset, pushing column projection and row filters down to the scan.
+
+    `filters` uses the pandas/pyarrow DNF form, e.g. [("year", ">=", 2020), ("country", "==", "India")].
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    expression = pq.filters_to_expression(filters) if filters else None
+    df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+    # Hive partition values are inferred as int32; widen them to match the CSV path. Without partition
+    # directories pyarrow reports the files' own columns as the partitioning, so those are left as stored.
+    stored = next(dataset.get_fragments(), None)
+    stored = set(stored.physical_schema.names) if stored is not None else set()
+    for field in dataset.partitioning.schema if dataset.partitioning else []:
+        if field.name in df.columns and field.name not in stored and pa.types.is_integer(field.type):
+            df[field.name] = df[field.name].astype("int64")
+    return df
+
+
+_OPS = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "in": lambda s, v: s.isin(v),
+    "not in": lambda s, v: ~s.isin(v),
+}
+
+
+def read_processed(parquet_path, csv_path, columns=None, filters=None, parse_dates=None):
+    """Read a processed dataset from Parquet when it exists, else from the CSV it mirrors.
+
+    The CSV fallback honours the same `columns`/`filters` arguments (after parsing),
+    so callers behave identically on either path.
+    """
+    if os.path.exists(parquet_path):
+        return read_dataset(parquet_path, columns=columns, filters=filters)
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + [column for column, _, _ in filters or []]))
+    if parse_dates and usecols is not None:
+        parse_dates = [column for column in parse_dates if column in usecols]
+    df = pd.read_csv(csv_path, usecols=usecols, parse_dates=parse_dates)
+    for column, op, value in filters or []:
+        df = df[_OPS[op](df[column], value)]
+    return df[columns].reset_index(drop=True) if columns is not None else df
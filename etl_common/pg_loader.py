@@ -0,0 +1,181 @@
+import io
+import time
+
+import pandas as pd
+import psycopg2  # type: ignore
+from psycopg2.extras import execute_values  # type: ignore
+
+from etl_common.instrumentation import stage
+
+DEFAULT_CHUNK_SIZE = 50_000
+INTEGER_TYPES = ("INT", "INTEGER", "BIGINT", "SMALLINT")
+
+
+def create_table(conn, schema, table=None):
+    table = table or schema.name
+    with conn.cursor() as cur:
+        cur.execute(schema.create_sql(table))
+        # Tables created before a column was added to the schema pick it up here
+        for column, sql_type in schema.columns:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {sql_type}")
+        for name, definition in schema.indexes:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {name.format(table=table)} ON {table} {definition}")
+    conn.commit()
+    ensure_natural_key(conn, schema, table)
+
+
+def ensure_natural_key(conn, schema, table=None):
+    """Back the natural key with a unique index, collapsing duplicates left by earlier append-only loads."""
+    table = table or schema.name
+    if not schema.natural_key:
+        return
+    index = f"{table}_natural_key_idx"
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_indexes WHERE tablename = %s AND indexname = %s", (table, index))
+        if cur.fetchone() is None:
+            # Keep the most recently written copy of each key
+            same_key = " AND ".join(f"a.{column} = b.{column}" for column in schema.natural_key)
+            cur.execute(f"DELETE FROM {table} a USING {table} b WHERE a.ctid < b.ctid AND {same_key}")
+            if cur.rowcount:
+                print(f"Removed {cur.rowcount} duplicate rows from {table}")
+            cur.execute(f"CREATE UNIQUE INDEX {index} ON {table} ({', '.join(schema.natural_key)})")
+    conn.commit()
+
+
+def iter_chunks(data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame slices of `chunk_size` rows; iterables of frames pass through untouched."""
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        yield from data
+
+
+def _prepare(chunk, schema):
+    # Columns the source doesn't carry (e.g. coordinates before enrichment) load as NULL
+    chunk = chunk.reindex(columns=schema.column_names)
+    # Integer columns that picked up NaNs are float in pandas; COPY would reject "2014.0"
+    for column, sql_type in schema.columns:
+        if sql_type.upper() in INTEGER_TYPES:
+            chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype("Int64")
+    return chunk
+
+
+def _copy_chunk(cur, table, chunk):
+    buf = io.StringIO()
+    chunk.to_csv(buf, header=False, index=False)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(chunk.columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _insert_chunk(cur, table, chunk, page_size=1000):
+    rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+    execute_values(cur, f"INSERT INTO {table} ({', '.join(chunk.columns)}) VALUES %s", list(rows), page_size=page_size)
+
+
+def _merge_sql(schema, table, staging, updates=None, keep_existing=False):
+    """INSERT ... ON CONFLICT from `staging`, updating the `updates` value columns (default: all) of existing keys.
+
+    With `keep_existing`, a NULL in the incoming row keeps the stored value.
+    """
+    columns = ", ".join(schema.column_names)
+    key = ", ".join(schema.natural_key)
+    values = schema.value_columns if updates is None else updates
+    if values:
+        incoming = [f"COALESCE(EXCLUDED.{column}, {table}.{column})" if keep_existing else f"EXCLUDED.{column}"
+                    for column in values]
+        # Skip the write entirely when nothing changed, so reloading the same data is a no-op
+        current = ", ".join(f"{table}.{column}" for column in values)
+        assignments = ", ".join(f"{column} = {value}" for column, value in zip(values, incoming))
+        action = f"DO UPDATE SET {assignments} WHERE ({current}) IS DISTINCT FROM ({', '.join(incoming)})"
+    else:
+        action = "DO NOTHING"
+    # DISTINCT ON keeps the last staged row per key; ON CONFLICT cannot touch one row twice
+    return (
+        f"INSERT INTO {table} ({columns}) "
+        f"SELECT DISTINCT ON ({key}) {columns} FROM {staging} ORDER BY {key}, ctid DESC "
+        f"ON CONFLICT ({key}) {action}"
+    )
+
+
+def _load_chunk(cur, schema, table, chunk, method, upsert, updates=None, keep_existing=False):
+    """Write one chunk and return the number of rows inserted or updated."""
+    target = table
+    if upsert:
+        target = f"{table}_staging"
+        cur.execute(
+            f"CREATE TEMP TABLE {target} ON COMMIT DROP AS "
+            f"SELECT {', '.join(schema.column_names)} FROM {table} WITH NO DATA"
+        )
+    if method == "copy":
+        _copy_chunk(cur, target, chunk)
+    else:
+        _insert_chunk(cur, target, chunk)
+    if not upsert:
+        return len(chunk)
+    cur.execute(_merge_sql(schema, table, target, updates, keep_existing))
+    return cur.rowcount
+
+
+def load_dataframe(conn, schema, data, method="copy", chunk_size=DEFAULT_CHUNK_SIZE, table=None, create=True,
+                   upsert=None, keep_existing=False):
+    """Bulk-load `data` (a DataFrame or an iterable of DataFrames) into `schema`'s table.
+
+    Each chunk is written in its own transaction via `COPY FROM STDIN`. If the
+    server refuses COPY (e.g. behind a pooler that does not support it), the
+    chunk is retried with batched `execute_values` and the rest of the load
+    stays on that path.
+
+    When the schema declares a natural key (and `upsert` is not False), chunks
+    are staged in a temp table and merged with `INSERT ... ON CONFLICT DO
+    UPDATE`, so re-running a load does not duplicate rows. Only the value
+    columns the source frame carries are updated; `keep_existing` also keeps
+    stored values where the incoming ones are NULL (for sources that only
+    sometimes carry a column). Returns a dict with row count, rows changed,
+    elapsed time and rows/sec.
+    """
+    table = table or schema.name
+    if upsert is None:
+        upsert = bool(schema.natural_key)
+    if create:
+        create_table(conn, schema, table)
+
+    rows = changed = 0
+    started = time.perf_counter()
+    with stage(f"load/{table}") as metrics:
+        for chunk in iter_chunks(data, chunk_size):
+            if chunk.empty:
+                continue
+            # Columns missing from the source load as NULL into new rows but never overwrite existing ones
+            updates = [column for column in schema.value_columns if column in chunk.columns]
+            chunk = _prepare(chunk, schema)
+            with conn.cursor() as cur:
+                try:
+                    changed += _load_chunk(cur, schema, table, chunk, method, upsert, updates, keep_existing)
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    if method != "copy":
+                        raise
+                    print(f"COPY into {table} failed ({e.__class__.__name__}), falling back to execute_values")
+                    method = "values"
+                    changed += _load_chunk(cur, schema, table, chunk, method, upsert, updates, keep_existing)
+            conn.commit()
+            rows += len(chunk)
+        metrics.add(rows_in=rows, rows_out=changed)
+        metrics.set(method=method)
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "table": table,
+        "method": method,
+        "mode": "upsert" if upsert else "append",
+        "rows": rows,
+        "changed": changed,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed) if elapsed else 0,
+    }
+    print(
+        f"Loaded {rows} rows into {table} ({changed} inserted/updated) in {elapsed:.2f}s "
+        f"({stats['rows_per_s']:,} rows/s via {method} {stats['mode']})"
+    )
+    return stats
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2  # type: ignore
+from dotenv import load_dotenv  # type: ignore
+from psycopg2 import extensions, pool  # type: ignore
+
+load_dotenv()
+
+# libpq-style settings; the defaults match the local setup described in the READMEs
+PG_HOST = os.getenv("PGHOST", "localhost")
+PG_PORT = int(os.getenv("PGPORT", "5433"))
+PG_USER = os.getenv("PGUSER", "saisrivatsat")
+# A full DSN/URI (e.g. "postgresql://user:pw@host:5432/db") replaces the settings above; if it names a
+# database, every pipeline uses that one
+PG_DSN = os.getenv("PG_DSN", "")
+# psycopg2 keeps at most PG_POOL_MIN idle connections open; extra ones are closed when returned
+POOL_MIN = int(os.getenv("PG_POOL_MIN", "2"))
+POOL_MAX = int(os.getenv("PG_POOL_MAX", "8"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "300000"))
+# Connections idle longer than this are pinged before being handed out
+HEALTHCHECK_IDLE_S = float(os.getenv("PG_HEALTHCHECK_IDLE_S", "30"))
+
+
+def connection_dsn(dbname):
+    if PG_DSN:
+        params = extensions.parse_dsn(PG_DSN)
+        params.setdefault("dbname", dbname)
+    else:
+        params = {"host": PG_HOST, "port": PG_PORT, "user": PG_USER, "dbname": dbname}
+    return extensions.make_dsn(**params)
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool for one database.
+
+    `getconn` blocks while all `maxconn` connections are checked out instead of
+    raising, every connection carries a server-side `statement_timeout`, and
+    connections that sat idle are health-checked (and replaced if dead) before
+    reuse. Prefer the `connection()` / `transaction()` context managers.
+    """
+
+    def __init__(self, dbname, minconn=POOL_MIN, maxconn=POOL_MAX, statement_timeout_ms=STATEMENT_TIMEOUT_MS):
+        self.dbname = dbname
+        self.maxconn = maxconn
+        self._pool = pool.ThreadedConnectionPool(
+            minconn, maxconn, connection_dsn(dbname), options=f"-c statement_timeout={statement_timeout_ms}"
+        )
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self.checkouts = 0
+        self.replaced = 0
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < HEALTHCHECK_IDLE_S:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        self._slots.acquire()
+        try:
+            conn = self._pool.getconn()
+            while not self._healthy(conn):
+                self._pool.putconn(conn, close=True)
+                self.replaced += 1
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        self.checkouts += 1
+        return conn
+
+    def putconn(self, conn):
+        # Never hand the next caller a connection mid-transaction
+        if not conn.closed and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=bool(conn.closed))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; the caller commits. Uncommitted work is rolled back on return."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection for one transactional batch: commit on success, roll back on error."""
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self):
+        self._pool.closeall()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dbname, statement_timeout_ms=STATEMENT_TIMEOUT_MS):
+    """Process-wide pool per (database, timeout), created on first use."""
+    key = (dbname, statement_timeout_ms)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(dbname, statement_timeout_ms=statement_timeout_ms)
+        return _pools[key]
+
+
+def connection(dbname):
+    return get_pool(dbname).connection()
+
+
+def transaction(dbname):
+    return get_pool(dbname).transaction()
+
+
+def close_all():
+    with _pools_lock:
+        for db_pool in _pools.values():
+            db_pool.close()
+        _pools.clear()
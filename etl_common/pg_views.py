@@ -0,0 +1,119 @@
+import time
+
+
+class MaterializedView:
+    """A materialized view over a loaded table, with the indexes that serve its read paths.
+
+    `unique_key` is backed by a unique index, which is what lets
+    `REFRESH MATERIALIZED VIEW CONCURRENTLY` run without blocking readers.
+    Views store sums and counts next to averages so coarser levels (all
+    cities, a date range) can be re-aggregated exactly.
+    """
+
+    def __init__(self, name, query, unique_key, indexes=None):
+        self.name = name
+        self.query = query
+        self.unique_key = unique_key
+        self.indexes = indexes or []
+
+    def create_sql(self):
+        return f"CREATE MATERIALIZED VIEW IF NOT EXISTS {self.name} AS\n{self.query}\nWITH DATA"
+
+
+_PM25_MEASURES = "SUM(pm25) AS pm25_sum, COUNT(pm25) AS pm25_count, MAX(pm25) AS pm25_max"
+_PM25_ROWS = "FROM pm25_data WHERE pm25 IS NOT NULL AND city IS NOT NULL AND country IS NOT NULL"
+
+PM25_VIEWS = [
+    MaterializedView(
+        "pm25_daily",
+        f"SELECT date_trunc('day', date)::date AS day, country, city, {_PM25_MEASURES} {_PM25_ROWS} GROUP BY 1, 2, 3",
+        unique_key=["day", "country", "city"],
+        indexes=[("pm25_daily_country_city_idx", "(country, city, day)")],
+    ),
+    MaterializedView(
+        "pm25_monthly",
+        f"SELECT date_trunc('month', date)::date AS month, country, city, {_PM25_MEASURES} {_PM25_ROWS} "
+        f"GROUP BY 1, 2, 3",
+        unique_key=["country", "city", "month"],
+    ),
+    MaterializedView(
+        "pm25_weekday",
+        f"SELECT EXTRACT(ISODOW FROM date)::int AS weekday, country, city, {_PM25_MEASURES} {_PM25_ROWS} "
+        f"GROUP BY 1, 2, 3",
+        unique_key=["country", "city", "weekday"],
+    ),
+    MaterializedView(
+        "pm25_yearly",
+        f"SELECT EXTRACT(YEAR FROM date)::int AS year, country, city, {_PM25_MEASURES} {_PM25_ROWS} GROUP BY 1, 2, 3",
+        unique_key=["country", "city", "year"],
+    ),
+    MaterializedView(
+        # Top-N cities is an index scan on pm25_avg with a LIMIT
+        "pm25_city_avg",
+        f"SELECT country, city, {_PM25_MEASURES}, AVG(pm25) AS pm25_avg {_PM25_ROWS} GROUP BY 1, 2",
+        unique_key=["country", "city"],
+        indexes=[("pm25_city_avg_rank_idx", "(pm25_avg DESC)")],
+    ),
+]
+
+REFRESH_LOG_SQL = """
+CREATE TABLE IF NOT EXISTS matview_refresh_log (
+    view_name TEXT PRIMARY KEY,
+    refreshed_at TIMESTAMPTZ NOT NULL,
+    elapsed_s FLOAT
+)
+"""
+
+
+def create_views(conn, views):
+    with conn.cursor() as cur:
+        cur.execute(REFRESH_LOG_SQL)
+        for view in views:
+            cur.execute(view.create_sql())
+            cur.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {view.name}_key_idx ON {view.name} ({', '.join(view.unique_key)})"
+            )
+            for name, definition in view.indexes:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {view.name} {definition}")
+    conn.commit()
+
+
+def refresh_views(conn, views, concurrently=True):
+    """Create any missing views, then refresh each one in its own transaction.
+
+    CONCURRENTLY keeps the old contents readable while the new ones are
+    computed (dashboards never block on a load); it falls back to a plain
+    refresh for views that were never populated. Refresh times are recorded in
+    `matview_refresh_log`, which readers use as a cache version.
+    """
+    create_views(conn, views)
+    timings = {}
+    for view in views:
+        started = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute("SELECT ispopulated FROM pg_matviews WHERE matviewname = %s", (view.name,))
+            populated = cur.fetchone()[0]
+            mode = "CONCURRENTLY " if concurrently and populated else ""
+            cur.execute(f"REFRESH MATERIALIZED VIEW {mode}{view.name}")
+            elapsed = time.perf_counter() - started
+            cur.execute(
+                "INSERT INTO matview_refresh_log (view_name, refreshed_at, elapsed_s) VALUES (%s, now(), %s) "
+                "ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at, "
+                "elapsed_s = EXCLUDED.elapsed_s",
+                (view.name, elapsed),
+            )
+        conn.commit()
+        timings[view.name] = round(elapsed, 3)
+    print("Refreshed materialized views: " + ", ".join(f"{name} ({s:.2f}s)" for name, s in timings.items()))
+    return timings
+
+
+def views_version(conn, views):
+    """Latest refresh time across `views` (None if never refreshed); changes after every refresh."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('matview_refresh_log')")
+        if cur.fetchone()[0] is None:
+            return None
+        cur.execute("SELECT max(refreshed_at) FROM matview_refresh_log WHERE view_name = ANY(%s)",
+                    ([view.name for view in views],))
+        return cur.fetchone()[0]
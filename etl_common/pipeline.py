@@ -0,0 +1,274 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from etl_common.chart_jobs import content_hash
+from etl_common.instrumentation import run_id
+
+# Concurrent stages; each stage is its own process, so this defaults to every core
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def is_table(resource):
+    """Resources named `<store>:<table>` (e.g. "postgres:pm25_data") are tables, everything else a path."""
+    return ":" in resource and not os.path.isabs(resource)
+
+
+def local_modules(script, search_paths):
+    """The script plus every module it (transitively) imports from `search_paths`, as sorted file paths.
+
+    Only modules that resolve to a file under one of the search paths count, so
+    third-party packages never enter a stage's fingerprint.
+    """
+    seen, pending = set(), [os.path.abspath(script)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, "r") as f:
+            tree = ast.parse(f.read(), filename=path)
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.add(node.module)
+                names.update(f"{node.module}.{alias.name}" for alias in node.names)
+        for name in names:
+            for root in [os.path.dirname(path), *search_paths]:
+                candidate = os.path.join(root, *name.split(".")) + ".py"
+                if os.path.isfile(candidate):
+                    pending.append(os.path.abspath(candidate))
+                    break
+    return sorted(seen)
+
+
+def count_rows(path):
+    """Data rows in a CSV (lines minus the header) or a Parquet file/dataset; None for anything else."""
+    if not os.path.exists(path):
+        return None
+    if path.endswith(".parquet"):
+        import pyarrow.dataset as ds
+        return ds.dataset(path, format="parquet", partitioning="hive").count_rows()
+    if path.endswith(".csv"):
+        lines = 0
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                lines += block.count(b"\n")
+        return max(lines - 1, 0)
+    return None
+
+
+class Stage:
+    """One script of a pipeline, run as `python <script> <args>` from `cwd`.
+
+    `inputs`/`outputs` are paths relative to `cwd` or `<store>:<table>` names;
+    they wire the DAG (a stage waits for every selected stage producing one of
+    its inputs) and version it: the stage is skipped when the hash of its input
+    files, upstream table versions, code (the script and its local imports),
+    args and `env` values matches the manifest and its file outputs exist.
+    `always` stages (e.g. API fetches, whose source cannot be hashed) run every
+    time. `rows` names the file whose row count is recorded (default: the
+    first CSV output). `after` names stages that must finish first when both are
+    selected, without versioning this stage on them (for stages writing the same table).
+    """
+
+    def __init__(self, name, script, cwd, inputs=(), outputs=(), args=(), env=(), group="process",
+                 always=False, rows=None, after=()):
+        self.name = name
+        self.script = script
+        self.cwd = cwd
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.env = list(env)
+        self.group = group
+        self.always = always
+        self.rows = rows or next((path for path in self.outputs if path.endswith(".csv")), None)
+        self.after = list(after)
+
+    def path(self, resource):
+        return os.path.join(self.cwd, resource)
+
+    def fingerprint(self, table_versions, search_paths):
+        parts = [self.name, json.dumps(self.args), json.dumps({key: os.getenv(key) for key in self.env})]
+        for module in local_modules(self.path(self.script), search_paths):
+            parts.append(content_hash(module))
+        for resource in self.inputs:
+            parts.append(table_versions.get(resource, "") if is_table(resource) else content_hash(self.path(resource)))
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def outputs_exist(self):
+        return all(os.path.exists(self.path(resource)) for resource in self.outputs if not is_table(resource))
+
+
+class Pipeline:
+    """A DAG of `Stage`s across projects, run concurrently and skipped when their inputs are unchanged.
+
+        pipeline = Pipeline(".pipeline", search_paths=[REPO_ROOT])
+        pipeline.add(Stage("happiness/process", "process_happiness.py", cwd=..., inputs=[...], outputs=[...]))
+        pipeline.run(["happiness"], workers=4)
+
+    Independent stages (e.g. the three projects) run side by side on
+    `workers` threads, each driving one child process whose output goes to
+    `<state_dir>/logs/<stage>.log`. The manifest
+    `<state_dir>/manifest.json` keeps each stage's fingerprint, last status,
+    duration and row count; a table's version is the fingerprint of the stage
+    that last wrote it.
+    """
+
+    def __init__(self, state_dir=".pipeline", search_paths=()):
+        self.state_dir = state_dir
+        self.search_paths = list(search_paths)
+        self.stages = {}
+
+    def add(self, stage):
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage {stage.name!r}")
+        self.stages[stage.name] = stage
+        return stage
+
+    def _manifest_path(self):
+        return os.path.join(self.state_dir, "manifest.json")
+
+    def _load_manifest(self):
+        if not os.path.exists(self._manifest_path()):
+            return {}
+        with open(self._manifest_path(), "r") as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        tmp_path = f"{self._manifest_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _table_versions(self, manifest):
+        """{table: version}, the version being every writer's latest manifest key, whether or not it runs now.
+
+        Tables with several writers (pm25_data) get the same version whichever of them a run selects.
+        """
+        keys = {}
+        for stage in self.stages.values():
+            for resource in stage.outputs:
+                if is_table(resource) and stage.name in manifest:
+                    keys.setdefault(resource, []).append(manifest[stage.name]["key"])
+        return {resource: "\0".join(sorted(stage_keys)) for resource, stage_keys in keys.items()}
+
+    def upstream(self, stage, selected):
+        """Selected stages that produce one of `stage`'s inputs or that it must run `after`."""
+        return [other.name for other in selected if other is not stage
+                and (other.name in stage.after or any(resource in other.outputs for resource in stage.inputs))]
+
+    def select(self, targets=(), groups=None):
+        """Stages matching `targets` (stage names or their "<project>/" prefixes; all when empty), plus the
+        upstream stages they need, limited to `groups`. Returned in dependency order."""
+        candidates = [stage for stage in self.stages.values() if groups is None or stage.group in groups]
+        chosen = {stage.name for stage in candidates if not targets or any(
+            stage.name == target or stage.name.startswith(f"{target}/") for target in targets)}
+        if targets and not chosen:
+            raise ValueError(f"No stages match {list(targets)}")
+        pending = list(chosen)
+        while pending:
+            stage = self.stages[pending.pop()]
+            # `after` only orders stages that are selected anyway; it does not pull them in
+            for name in self.upstream(stage, candidates):
+                if name not in chosen and name not in stage.after:
+                    chosen.add(name)
+                    pending.append(name)
+
+        ordered, done = [], set()
+        while len(ordered) < len(chosen):
+            ready = [name for name in chosen - done
+                     if set(self.upstream(self.stages[name], candidates)) & chosen <= done]
+            if not ready:
+                raise ValueError(f"Dependency cycle among {sorted(chosen - done)}")
+            for name in sorted(ready):
+                ordered.append(self.stages[name])
+                done.add(name)
+        return ordered
+
+    def _run_stage(self, stage, table_versions, previous, force):
+        started = time.perf_counter()
+        key = stage.fingerprint(table_versions, self.search_paths)
+        if not (force or stage.always) and previous.get("key") == key and previous.get("status") != "failed" \
+                and stage.outputs_exist():
+            return {"key": key, "status": "skipped", "duration_s": round(time.perf_counter() - started, 2),
+                    "rows": previous.get("rows")}
+
+        log_path = os.path.join(self.state_dir, "logs", f"{stage.name.replace('/', '__')}.log")
+        with open(log_path, "w") as log:
+            # One run id across all stages, so their metrics records group into this run
+            code = subprocess.call([sys.executable, stage.script, *stage.args], cwd=stage.cwd,
+                                   stdout=log, stderr=subprocess.STDOUT, env={**os.environ, "ETL_RUN_ID": run_id()})
+        result = {"key": key, "status": "ok" if code == 0 else "failed",
+                  "duration_s": round(time.perf_counter() - started, 2), "log": log_path}
+        if code == 0 and stage.rows:
+            result["rows"] = count_rows(stage.path(stage.rows))
+        return result
+
+    def run(self, targets=(), groups=None, workers=None, force=False, dry_run=False):
+        """Run the selected stages; returns {stage name: result} with status ok/skipped/failed/blocked."""
+        started = time.perf_counter()
+        stages = self.select(targets, groups)
+        if dry_run:
+            for stage in stages:
+                print(f"{stage.name:<32} {stage.script}  <- {', '.join(stage.inputs) or '(source)'}")
+            return {}
+
+        os.makedirs(os.path.join(self.state_dir, "logs"), exist_ok=True)
+        manifest = self._load_manifest()
+        table_versions = self._table_versions(manifest)
+
+        upstream = {stage.name: set(self.upstream(stage, stages)) for stage in stages}
+        pending = {stage.name: stage for stage in stages}
+        results = {}
+        workers = min(workers or PIPELINE_WORKERS, len(stages)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                for name in list(pending):
+                    if not upstream[name] <= set(results):
+                        continue
+                    stage = pending.pop(name)
+                    if any(results[dep]["status"] in ("failed", "blocked") for dep in upstream[name]):
+                        results[name] = {"status": "blocked"}
+                        print(f"[{name}] blocked by a failed upstream stage")
+                        continue
+                    versions = {resource: table_versions.get(resource, "") for resource in stage.inputs}
+                    running[pool.submit(self._run_stage, stage, versions, manifest.get(name, {}), force)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result = results[name] = future.result()
+                    print(f"[{name}] {result['status']} in {result['duration_s']}s"
+                          + (f" (see {result['log']})" if result["status"] == "failed" else ""))
+                    if result["status"] == "failed":
+                        manifest[name] = {**manifest.get(name, {}), "status": "failed"}
+                    else:
+                        manifest[name] = {**result, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                        table_versions = self._table_versions(manifest)
+                    self._save_manifest(manifest)
+
+        elapsed = round(time.perf_counter() - started, 2)
+        print(f"\n{'stage':<32}{'status':<9}{'seconds':>9}{'rows':>12}")
+        for stage in stages:
+            result = results[stage.name]
+            rows = result.get("rows")
+            print(f"{stage.name:<32}{result['status']:<9}{result.get('duration_s', 0):>9.2f}"
+                  f"{'' if rows is None else rows:>12}")
+        counts = {status: sum(r["status"] == status for r in results.values())
+                  for status in ("ok", "skipped", "failed", "blocked")}
+        print(f"{len(stages)} stages in {elapsed}s on {workers} workers: {counts['ok']} ran, "
+              f"{counts['skipped']} up to date, {counts['failed']} failed, {counts['blocked']} blocked.")
+        if counts["ok"] or counts["failed"]:
+            print(f"Stage metrics vs the previous run: python -m etl_common.instrumentation --run {run_id()}")
+        return results
@@ -0,0 +1,67 @@
+class TableSchema:
+    """Declared layout of a PostgreSQL table: ordered (column, SQL type) pairs.
+
+    `natural_key` names the columns that identify a row; it is backed by a
+    unique index and used as the conflict target for upserts. `indexes` are
+    extra (name, definition) pairs for read paths, e.g. ("{table}_date_brin", "USING brin (date)").
+    """
+
+    def __init__(self, name, columns, natural_key=None, serial_id=False, indexes=None):
+        self.name = name
+        self.columns = columns
+        self.natural_key = natural_key or []
+        self.serial_id = serial_id
+        self.indexes = indexes or []
+
+    @property
+    def column_names(self):
+        return [column for column, _ in self.columns]
+
+    @property
+    def value_columns(self):
+        return [column for column in self.column_names if column not in self.natural_key]
+
+    def create_sql(self, name=None):
+        definitions = [f"{column} {sql_type}" for column, sql_type in self.columns]
+        if self.serial_id:
+            definitions.insert(0, "id SERIAL PRIMARY KEY")
+        return f"CREATE TABLE IF NOT EXISTS {name or self.name} (\n    " + ",\n    ".join(definitions) + "\n)"
+
+
+PM25_DATA = TableSchema("pm25_data", [
+    ("date", "TIMESTAMP"),
+    ("pm25", "FLOAT"),
+    ("sensor_id", "INTEGER"),
+    ("city", "VARCHAR(255)"),
+    ("country", "VARCHAR(255)"),
+    ("latitude", "FLOAT"),
+    ("longitude", "FLOAT"),
+], natural_key=["sensor_id", "date"], serial_id=True, indexes=[
+    # Incremental loads append newer days after older ones, so a small BRIN index prunes date ranges well
+    ("{table}_date_brin", "USING brin (date)"),
+    ("{table}_country_city_date_idx", "(country, city, date)"),
+])
+
+UNEMPLOYMENT_DATA = TableSchema("unemployment_data", [
+    ("country_name", "TEXT"),
+    ("indicator_name", "TEXT"),
+    ("sex", "TEXT"),
+    ("age_group", "TEXT"),
+    ("age_categories", "TEXT"),
+    ("year", "INT"),
+    ("unemployment_rate", "FLOAT"),
+], natural_key=["country_name", "sex", "age_group", "year"])
+
+HAPPINESS_DATA = TableSchema("happiness_data", [
+    ("country_name", "TEXT"),
+    ("year", "INT"),
+    ("life_ladder", "FLOAT"),
+    ("log_gdp_per_capita", "FLOAT"),
+    ("social_support", "FLOAT"),
+    ("healthy_life_expectancy_at_birth", "FLOAT"),
+    ("freedom_to_make_life_choices", "FLOAT"),
+    ("generosity", "FLOAT"),
+    ("perceptions_of_corruption", "FLOAT"),
+    ("positive_affect", "FLOAT"),
+    ("negative_affect", "FLOAT"),
+], natural_key=["country_name", "year"])
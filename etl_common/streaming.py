@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+
+# Rows per chunk for the processing scripts; 0 reads each input in one piece
+CHUNK_SIZE = int(os.getenv("PROCESS_CHUNK_SIZE", "100000"))
+
+
+def iter_csv(path, chunksize=CHUNK_SIZE, **kwargs):
+    """Yield `path` as DataFrames of at most `chunksize` rows (the whole file when `chunksize` is 0).
+
+    Pass `usecols` so columns a script drops anyway are never parsed.
+    """
+    if not chunksize:
+        yield pd.read_csv(path, **kwargs)
+        return
+    with pd.read_csv(path, chunksize=chunksize, **kwargs) as reader:
+        yield from reader
+
+
+class CsvWriter:
+    """Append DataFrames to a CSV, writing the header once; the file is swapped in when the block exits cleanly."""
+
+    def __init__(self, path, columns):
+        self.path = str(path)
+        self.tmp_path = f"{self.path}.tmp"
+        self.columns = list(columns)
+        self.rows = 0
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+        pd.DataFrame(columns=self.columns).to_csv(self.file, index=False)
+        return self
+
+    def write(self, df):
+        df[self.columns].to_csv(self.file, index=False, header=False)
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        os.replace(self.tmp_path, self.path)
+        return False
@@ -0,0 +1,89 @@
+"""End-to-end ETL for all three projects as one DAG: fetch -> process -> (mongo) -> load -> analyze.
+
+Usage:
+    python run_pipeline.py [target ...] [--groups process,load,analyze] [--force] [--workers N] [--dry-run]
+
+Targets are projects ("air-quality", "unemployment", "happiness") or single
+stages ("air-quality/process"); the default is every stage. Upstream stages a
+target needs are added automatically. Groups pick the kind of stage to run:
+"fetch" (OpenAQ API, needs OPENAQ_API_KEY) and "mongo" (MongoDB staging and
+migration) are opt-in, the default is process,load,analyze; drop "load" to
+run without a database (set PM25_BACKEND=files so the PM2.5 report reads the
+processed files). Stages run from their project directory, independent ones
+concurrently, and are skipped when their inputs and code are unchanged
+(state in .pipeline/).
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+from etl_common.pipeline import Pipeline, Stage
+
+AIR_QUALITY = ROOT / "air-quality-project"
+UNEMPLOYMENT = ROOT / "Global-Unemployment"
+HAPPINESS = ROOT / "World-Happiness"
+DEFAULT_GROUPS = ["process", "load", "analyze"]
+
+PM25_RAW = ["data/raw/pm25_daily_full.csv", "data/raw/pm25_daily_full.json"]
+PM25_PROCESSED = ["data/processed/pm25_geo_enriched.csv", "data/processed/pm25_geo_enriched.parquet",
+                  "data/processed/pm25_temporal.csv", "data/processed/pm25_temporal.parquet",
+                  "data/processed/pm25_sensors.csv", "data/processed/pm25_sensors.parquet",
+                  "data/processed/pm25_sensor_clusters.csv", "data/processed/pm25_sensor_clusters.parquet"]
+UNEMPLOYMENT_CLEANED = ["data/cleaned/cleaned_unemployment.csv", "data/cleaned/cleaned_unemployment.parquet",
+                        "data/cleaned/unemployment_cube.csv"]
+HAPPINESS_CLEANED = ["data/cleaned/cleaned_happiness.csv", "data/cleaned/cleaned_happiness.parquet"]
+
+pipeline = Pipeline(str(ROOT / ".pipeline"), search_paths=[str(ROOT)])
+
+# Air quality: OpenAQ -> enriched readings -> Postgres (+ materialized views) -> charts
+pipeline.add(Stage("air-quality/fetch", "src/fetch_openaq.py", AIR_QUALITY, outputs=PM25_RAW,
+                   group="fetch", always=True))
+pipeline.add(Stage("air-quality/process", "src/process_pm25.py", AIR_QUALITY, inputs=PM25_RAW[:1],
+                   outputs=PM25_PROCESSED))
+pipeline.add(Stage("air-quality/mongo", "src/insert_to_mongodb.py", AIR_QUALITY, inputs=PM25_RAW[1:],
+                   outputs=["mongodb:pm25_raw"], group="mongo", rows=PM25_RAW[0]))
+pipeline.add(Stage("air-quality/migrate", "src/migrate_mongo_to_postgres.py", AIR_QUALITY,
+                   inputs=["mongodb:pm25_raw"], outputs=["postgres:pm25_data"], group="mongo"))
+# Both write pm25_data: the enriched load goes last so its city/coordinates win over the raw Mongo rows
+pipeline.add(Stage("air-quality/load", "src/load_enriched_to_postgres.py", AIR_QUALITY, inputs=PM25_PROCESSED[:1],
+                   outputs=["postgres:pm25_data"], group="load", rows=PM25_PROCESSED[0],
+                   after=["air-quality/migrate"]))
+# The report reads the materialized views by default, the processed files with PM25_BACKEND=files
+pm25_report_inputs = PM25_PROCESSED if os.getenv("PM25_BACKEND", "postgres") == "files" else ["postgres:pm25_data"]
+pipeline.add(Stage("air-quality/analyze", "src/analyze_and_visualize.py", AIR_QUALITY, inputs=pm25_report_inputs,
+                   outputs=["outputs"], env=["PM25_BACKEND"], group="analyze"))
+
+# Global unemployment: Kaggle CSV -> long format + rollup cube -> Postgres -> charts
+pipeline.add(Stage("unemployment/process", "src/process_unemployment.py", UNEMPLOYMENT,
+                   inputs=["data/raw/global_unemployment_data.csv"], outputs=UNEMPLOYMENT_CLEANED))
+pipeline.add(Stage("unemployment/load", "src/load_to_postgres.py", UNEMPLOYMENT, inputs=UNEMPLOYMENT_CLEANED[:1],
+                   outputs=["postgres:unemployment_data"], group="load", rows=UNEMPLOYMENT_CLEANED[0]))
+pipeline.add(Stage("unemployment/analyze", "src/analyze_and_visualize.py", UNEMPLOYMENT,
+                   inputs=UNEMPLOYMENT_CLEANED[:2], outputs=["outputs"], group="analyze"))
+
+# World happiness: Kaggle CSV -> cleaned -> Postgres -> charts
+pipeline.add(Stage("happiness/process", "process_happiness.py", HAPPINESS, inputs=["world-happiness-report.csv"],
+                   outputs=HAPPINESS_CLEANED))
+pipeline.add(Stage("happiness/load", "load_to_postgres.py", HAPPINESS, inputs=HAPPINESS_CLEANED[:1],
+                   outputs=["postgres:happiness_data"], group="load", rows=HAPPINESS_CLEANED[0]))
+pipeline.add(Stage("happiness/analyze", "analyze_and_visualize.py", HAPPINESS, inputs=HAPPINESS_CLEANED,
+                   outputs=["outputs"], group="analyze"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ETL pipelines, skipping stages whose inputs are unchanged.")
+    parser.add_argument("targets", nargs="*", help="projects or project/stage names (default: all)")
+    parser.add_argument("--groups", default=",".join(DEFAULT_GROUPS),
+                        help="comma-separated stage groups: fetch, process, mongo, load, analyze")
+    parser.add_argument("--force", action="store_true", help="rerun stages even when up to date")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent stages (default: PIPELINE_WORKERS or all cores)")
+    parser.add_argument("--dry-run", action="store_true", help="list the selected stages in run order and exit")
+    args = parser.parse_args()
+
+    results = pipeline.run(args.targets, groups=args.groups.split(","), workers=args.workers,
+                           force=args.force, dry_run=args.dry_run)
+    if any(result["status"] in ("failed", "blocked") for result in results.values()):
+        sys.exit(1)
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The projects are script folders, not packages: make their modules importable the way their scripts do
+ROOT = Path(__file__).resolve().parents[1]
+for path in [ROOT, ROOT / "air-quality-project" / "src", ROOT / "Global-Unemployment" / "src", ROOT / "World-Happiness"]:
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from etl_common.data_cache import load_frame
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "readings.csv"
+    pd.DataFrame({"date": ["2024-01-01", "2024-02-01"], "pm25": [10.0, 20.0], "city": ["Delhi", "Lima"]}) \
+        .to_csv(path, index=False)
+    return path
+
+
+def load(source):
+    return load_frame("readings", lambda: pd.read_csv(source).astype({"city": "category"}), source)
+
+
+def test_added_column_does_not_leak_to_the_next_caller(source):
+    first = load(source)
+    first["month"] = 1
+    first.drop(columns="city", inplace=True)
+    second = load(source)
+    assert list(second.columns) == ["date", "pm25", "city"]
+
+
+def test_writes_into_shared_values_raise(source):
+    frame = load(source)
+    with pytest.raises(ValueError):
+        frame.loc[0, "pm25"] = 99.0
+    assert load(source)["pm25"].tolist() == [10.0, 20.0]
+
+
+def test_loader_runs_once_per_signature(source):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return pd.read_csv(source)
+
+    load_frame("counted", loader, source)
+    load_frame("counted", loader, source)
+    assert len(calls) == 1
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from etl_common.dtypes import optimize_dtypes
+
+
+def frame():
+    return pd.DataFrame({
+        "country": ["India", "Peru", "India"],
+        "year": np.array([2014, 2015, 2016], dtype="int64"),
+        "pm25": [123.456789012345, 0.1, 1e-9],
+        "latitude": [28.6139, -12.0464, 19.076],
+    })
+
+
+def test_floats_stay_float64_unless_opted_in():
+    df = optimize_dtypes(frame(), verbose=False, float32_columns=["latitude"])
+    assert df["pm25"].dtype == "float64"
+    assert df["pm25"].equals(frame()["pm25"])
+    assert df["latitude"].dtype == "float32"
+    assert df["year"].dtype == "int16"
+    assert isinstance(df["country"].dtype, pd.CategoricalDtype)
+
+
+def test_measure_means_are_unchanged():
+    df = frame()
+    assert optimize_dtypes(df, verbose=False)["pm25"].mean() == df["pm25"].mean()
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+import fetch_openaq
+
+
+@pytest.fixture(autouse=True)
+def raw_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_openaq, "RAW_CSV_PATH", str(tmp_path / "raw" / "pm25.csv"))
+    monkeypatch.setattr(fetch_openaq, "RAW_JSON_PATH", str(tmp_path / "raw" / "pm25.json"))
+
+
+def test_columns_of_later_sensors_are_added_to_the_header():
+    fetch_openaq.append_raw(pd.DataFrame({"sensor_id": [1, 1], "value": [10.5, 11.0], "coverage.percent": [100, 95]}))
+    fetch_openaq.append_raw(pd.DataFrame({"sensor_id": [2], "value": [7.25], "flagInfo.hasFlags": [True]}))
+    fetch_openaq.append_raw(pd.DataFrame({"value": [3.0], "sensor_id": [3]}))
+
+    raw = pd.read_csv(fetch_openaq.RAW_CSV_PATH)
+    assert list(raw.columns) == ["sensor_id", "value", "coverage.percent", "flagInfo.hasFlags"]
+    assert raw["sensor_id"].tolist() == [1, 1, 2, 3]
+    assert raw["value"].tolist() == [10.5, 11.0, 7.25, 3.0]
+    assert raw["coverage.percent"].tolist()[:2] == [100, 95] and raw["coverage.percent"][2:].isna().all()
+    assert raw["flagInfo.hasFlags"].tolist()[2] is True
+    assert len(pd.read_json(fetch_openaq.RAW_JSON_PATH, lines=True)) == 4
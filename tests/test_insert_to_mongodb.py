@@ -0,0 +1,100 @@
+import json
+
+import mongomock  # type: ignore
+import pytest
+
+import insert_to_mongodb as mongo
+
+
+def stats():
+    return {"inserted": 0, "updated": 0, "duplicates": 0, "failed": 0, "malformed": 0}
+
+
+def record(sensor_id, day, value):
+    # One json_normalize'd row as fetch_openaq appends it to the raw JSONL file
+    return {"sensor_id": sensor_id, "period.datetimeFrom.utc": f"2024-01-{day:02d}T00:00:00Z", "value": value}
+
+
+def write_jsonl(path, records, malformed=0):
+    lines = [json.dumps(r) for r in records] + ["{not json"] * malformed
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient()["airquality"]["pm25_raw"]
+    mongo.ensure_indexes(collection)
+    return collection
+
+
+def load(collection, path, write_chunk=mongo.insert_chunk, chunk_size=5):
+    counts = stats()
+    for chunk in mongo.iter_chunks(path, chunk_size, counts):
+        write_chunk(collection, chunk, counts)
+    return counts
+
+
+def test_chunks_are_inserted_and_unflattened(collection, tmp_path):
+    path = write_jsonl(tmp_path / "raw.json", [record(1, day, day * 1.5) for day in range(1, 13)], malformed=1)
+    assert [len(chunk) for chunk in mongo.iter_chunks(path, 5)] == [5, 5, 2]
+
+    counts = load(collection, path)
+    assert counts == {**stats(), "inserted": 12, "malformed": 1}
+    doc = collection.find_one({"sensor_id": 1, "period.datetimeFrom.utc": "2024-01-03T00:00:00Z"})
+    assert doc["value"] == 4.5
+
+
+def test_rerun_skips_duplicates_and_keeps_the_rest_of_each_chunk(collection, tmp_path):
+    first = [record(1, day, 10.0) for day in range(1, 8)]
+    load(collection, write_jsonl(tmp_path / "first.json", first))
+    # The same file again with new days interleaved: unordered inserts keep going past each duplicate
+    again = [r for day in range(1, 8) for r in (record(1, day, 10.0), record(2, day, 20.0))]
+    counts = load(collection, write_jsonl(tmp_path / "again.json", again))
+
+    assert counts["inserted"] == 7 and counts["duplicates"] == 7 and counts["failed"] == 0
+    assert collection.count_documents({}) == 14
+    assert collection.count_documents({"sensor_id": 1}) == 7
+
+
+def test_upsert_is_idempotent_and_picks_up_revised_values(collection, tmp_path):
+    records = [record(1, day, 10.0) for day in range(1, 8)]
+    path = write_jsonl(tmp_path / "raw.json", records)
+
+    assert load(collection, path, mongo.upsert_chunk)["inserted"] == 7
+    second = load(collection, path, mongo.upsert_chunk)
+    assert second["inserted"] == 0 and second["updated"] == 0
+    assert collection.count_documents({}) == 7
+
+    records[2]["value"] = 99.0
+    revised = load(collection, write_jsonl(tmp_path / "revised.json", records), mongo.upsert_chunk)
+    assert revised["inserted"] == 0 and revised["updated"] == 1
+    assert collection.count_documents({}) == 7
+    assert collection.find_one({"period.datetimeFrom.utc": "2024-01-03T00:00:00Z"})["value"] == 99.0
+
+
+def test_upsert_after_plain_inserts_adds_no_copies(collection, tmp_path):
+    path = write_jsonl(tmp_path / "raw.json", [record(1, day, 10.0) for day in range(1, 8)])
+    load(collection, path)
+    counts = load(collection, path, mongo.upsert_chunk)
+    assert counts["inserted"] == 0 and counts["failed"] == 0
+    assert collection.count_documents({}) == 7
+
+
+def test_index_builds_on_a_collection_loaded_before_it(tmp_path):
+    # What the original script left behind: flat json_normalize'd rows inserted as they were, repeats included
+    collection = mongomock.MongoClient()["airquality"]["pm25_raw"]
+    legacy = [record(1, day, 10.0) for day in range(1, 6)] + [record(1, 2, 12.0), record(2, 1, 5.0)]
+    collection.insert_many([dict(r) for r in legacy])
+
+    mongo.ensure_indexes(collection, chunk_size=3)
+
+    assert "sensor_day_unique" in collection.index_information()
+    assert collection.count_documents({}) == 6
+    assert collection.count_documents({"period.datetimeFrom.utc": {"$exists": False}}) == 0
+    # The newest copy of a repeated day is the one kept
+    assert collection.find_one({"sensor_id": 1, "period.datetimeFrom.utc": "2024-01-02T00:00:00Z"})["value"] == 12.0
+    # Loading the same file now only finds duplicates
+    counts = load(collection, write_jsonl(tmp_path / "raw.json", legacy))
+    assert counts["inserted"] == 0 and counts["duplicates"] == 7
+    mongo.ensure_indexes(collection)
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from etl_common import instrumentation
+from etl_common.instrumentation import stage
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="current RSS is read from /proc")
+
+
+@pytest.fixture(autouse=True)
+def metrics_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_PATH", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+
+
+def last_record():
+    return instrumentation._records[-1]
+
+
+def test_peak_rss_is_the_stages_own():
+    with stage("allocate"):
+        block = np.ones(200 << 17)  # 200 MB, freed before the stage ends
+        time.sleep(0.2)
+        del block
+    allocate = last_record()
+    with stage("idle"):
+        time.sleep(0.2)
+    idle = last_record()
+
+    assert allocate["peak_rss_mb"] > idle["peak_rss_mb"] + 150
+    assert abs(allocate["rss_delta_mb"]) < 50
+    # The lifetime high-water mark still includes the earlier stage's allocation
+    assert idle["process_peak_rss_mb"] >= allocate["peak_rss_mb"] - 1
+
+
+def test_import_leaves_the_environment_alone():
+    env = {key: value for key, value in os.environ.items() if key != "ETL_RUN_ID"}
+    code = "import os, etl_common.instrumentation; print('ETL_RUN_ID' in os.environ)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env,
+                         cwd=instrumentation.ROOT).stdout
+    assert out.strip() == "False"
+
+
+def test_run_id_is_exported_on_first_use(monkeypatch):
+    monkeypatch.delenv("ETL_RUN_ID", raising=False)
+    monkeypatch.setattr(instrumentation, "_run_id", None)
+    with stage("first"):
+        pass
+    assert last_record()["run_id"] == os.environ["ETL_RUN_ID"]
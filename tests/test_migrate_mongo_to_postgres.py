@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from bson import ObjectId  # type: ignore
+
+import migrate_mongo_to_postgres as migrate
+
+
+@pytest.fixture(autouse=True)
+def dead_letter_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrate, "DEAD_LETTER_PATH", str(tmp_path / "dead_letter.jsonl"))
+    return tmp_path / "dead_letter.jsonl"
+
+
+def docs():
+    return [{"_id": ObjectId(), "sensor_id": 1, "date": "2024-01-01", "pm25": 12.0},
+            {"_id": ObjectId(), "sensor_id": 1, "date": "2024-01-02", "pm25": "n/a"},
+            {"_id": ObjectId(), "date": "2024-01-03", "pm25": 8.0}]
+
+
+def emit(batch, resuming):
+    dead_letter, dead_ids = migrate.open_dead_letter(resuming)
+    stats = {"read": 0, "rejected": 0, "pending_id": None, "dead_ids": dead_ids}
+    with dead_letter:
+        rows = list(migrate._emit(batch, dead_letter, stats))[0]
+    return rows, stats
+
+
+def test_resumed_batch_does_not_record_its_rejects_twice(dead_letter_path):
+    batch = docs()
+    rows, stats = emit(batch, resuming=False)
+    assert len(rows) == 1 and stats["rejected"] == 2
+    # An interrupted run re-reads the uncommitted batch on resume
+    emit(batch, resuming=True)
+    reasons = [json.loads(line)["reason"] for line in dead_letter_path.read_text().splitlines()]
+    assert reasons == ["invalid pm25", "missing sensor_id"]
+
+
+def test_fresh_run_truncates_the_dead_letter_file(dead_letter_path):
+    emit(docs(), resuming=False)
+    emit(docs(), resuming=False)
+    assert len(dead_letter_path.read_text().splitlines()) == 2
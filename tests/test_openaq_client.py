@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from openaq_client import OpenAQClient, PaginationError
+
+
+class StubOpenAQ(BaseHTTPRequestHandler):
+    """Serves `records` a page at a time; `script` maps a path to the statuses of its first requests."""
+
+    records = []
+    script = {}
+    calls = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: int(values[0]) for key, values in parse_qs(url.query).items()}
+        self.calls.append((url.path, query.get("page")))
+        statuses = self.script.get((url.path, query.get("page"))) or self.script.get(url.path) or []
+        if statuses:
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+            if status != 200:
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0.2")
+                self.end_headers()
+                return
+        start = (query.get("page", 1) - 1) * query.get("limit", 1000)
+        body = json.dumps({"results": self.records[start:start + query.get("limit", 1000)]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StubOpenAQ.records = [{"value": i} for i in range(2500)]
+    StubOpenAQ.script = {}
+    StubOpenAQ.calls = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenAQ)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client(server, **kwargs):
+    # rate=0 turns the token bucket off; backoff is shortened so exhausted retries finish quickly
+    return OpenAQClient(base_url=f"http://127.0.0.1:{server.server_port}/v3", rate=0, backoff=0.001, **kwargs)
+
+
+def test_retry_after_is_honoured_on_429(server):
+    StubOpenAQ.script = {"/v3/sensors/1/days": [429, 200]}
+    api = client(server)
+    body = api.get("/sensors/1/days", {"limit": 10})
+    assert len(body["results"]) == 10
+    assert api.stats.requests == 2 and api.stats.retries == 1 and api.stats.failures == 0
+    assert api.stats.throttled_seconds == pytest.approx(0.2)
+
+
+def test_get_gives_up_after_max_retries(server):
+    StubOpenAQ.script = {"/v3/sensors/1/days": [503]}
+    api = client(server, max_retries=3)
+    assert api.get("/sensors/1/days") is None
+    assert len(StubOpenAQ.calls) == 4
+    assert api.stats.retries == 3 and api.stats.failures == 1
+
+
+def test_get_does_not_retry_client_errors(server):
+    StubOpenAQ.script = {"/v3/sensors/1/days": [404]}
+    api = client(server)
+    assert api.get("/sensors/1/days") is None
+    assert len(StubOpenAQ.calls) == 1
+
+
+def test_paginate_follows_pages_until_a_short_one(server):
+    api = client(server)
+    results = api.paginate("/sensors/1/days", page_size=1000)
+    assert [r["value"] for r in results] == list(range(2500))
+    assert [page for _, page in StubOpenAQ.calls] == [1, 2, 3]
+
+
+def test_paginate_stops_at_max_records(server):
+    results = client(server).paginate("/sensors/1/days", max_records=1500)
+    assert len(results) == 1500
+    assert [page for _, page in StubOpenAQ.calls] == [1, 2]
+
+
+def test_paginate_raises_when_a_later_page_fails(server):
+    StubOpenAQ.script = {("/v3/sensors/1/days", 2): [500]}
+    with pytest.raises(PaginationError) as error:
+        client(server, max_retries=2).paginate("/sensors/1/days")
+    assert error.value.page == 2
+    assert len(error.value.results) == 1000
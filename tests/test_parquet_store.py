@@ -0,0 +1,30 @@
+import pandas as pd
+
+from etl_common.parquet_store import read_dataset, write_dataset
+
+DTYPES = {"grain": "category", "city": "category", "period": "int32", "pm25_sum": "float64"}
+
+
+def frame(rows):
+    return pd.DataFrame({
+        "grain": pd.Categorical(["daily", "yearly"] * (rows // 2)),
+        "city": pd.Categorical(["Delhi"] * rows),
+        "period": pd.Series(range(rows), dtype="int32"),
+        "pm25_sum": [10.0] * rows,
+    })
+
+
+def test_empty_partitioned_dataset_keeps_every_column(tmp_path):
+    write_dataset(frame(0), tmp_path / "empty.parquet", DTYPES, partition_cols=["grain"])
+    df = read_dataset(tmp_path / "empty.parquet")
+    assert df.empty
+    assert list(df.columns) == list(DTYPES)
+    assert df["period"].dtype == "int32"
+    assert read_dataset(tmp_path / "empty.parquet", filters=[("grain", "==", "daily")]).empty
+
+
+def test_partition_column_reads_back(tmp_path):
+    write_dataset(frame(4), tmp_path / "cells.parquet", DTYPES, partition_cols=["grain"])
+    df = read_dataset(tmp_path / "cells.parquet", filters=[("grain", "==", "yearly")])
+    assert len(df) == 2 and set(df["grain"]) == {"yearly"}
+    assert df["period"].dtype == "int32"
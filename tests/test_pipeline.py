@@ -0,0 +1,46 @@
+import pytest
+
+from etl_common.pipeline import Pipeline, Stage
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    # The pm25_data writers of run_pipeline.py: both produce the table, only `after` orders them
+    pipeline = Pipeline(str(tmp_path / ".pipeline"))
+    pipeline.add(Stage("aq/migrate", "migrate.py", ".", inputs=["mongodb:pm25_raw"], outputs=["postgres:pm25_data"],
+                       group="mongo"))
+    pipeline.add(Stage("aq/load", "load.py", ".", inputs=["enriched.csv"], outputs=["postgres:pm25_data"],
+                       group="load", after=["aq/migrate"]))
+    pipeline.add(Stage("aq/analyze", "analyze.py", ".", inputs=["postgres:pm25_data"], outputs=["outputs"],
+                       group="analyze"))
+    return pipeline
+
+
+def test_after_orders_writers_of_the_same_table(pipeline):
+    assert [stage.name for stage in pipeline.select()] == ["aq/migrate", "aq/load", "aq/analyze"]
+
+
+def test_after_does_not_pull_in_unselected_stages(pipeline):
+    assert [stage.name for stage in pipeline.select(["aq/load"])] == ["aq/load"]
+    assert [stage.name for stage in pipeline.select(["aq/load"], groups=["load"])] == ["aq/load"]
+
+
+def test_table_version_does_not_depend_on_which_writers_ran(tmp_path):
+    for script in ("migrate.py", "load.py", "analyze.py"):
+        (tmp_path / script).write_text("pass\n")
+    (tmp_path / "enriched.csv").write_text("a\n1\n")
+    pipeline = Pipeline(str(tmp_path / ".pipeline"))
+    pipeline.add(Stage("aq/migrate", "migrate.py", str(tmp_path), inputs=["mongodb:pm25_raw"],
+                       outputs=["postgres:pm25_data"], group="mongo"))
+    pipeline.add(Stage("aq/load", "load.py", str(tmp_path), inputs=["enriched.csv"], outputs=["postgres:pm25_data"],
+                       group="load", after=["aq/migrate"]))
+    pipeline.add(Stage("aq/analyze", "analyze.py", str(tmp_path), inputs=["postgres:pm25_data"], group="analyze"))
+
+    def statuses(groups):
+        return {name: result["status"] for name, result in pipeline.run(groups=groups, workers=1).items()}
+
+    assert statuses(["mongo", "load", "analyze"])["aq/analyze"] == "ok"
+    # Nothing changed: whichever writers are selected, the reader is up to date
+    assert set(statuses(["load", "analyze"]).values()) == {"skipped"}
+    assert set(statuses(["analyze"]).values()) == {"skipped"}
+    assert set(statuses(["mongo", "load", "analyze"]).values()) == {"skipped"}
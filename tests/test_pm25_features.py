@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pm25_features import PM25Aggregates, in_date_range, temporal_aggregates
+
+
+@pytest.fixture
+def readings():
+    # Hourly readings, so every day (including the last day of a range) has some after midnight
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-01-01", "2024-08-31 23:00", freq="h")
+    return pd.DataFrame({
+        "date": dates,
+        "pm25": rng.gamma(2.0, 40.0, len(dates)),
+        "country": "IN",
+        "city": rng.choice(["Delhi", "Mumbai"], len(dates)),
+    })
+
+
+@pytest.mark.parametrize("start, end", [("2024-03-01", "2024-06-30"), ("2024-01-01", "2024-01-01"),
+                                        (None, "2024-05-15"), ("2024-07-04", None)])
+def test_aggregate_means_match_row_filtered_means(readings, start, end):
+    aggregates = PM25Aggregates(temporal_aggregates(readings))
+    rows = readings[in_date_range(readings["date"], start, end)]
+
+    mean, peak, n_cities = aggregates.kpis(start=start, end=end)
+    assert mean == pytest.approx(rows["pm25"].mean())
+    assert peak == pytest.approx(rows["pm25"].max())
+
+    city_means = aggregates.top_cities(10, start=start, end=end).set_index("city")["pm25"]
+    expected = rows.groupby("city")["pm25"].mean()
+    assert city_means.sort_index().to_numpy() == pytest.approx(expected.sort_index().to_numpy())
+
+
+def test_end_date_covers_its_whole_day(readings):
+    rows = readings[in_date_range(readings["date"], "2024-06-30", "2024-06-30")]
+    assert len(rows) == 24
+
+
+def test_histogram_mean_matches_the_aggregates(readings, tmp_path, monkeypatch):
+    import analyze_and_visualize
+    from etl_common.parquet_store import write_dataset
+
+    # Readings whose sensor was never located are left out of every aggregate, the histogram included
+    unlocated = readings.iloc[:500].assign(pm25=900.0, city=None, country=None)
+    rows = pd.concat([readings, unlocated], ignore_index=True)
+    monkeypatch.setattr(analyze_and_visualize, "PARQUET_PATH", str(tmp_path / "readings.parquet"))
+    monkeypatch.setattr(analyze_and_visualize, "TEMPORAL_PARQUET_PATH", str(tmp_path / "temporal.parquet"))
+    write_dataset(rows, analyze_and_visualize.PARQUET_PATH,
+                  {"pm25": "float64", "city": "category", "country": "category"}, partition_cols=[])
+    temporal = temporal_aggregates(rows)
+    write_dataset(temporal, analyze_and_visualize.TEMPORAL_PARQUET_PATH,
+                  {"grain": "category", "country": "category", "city": "category", "period": "int32",
+                   "pm25_sum": "float64", "pm25_count": "int64", "pm25_max": "float64"}, partition_cols=["grain"])
+
+    aggregates = analyze_and_visualize.load_aggregates()
+    counts, mean = aggregates.histogram()
+    assert counts["count"].sum() == len(readings)
+    assert mean == pytest.approx(aggregates.kpis()[0])
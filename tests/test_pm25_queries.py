@@ -0,0 +1,15 @@
+import datetime
+
+from pm25_queries import PM25Queries
+
+
+def test_timestamp_column_keeps_the_whole_end_day():
+    where, params = PM25Queries._where("IN", start="2024-03-01", end="2024-06-30", date_column="date")
+    assert where == "WHERE country = %s AND date >= %s AND date < %s"
+    assert params == ["IN", datetime.date(2024, 3, 1), datetime.date(2024, 7, 1)]
+
+
+def test_day_column_of_the_views_stays_inclusive():
+    where, params = PM25Queries._where(start="2024-03-01", end="2024-06-30", date_column="day")
+    assert where == "WHERE day >= %s AND day <= %s"
+    assert params == [datetime.date(2024, 3, 1), datetime.date(2024, 6, 30)]
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+import process_pm25
+from etl_common.parquet_store import read_dataset
+from pm25_features import PM25Aggregates
+
+OUTPUTS = ["csv_path", "parquet_path", "temporal_csv_path", "temporal_parquet_path", "sensors_csv_path",
+           "sensors_parquet_path", "clusters_csv_path", "clusters_parquet_path"]
+
+
+@pytest.mark.parametrize("raw", ["", ",".join(process_pm25.RAW_COLUMNS) + "\n"], ids=["zero bytes", "header only"])
+def test_empty_raw_export_writes_empty_outputs(tmp_path, raw):
+    (tmp_path / "raw.csv").write_text(raw)
+    sensors = pd.DataFrame({"sensor_id": pd.Series(dtype="int64"), "latitude": pd.Series(dtype="float64"),
+                            "longitude": pd.Series(dtype="float64"), "city": pd.Series(dtype=object),
+                            "country": pd.Series(dtype=object)})
+    paths = {name: tmp_path / name for name in OUTPUTS}
+
+    assert process_pm25.write_enriched(sensors, raw_path=tmp_path / "raw.csv", **paths) == 0
+    aggregates = PM25Aggregates(read_dataset(paths["temporal_parquet_path"]))
+    assert aggregates.daily_avg().empty
+    assert list(read_dataset(paths["parquet_path"]).columns) == list(process_pm25.DTYPES)
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from process_pm25 import SENSOR_DTYPES
+from sensor_index import CLUSTER_COLUMNS, SensorIndex, cluster_levels
+
+
+def sensors(rows):
+    return pd.DataFrame(rows, columns=list(SENSOR_DTYPES)).astype(SENSOR_DTYPES)
+
+
+def test_index_without_located_sensors_has_no_markers():
+    table = sensors([])
+    index = SensorIndex(table, cluster_levels(table))
+    markers = index.clusters_in(3, -90.0, -180.0, 90.0, 180.0)
+    assert markers.empty and list(markers.columns) == CLUSTER_COLUMNS
+    assert index.within(-90.0, -180.0, 90.0, 180.0).empty
+
+
+def test_whole_world_box_returns_every_marker_of_the_level():
+    day = pd.Timestamp("2024-01-01")
+    table = sensors([
+        [1, "IN", "Delhi", 28.61, 77.21, 90.0, 150.0, 80.0, day, 10],
+        [2, "PE", "Lima", -12.05, -77.04, 20.0, 30.0, 18.0, day, 5],
+        [3, "NZ", "Auckland", -36.85, 174.76, 5.0, 9.0, 4.0, day, 7],
+    ])
+    index = SensorIndex(table, cluster_levels(table))
+    markers = index.clusters_in(10, -90.0, -180.0, 90.0, 180.0)
+    assert sorted(markers["sensor_id"]) == [1, 2, 3]
@@ -0,0 +1,73 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from unemployment_cube import (ALL, DIMENSIONS, MEASURE, UnemploymentCube, base_cells, build_cube, combine_base,
+                               verify_cube)
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "country_name": rng.choice(["Chile", "Kenya", "Spain"], n),
+        "sex": rng.choice(["Female", "Male"], n),
+        "age_group": rng.choice(["15-24", "25+", "Under 15"], n),
+        "year": rng.integers(2014, 2018, n),
+        MEASURE: rng.uniform(0, 40, n).round(3),
+    })
+    # A missing rate is not counted, as in the cleaned data before dropna
+    df.loc[::37, MEASURE] = np.nan
+    return df
+
+
+def test_every_rollup_matches_groupby(rows):
+    cube = UnemploymentCube(build_cube(rows))
+    for size in range(len(DIMENSIONS) + 1):
+        for dims in combinations(DIMENSIONS, size):
+            dims = list(dims)
+            if dims:
+                expected = rows.groupby(dims)[MEASURE].agg(["mean", "max", "count"]).reset_index()
+                countries = rows.dropna(subset=[MEASURE]).groupby(dims)["country_name"].nunique()
+            else:
+                expected = pd.DataFrame([{"mean": rows[MEASURE].mean(), "max": rows[MEASURE].max(),
+                                          "count": rows[MEASURE].count()}])
+                countries = None
+            for row in expected.to_dict("records"):
+                cell = cube.cell(**{dim: row[dim] for dim in dims})
+                assert cell is not None, (dims, row)
+                assert cell["mean"] == pytest.approx(row["mean"])
+                assert cell["max"] == pytest.approx(row["max"])
+                assert cell["count"] == row["count"]
+                key = tuple(row[dim] for dim in dims)
+                expected_countries = rows["country_name"].nunique() if countries is None else \
+                    countries[key if len(dims) > 1 else key[0]]
+                assert cell["n_countries"] == expected_countries
+
+
+def test_chunked_base_cells_build_the_same_cube(rows):
+    whole = build_cube(rows).sort_values(DIMENSIONS).reset_index(drop=True)
+    chunks = combine_base([base_cells(rows.iloc[:150]), base_cells(rows.iloc[150:])])
+    chunked = build_cube(base=chunks).sort_values(DIMENSIONS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(whole, chunked, check_dtype=False)
+
+
+def test_breakdown_matches_groupby(rows):
+    cube = UnemploymentCube(build_cube(rows))
+    got = cube.breakdown(["year", "sex"], country_name="Spain").sort_values(["year", "sex"]).reset_index(drop=True)
+    spain = rows[rows["country_name"] == "Spain"]
+    expected = spain.groupby(["year", "sex"])[MEASURE].mean().reset_index()
+    np.testing.assert_allclose(got[MEASURE], expected[MEASURE])
+    assert got["year"].tolist() == expected["year"].tolist()
+
+
+def test_verify_cube_raises_on_a_wrong_cell(rows):
+    cube = build_cube(rows)
+    assert verify_cube(cube, rows)
+    total = (cube[DIMENSIONS] == ALL).all(axis=1)
+    cube.loc[total, "rate_sum"] += 1.0
+    with pytest.raises(ValueError):
+        verify_cube(cube, rows)